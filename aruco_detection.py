@@ -0,0 +1,586 @@
+"""
+웹캠 캡처와 ArUco 마커 감지 - tts.py와 감지 프로세스 (ARUCO_DETECTION_PROCESS=1)가 함께 사용합니다.
+
+감지 프로세스는 spawn으로 시작되어 이 모듈만 import하므로, 여기에는 tts.py를 import하거나
+OpenAI 클라이언트, VideoPlayer 같은 전역 상태를 만드는 코드를 두지 않습니다.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+import queue
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+import cv2
+import cv2.aruco as aruco
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================
+# 웹캠 / ArUco 감지 설정
+# ============================================
+IDLE_POLL_INTERVAL = 0.2  # 대기 모드에서 웹캠 마커 감지/화면 갱신 주기 (초)
+CAMERA_INDEX = int(os.getenv("CAMERA_INDEX", "0"))  # 웹캠 장치 번호
+CAMERA_PROFILES = {  # 웹캠을 열 때 적용할 설정 (fourcc, 해상도, fps) - 빈 값은 드라이버 기본값
+    "default": {},
+    "720p_mjpg": {"fourcc": "MJPG", "width": 1280, "height": 720, "fps": 30},
+    "1080p_mjpg": {"fourcc": "MJPG", "width": 1920, "height": 1080, "fps": 30},
+    "720p_yuyv": {"fourcc": "YUYV", "width": 1280, "height": 720, "fps": 10},
+    "480p_yuyv": {"fourcc": "YUYV", "width": 640, "height": 480, "fps": 30},
+}
+CAMERA_PROFILE = os.getenv("CAMERA_PROFILE", "default")  # 사용할 웹캠 프로파일 이름
+CAMERA_REPORT_INTERVAL = 10.0  # 웹캠 캡처 → 감지 지연 보고 주기 (초)
+ARUCO_DICTIONARY = aruco.getPredefinedDictionary(aruco.DICT_5X5_1000)
+ARUCO_TRACKING = os.getenv("ARUCO_TRACKING", "1") != "0"  # 0이면 매 프레임 전체 해상도 감지 (기존 방식)
+ARUCO_DETECTION_PROCESS = os.getenv("ARUCO_DETECTION_PROCESS", "0") == "1"  # 1이면 웹캠 캡처/마커 감지를 별도 프로세스에서 실행
+DETECTION_FRAME_SLOTS = 3  # 감지 프로세스 → 메인 프로세스 공유 메모리 프레임 슬롯 수
+ARUCO_DOWNSCALE = float(os.getenv("ARUCO_DOWNSCALE", "0.5"))  # 추적 중인 마커가 없을 때 축소 감지 배율 (1.0 = 축소 안 함)
+ARUCO_ROI_PADDING = 0.75  # 마지막 마커 영역 주변 탐색 여백 (마커 크기 대비 비율)
+ARUCO_FULL_SEARCH_INTERVAL = 15  # 빠른 경로만 쓰다가 전체 해상도 전체 프레임 감지를 하는 주기 (프레임)
+ARUCO_PROFILE_PATH = os.getenv("ARUCO_PROFILE", "aruco_profile.json")  # tune_aruco_params.py가 만든 감지 파라미터
+
+
+def make_aruco_detector_parameters(params: dict = None):
+    """기본 DetectorParameters에 params의 값들을 적용합니다 (모르는 이름은 경고 후 무시)."""
+    detector_params = aruco.DetectorParameters()
+    for name, value in (params or {}).items():
+        if not hasattr(detector_params, name):
+            print(f"⚠️ 알 수 없는 ArUco 파라미터 무시: {name}")
+            continue
+        setattr(detector_params, name, value)
+    return detector_params
+
+
+def load_aruco_detector_parameters(path: str = ARUCO_PROFILE_PATH):
+    """
+    tune_aruco_params.py가 저장한 프로파일에서 감지 파라미터를 불러옵니다.
+    프로파일이 없거나 읽을 수 없으면 기본 파라미터를 반환합니다.
+    """
+    if not path or not os.path.exists(path):
+        return aruco.DetectorParameters()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+        params = profile["params"]
+    except (OSError, ValueError, KeyError) as e:
+        print(f"⚠️ ArUco 프로파일을 읽을 수 없습니다 ({path}): {e} - 기본 파라미터 사용")
+        return aruco.DetectorParameters()
+    print(f"🔧 ArUco 프로파일 로드: {path} ({len(params)}개 파라미터"
+          f"{', 프레임당 %.1fms' % profile['ms_per_frame'] if profile.get('ms_per_frame') else ''})")
+    return make_aruco_detector_parameters(params)
+
+
+# ============================================
+# 웹캠 캡처 / 마커 감지
+# ============================================
+class LatencyReport:
+    """캡처 → 감지 지연을 모아 report_interval마다 평균/p95/최대와 감지 전에 교체된 프레임 수를 출력합니다."""
+    
+    def __init__(self, label: str, report_interval: float = CAMERA_REPORT_INTERVAL):
+        self.label = label
+        self.report_interval = report_interval
+        self._latencies = []  # 최근 보고 이후 지연 (초)
+        self._last_report = None
+    
+    def record(self, captured_at: float, overwritten: int) -> bool:
+        """지연을 기록하고, 보고 주기가 되면 출력합니다. 출력했으면 True (호출자가 교체 카운터를 초기화)"""
+        now = time.perf_counter()
+        self._latencies.append(now - captured_at)
+        if self._last_report is None:
+            self._last_report = now
+            return False
+        if now - self._last_report < self.report_interval:
+            return False
+        latencies = sorted(self._latencies)
+        print(f"📷 {self.label} (최근 {self.report_interval:.0f}초, {len(latencies)}회): "
+              f"평균 {sum(latencies) / len(latencies) * 1000:.1f}ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms, 최대 {latencies[-1] * 1000:.1f}ms, "
+              f"감지 전에 교체된 프레임 {overwritten}")
+        self._latencies = []
+        self._last_report = now
+        return True
+
+
+class CameraCapture:
+    """
+    웹캠 전용 캡처 스레드. 카메라에서 계속 프레임을 가져와 가장 최근 프레임 하나만 보관하므로,
+    감지 루프가 느려져도 드라이버 버퍼에 오래된 프레임이 쌓이지 않고 항상 새 프레임으로 감지합니다.
+    대기 모드(set_idle)에서는 grab()만 하고 디코딩은 요청이 있을 때만 합니다.
+    캡처 시각부터 감지 완료까지의 지연을 집계해 주기적으로 보고합니다.
+    """
+    
+    def __init__(self, index: int = 0, profile: dict = None, report_interval: float = CAMERA_REPORT_INTERVAL):
+        self.index = index
+        self.profile = profile or {}
+        self.cap = None
+        self._cond = threading.Condition()
+        self._frame = None  # 가장 최근 프레임
+        self._seq = 0  # 가장 최근 프레임 번호 (새 프레임마다 증가)
+        self._captured_at = None  # 가장 최근 프레임을 가져온 시각 (perf_counter)
+        self._consumed_seq = 0  # 감지 루프가 마지막으로 가져간 프레임 번호
+        self._want = threading.Event()  # 대기 모드에서 감지 루프가 프레임을 기다리는 중
+        self._idle = False
+        self._running = False
+        self._thread = None
+        self.overwritten = 0  # 감지 루프가 가져가기 전에 더 새 프레임으로 교체된 프레임 수
+        self._latency = LatencyReport("웹캠 캡처 → 감지 지연", report_interval)
+    
+    def open(self) -> bool:
+        """카메라를 열고 프로파일을 적용합니다 (fourcc를 해상도보다 먼저 설정해야 적용되는 드라이버가 많음)."""
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            return False
+        if self.profile.get("fourcc"):
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.profile["fourcc"]))
+        if self.profile.get("width"):
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.profile["width"])
+        if self.profile.get("height"):
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.profile["height"])
+        if self.profile.get("fps"):
+            self.cap.set(cv2.CAP_PROP_FPS, self.profile["fps"])
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        
+        # 드라이버가 실제로 적용한 값 확인
+        fourcc = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        fourcc_str = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4)) if fourcc > 0 else "?"
+        print(f"📷 웹캠 {self.index}: {int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))}x"
+              f"{int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))} {fourcc_str} "
+              f"{self.cap.get(cv2.CAP_PROP_FPS):.0f}fps (프로파일: {self.profile or '기본'})")
+        return True
+    
+    def start(self):
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="camera-capture", daemon=True)
+        self._thread.start()
+        return self
+    
+    def is_alive(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+    
+    def set_idle(self, idle: bool):
+        """대기 모드에서는 요청이 있을 때만 디코딩합니다 (나머지 프레임은 grab()으로 버퍼만 비움)."""
+        self._idle = idle
+    
+    def _run(self):
+        try:
+            while self._running:
+                if not self.cap.grab():
+                    print("❌ 웹캠 프레임을 읽을 수 없습니다!")
+                    break
+                captured_at = time.perf_counter()
+                if self._idle and not self._want.is_set():
+                    continue
+                ret, frame = self.cap.retrieve()
+                if not ret:
+                    continue
+                with self._cond:
+                    if self._seq > self._consumed_seq:
+                        self.overwritten += 1  # 이전 프레임은 감지에 쓰이지 않고 교체됨
+                    self._frame = frame
+                    self._seq += 1
+                    self._captured_at = captured_at
+                    self._want.clear()
+                    self._cond.notify_all()
+        finally:
+            self._running = False
+            with self._cond:
+                self._cond.notify_all()
+    
+    def read_latest(self, timeout: float = 1.0):
+        """
+        아직 가져가지 않은 가장 최근 프레임을 반환합니다 (없으면 새 프레임이 올 때까지 대기).
+        
+        Returns:
+            (frame, captured_at) 튜플. 시간 초과나 캡처 중지 시 (None, None)
+        """
+        deadline = time.perf_counter() + timeout
+        with self._cond:
+            while self._seq <= self._consumed_seq:
+                if not self._running:
+                    return None, None
+                self._want.set()
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None, None
+                self._cond.wait(remaining)
+            self._consumed_seq = self._seq
+            return self._frame, self._captured_at
+    
+    def record_latency(self, captured_at: float):
+        """캡처 시각부터 지금(감지 완료)까지의 지연을 기록하고, 보고 주기가 되면 출력합니다."""
+        if self._latency.record(captured_at, self.overwritten):
+            self.overwritten = 0
+    
+    def release(self):
+        """캡처 스레드를 멈추고 카메라를 해제합니다."""
+        self._running = False
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        if self.cap is not None:
+            self.cap.release()
+
+
+class MarkerTracker:
+    """
+    ArUco 마커 감지를 빠른 경로와 전체 감지로 나눕니다.
+    
+    - 추적 중 (직전 프레임에서 마커 발견): 마지막 마커 주변 여백 영역(ROI)만 전체 해상도로 감지하고,
+      _NEW_MARKER_INTERVAL 프레임마다 축소한 전체 프레임도 감지해 ROI 밖에 새로 나타난 마커를 더합니다
+    - 추적 중인 마커가 없음: 축소한 프레임에서 감지하고, 놓치면 한 프레임 걸러 전체 해상도로 다시 감지
+    - ROI에서 놓쳤거나 ARUCO_FULL_SEARCH_INTERVAL 프레임마다: 전체 해상도 전체 프레임 감지
+    
+    ROI에서 놓치면 같은 프레임에서 바로 전체 감지를 하므로, 책을 바꿔도 한 프레임 안에 새 마커를 찾습니다.
+    축소 감지로는 보이지 않는 작은 (먼) 마커도 전체 해상도 감지로 늦어도 두 프레임 안에 찾습니다.
+    반환하는 corners는 항상 원본 프레임 좌표입니다.
+    """
+    
+    _SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 0.05)
+    _NEW_MARKER_INTERVAL = 4  # 추적 중 ROI 밖 새 마커를 찾는 축소 감지 주기 (프레임)
+    
+    def __init__(self, detector, downscale: float = ARUCO_DOWNSCALE, roi_padding: float = ARUCO_ROI_PADDING,
+                 full_interval: int = ARUCO_FULL_SEARCH_INTERVAL, report_interval: float = CAMERA_REPORT_INTERVAL):
+        self.detector = detector
+        self.downscale = downscale
+        self.roi_padding = roi_padding
+        self.full_interval = full_interval
+        self.report_interval = report_interval
+        self._last_corners = None  # 마지막으로 찾은 마커 코너 (원본 좌표)
+        self._since_full = 0  # 마지막 전체 감지 이후 프레임 수
+        self._fast_frames = 0  # 빠른 경로 프레임 수 (한 프레임 걸러 하는 감지용)
+        self._counts = {"roi": 0, "downscaled": 0, "full": 0, "miss": 0}  # 감지 경로별 횟수 (보고용)
+        self._detect_time = 0.0
+        self._frames = 0
+        self._last_report = None
+    
+    @staticmethod
+    def _offset(corners, dx: float, dy: float, scale: float = 1.0):
+        """부분 영역/축소 프레임 좌표의 코너를 원본 프레임 좌표로 변환"""
+        return tuple((c / scale + np.array([dx, dy], dtype=np.float32)).astype(np.float32) for c in corners)
+    
+    def _roi(self, shape):
+        """마지막 마커 코너를 감싸는 여백 포함 영역 (y0, y1, x0, x1)"""
+        points = np.concatenate([c.reshape(-1, 2) for c in self._last_corners])
+        x0, y0 = points.min(axis=0)
+        x1, y1 = points.max(axis=0)
+        pad = max(x1 - x0, y1 - y0) * self.roi_padding
+        height, width = shape[:2]
+        return (max(0, int(y0 - pad)), min(height, int(y1 + pad) + 1),
+                max(0, int(x0 - pad)), min(width, int(x1 + pad) + 1))
+    
+    def _detect_downscaled(self, gray, skip_ids=()):
+        """축소 프레임에서 감지 (skip_ids는 제외). 찾지 못하면 None"""
+        small = cv2.resize(gray, None, fx=self.downscale, fy=self.downscale, interpolation=cv2.INTER_AREA)
+        corners, ids, _ = self.detector.detectMarkers(small)
+        if ids is None:
+            return None
+        keep = [i for i, marker_id in enumerate(ids.ravel()) if marker_id not in skip_ids]
+        if not keep:
+            return None
+        corners = self._offset([corners[i] for i in keep], 0.0, 0.0, self.downscale)
+        # 축소 좌표를 원본 해상도에서 보정
+        for c in corners:
+            cv2.cornerSubPix(gray, c.reshape(-1, 1, 2), (5, 5), (-1, -1), self._SUBPIX_CRITERIA)
+        return corners, ids[keep]
+    
+    def _detect_fast(self, gray):
+        """빠른 경로 (ROI 또는 축소 프레임). 전체 감지가 필요하면 None"""
+        self._fast_frames += 1
+        if self._last_corners is not None:
+            y0, y1, x0, x1 = self._roi(gray.shape)
+            corners, ids, _ = self.detector.detectMarkers(gray[y0:y1, x0:x1])
+            if ids is None or len(ids) == 0:
+                return None
+            self._counts["roi"] += 1
+            corners = self._offset(corners, x0, y0)
+            # ROI 밖에 새로 나타난 마커 (주기적으로 축소 프레임에서 확인)
+            if self._fast_frames % self._NEW_MARKER_INTERVAL == 0 and self.downscale < 1.0:
+                extra = self._detect_downscaled(gray, skip_ids=set(ids.ravel()))
+                if extra is not None:
+                    self._counts["downscaled"] += 1
+                    corners = corners + extra[0]
+                    ids = np.concatenate([ids, extra[1]])
+            return corners, ids
+        if self.downscale < 1.0:
+            result = self._detect_downscaled(gray)
+            if result is not None:
+                self._counts["downscaled"] += 1
+                return result
+            # 축소 프레임에서 놓친 경우: 작은 마커일 수 있으므로 한 프레임 걸러 전체 감지
+            if self._fast_frames % 2 == 0:
+                self._counts["miss"] += 1
+                return ((), None)
+        return None
+    
+    def detect(self, frame):
+        """
+        프레임에서 마커를 감지합니다.
+        
+        Returns:
+            (corners, ids) - detector.detectMarkers와 같은 형식 (ids는 없으면 None)
+        """
+        start = time.perf_counter()
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        result = None
+        full_due = self._since_full >= self.full_interval
+        if not full_due:
+            result = self._detect_fast(gray)
+        if result is None:
+            # ROI/축소 감지에서 놓쳤거나 주기가 됨 → 전체 감지
+            corners, ids, _ = self.detector.detectMarkers(gray)
+            self._since_full = 0
+            if ids is not None and len(ids) > 0:
+                self._counts["full"] += 1
+                result = (corners, ids)
+            else:
+                self._counts["miss"] += 1
+                result = ((), None)
+        else:
+            self._since_full += 1
+        corners, ids = result
+        self._last_corners = corners if ids is not None else None
+        self._detect_time += time.perf_counter() - start
+        self._frames += 1
+        self._maybe_report()
+        return corners, ids
+    
+    def _maybe_report(self):
+        now = time.perf_counter()
+        if self._last_report is None:
+            self._last_report = now
+            return
+        if now - self._last_report < self.report_interval:
+            return
+        counts = self._counts
+        print(f"🔎 마커 감지 (최근 {self.report_interval:.0f}초, {self._frames}프레임): "
+              f"평균 {self._detect_time / self._frames * 1000:.1f}ms | ROI {counts['roi']}, "
+              f"축소 {counts['downscaled']}, 전체 {counts['full']}, 없음 {counts['miss']}")
+        self._counts = dict.fromkeys(counts, 0)
+        self._detect_time = 0.0
+        self._frames = 0
+        self._last_report = now
+
+
+def _detection_process_main(index: int, profile: dict, slots: int, idle_interval: float, results, idle, stop):
+    """
+    감지 프로세스 본체 - 웹캠 캡처와 ArUco 감지를 메인 프로세스의 GIL 밖에서 실행합니다.
+    
+    프레임은 공유 메모리 슬롯에 돌아가며 쓰고, 감지 결과는 results 큐로 보냅니다.
+    슬롯마다 헤더에 프레임 번호를 두고 쓰는 동안은 -1로 표시해, 읽는 쪽이 덮어쓰인 프레임을 버릴 수 있게 합니다.
+    메시지: ("ready", 공유 메모리 이름, 프레임 shape, 슬롯 수), ("frame", 슬롯, 번호, 캡처 시각, corners, ids), ("error", 내용)
+    """
+    camera = CameraCapture(index, profile)
+    if not camera.open():
+        results.put(("error", "웹캠을 열 수 없습니다"))
+        return
+    camera.start()
+    detector = aruco.ArucoDetector(ARUCO_DICTIONARY, load_aruco_detector_parameters())
+    tracker = MarkerTracker(detector) if ARUCO_TRACKING else None
+    
+    shm = headers = frames = None
+    seq = 0
+    last_poll = 0.0
+    try:
+        while not stop.is_set():
+            # 대기 모드에서는 idle_interval마다만 디코딩/감지
+            is_idle = idle.is_set()
+            camera.set_idle(is_idle)
+            remaining = idle_interval - (time.perf_counter() - last_poll)
+            if is_idle and remaining > 0:
+                stop.wait(remaining)
+                continue
+            last_poll = time.perf_counter()
+            
+            frame, captured_at = camera.read_latest()
+            if frame is None:
+                if not camera.is_alive():
+                    results.put(("error", "프레임을 읽을 수 없습니다"))
+                    break
+                continue
+            if tracker is not None:
+                corners, ids = tracker.detect(frame)
+            else:
+                corners, ids, _ = detector.detectMarkers(frame)
+            camera.record_latency(captured_at)
+            
+            if shm is None:
+                # 첫 프레임 크기로 공유 메모리 생성 (헤더는 64바이트 단위로 정렬)
+                header_bytes = (slots * 8 + 63) // 64 * 64
+                shm = shared_memory.SharedMemory(create=True, size=header_bytes + slots * frame.nbytes)
+                headers = np.ndarray((slots,), dtype=np.int64, buffer=shm.buf)
+                headers[:] = 0
+                frames = np.ndarray((slots,) + frame.shape, dtype=frame.dtype, buffer=shm.buf, offset=header_bytes)
+                results.put(("ready", shm.name, frame.shape, slots))
+            if frame.shape != frames.shape[1:]:
+                continue
+            
+            seq += 1
+            slot = seq % slots
+            headers[slot] = -1  # 쓰는 중
+            frames[slot] = frame
+            headers[slot] = seq
+            results.put(("frame", slot, seq, captured_at, corners, ids))
+    finally:
+        camera.release()
+        results.cancel_join_thread()  # 메인 프로세스가 더 읽지 않아도 종료가 막히지 않도록
+        if shm is not None:
+            del headers, frames
+            shm.close()
+            shm.unlink()
+
+
+class DetectionProcess:
+    """
+    웹캠 캡처와 ArUco 감지를 별도 프로세스에서 실행합니다 (ARUCO_DETECTION_PROCESS=1).
+    
+    감지, 핸들러 스레드, ffmpeg 관리, VideoPlayer 합성이 한 인터프리터의 GIL을 나눠 쓰지 않도록
+    감지 프로세스가 프레임을 공유 메모리에 쓰고 감지 결과를 큐로 돌려줍니다.
+    CameraCapture와 같은 방식(open/start/set_idle/read_latest/record_latency/release)으로 사용하며,
+    read_latest는 프레임과 함께 감지 결과도 반환합니다. 마커 투표(MarkerEventGate)는 메인 프로세스에서 합니다.
+    """
+    
+    def __init__(self, index: int = 0, profile: dict = None, slots: int = DETECTION_FRAME_SLOTS,
+                 idle_interval: float = IDLE_POLL_INTERVAL, report_interval: float = CAMERA_REPORT_INTERVAL):
+        # fork는 스레드가 있는 프로세스에서 안전하지 않으므로 spawn 사용
+        ctx = multiprocessing.get_context("spawn")
+        self._results = ctx.Queue()
+        self._idle = ctx.Event()
+        self._stop = ctx.Event()
+        self._process = ctx.Process(target=_detection_process_main, name="aruco-detection", daemon=True,
+                                    args=(index, profile, slots, idle_interval, self._results, self._idle, self._stop))
+        self._shm = None
+        self._headers = None
+        self._frames = None
+        self._failed = False
+        self.overwritten = 0  # 메인 프로세스가 가져가기 전에 더 새 결과로 교체되거나 덮어쓰인 프레임 수
+        self._latency = LatencyReport("웹캠 캡처 → 메인 프로세스 수신 지연", report_interval)
+    
+    def open(self, timeout: float = 30.0) -> bool:
+        """감지 프로세스를 시작하고 첫 프레임(공유 메모리 준비)까지 기다립니다."""
+        self._start_process()
+        deadline = time.perf_counter() + timeout
+        while self._shm is None and not self._failed:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0 or not self._process.is_alive() and self._results.empty():
+                break
+            try:
+                self._handle(self._results.get(timeout=min(remaining, 0.5)))
+            except queue.Empty:
+                continue
+        if self._shm is None:
+            self.release()
+            return False
+        print(f"🧩 감지 프로세스 시작 (pid {self._process.pid}, 공유 메모리 {self._frames.nbytes // 1024}KB)")
+        return True
+    
+    def _start_process(self):
+        """
+        spawn은 자식 프로세스에서 메인 스크립트 (python tts.py)를 __mp_main__으로 다시 실행하므로
+        (OpenAI 클라이언트, VideoPlayer 등 전역 생성), 시작하는 동안 메인 모듈의 경로를 숨겨
+        감지 프로세스가 이 모듈만 import하게 합니다.
+        """
+        main = sys.modules["__main__"]
+        main_file = main.__dict__.pop("__file__", None)
+        main_spec = getattr(main, "__spec__", None)
+        main.__spec__ = None
+        try:
+            self._process.start()
+        finally:
+            main.__spec__ = main_spec
+            if main_file is not None:
+                main.__file__ = main_file
+    
+    def start(self):
+        return self
+    
+    def _handle(self, message):
+        """제어 메시지 처리. 프레임 메시지면 그대로 반환"""
+        kind = message[0]
+        if kind == "frame":
+            return message
+        if kind == "ready":
+            _, name, shape, slots = message
+            # spawn한 감지 프로세스는 이 프로세스의 resource_tracker를 함께 쓰므로, 여기서 붙을 때의 등록은
+            # 감지 프로세스가 만들 때 등록한 항목과 같습니다. unregister하면 그 항목이 지워져 감지 프로세스의
+            # unlink가 추적기 오류를 내므로 그대로 둡니다 (해제는 감지 프로세스, 강제 종료된 경우만 release에서).
+            self._shm = shared_memory.SharedMemory(name=name)
+            header_bytes = (slots * 8 + 63) // 64 * 64
+            self._headers = np.ndarray((slots,), dtype=np.int64, buffer=self._shm.buf)
+            self._frames = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=self._shm.buf,
+                                      offset=header_bytes)
+        elif kind == "error":
+            print(f"❌ 감지 프로세스: {message[1]}")
+            self._failed = True
+        return None
+    
+    def is_alive(self) -> bool:
+        return not self._failed and self._process.is_alive()
+    
+    def set_idle(self, idle: bool):
+        if idle:
+            self._idle.set()
+        else:
+            self._idle.clear()
+    
+    def read_latest(self, timeout: float = 1.0):
+        """
+        가장 최근 감지 결과와 프레임을 반환합니다 (없으면 올 때까지 대기).
+        
+        Returns:
+            (frame, captured_at, corners, ids) 튜플. 시간 초과, 덮어쓰인 프레임, 프로세스 종료 시 모두 None
+        """
+        latest = None
+        try:
+            message = self._results.get(timeout=timeout)
+            while True:
+                frame_message = self._handle(message)
+                if frame_message is not None:
+                    if latest is not None:
+                        self.overwritten += 1
+                    latest = frame_message
+                message = self._results.get_nowait()
+        except queue.Empty:
+            pass
+        if latest is None or self._frames is None:
+            return None, None, None, None
+        
+        _, slot, seq, captured_at, corners, ids = latest
+        # 복사 전후로 슬롯 번호를 확인해 복사 중에 덮어쓰였으면 버림
+        if self._headers[slot] != seq:
+            self.overwritten += 1
+            return None, None, None, None
+        frame = self._frames[slot].copy()
+        if self._headers[slot] != seq:
+            self.overwritten += 1
+            return None, None, None, None
+        return frame, captured_at, corners, ids
+    
+    def record_latency(self, captured_at: float):
+        """감지 프로세스의 캡처 시각부터 메인 프로세스가 결과를 받기까지의 지연을 기록합니다."""
+        if self._latency.record(captured_at, self.overwritten):
+            self.overwritten = 0
+    
+    def release(self):
+        """
+        감지 프로세스를 멈추고 공유 메모리에서 분리합니다.
+        공유 메모리 해제는 감지 프로세스가 하지만, 해제하기 전에 강제 종료되었으면 여기서 해제합니다.
+        """
+        self._stop.set()
+        if self._process.is_alive():
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join(timeout=1.0)
+        if self._shm is not None:
+            self._headers = self._frames = None
+            exitcode = self._process.exitcode
+            if exitcode is None or exitcode < 0:  # 시그널로 종료 → 감지 프로세스의 finally가 실행되지 않음
+                try:
+                    self._shm.unlink()
+                except FileNotFoundError:
+                    pass
+            self._shm.close()
+            self._shm = None
@@ -0,0 +1,403 @@
+"""
+에셋 인덱스와 재생용 변환본 - tts.py와 오프라인 도구 (transcode_assets.py)가 함께 사용합니다.
+
+오프라인 도구가 OpenAI 키 없이도 실행될 수 있도록, 여기에는 tts.py를 import하거나
+OpenAI 클라이언트, VideoPlayer 같은 전역 상태를 만드는 코드를 두지 않습니다.
+"""
+
+import os
+import json
+import hashlib
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import cv2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ============================================
+# 에셋 설정
+# ============================================
+ASSET_DIRS = ["bg_video", "Interactions", "bg_sound", "bg_music", "soundeffect", "title_saying"]  # 시작 시 인덱싱할 에셋 폴더
+ASSET_INDEX_PATH = "asset_index.json"  # 에셋 메타데이터 인덱스 저장 파일
+RUNTIME_ASSET_DIR = "runtime_assets"  # 재생용으로 변환한 에셋 폴더 (transcode_assets.py로 생성)
+RUNTIME_ASSET_MANIFEST = os.path.join(RUNTIME_ASSET_DIR, "manifest.json")  # 원본 -> 변환본 매니페스트
+RUNTIME_ASSET_HEIGHT = int(os.getenv("RUNTIME_ASSET_HEIGHT", "720"))  # 변환 목표 높이 (디스플레이 해상도, 확대는 하지 않음)
+USE_RUNTIME_ASSETS = os.getenv("USE_RUNTIME_ASSETS", "1") != "0"  # 변환본이 있으면 원본 대신 재생
+BG_VIDEO_DIR = "bg_video"
+INTERACTIONS_DIR = "Interactions"
+VIDEO_EXTENSIONS = (".mov", ".mp4", ".avi", ".mkv", ".webm")
+_ALPHA_PIX_FMTS = ("yuva", "rgba", "bgra", "argb", "abgr", "gbrap", "ya")  # 알파 채널이 있는 픽셀 포맷 접두사
+
+
+def probe_video_fps(video_path: str, cap=None) -> float:
+    """비디오 FPS를 에셋 인덱스에서 읽습니다 (없으면 ffprobe, 실패 시 VideoCapture 값, 그것도 없으면 30.0)."""
+    entry = ASSET_INDEX.get(video_path)
+    if entry and entry.get("fps"):
+        return entry["fps"]
+    try:
+        probe_cmd = [
+            "ffprobe", "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "stream=r_frame_rate",
+            "-of", "default=noprint_wrappers=1:nokey=1",
+            video_path
+        ]
+        result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=2)
+        if result.returncode == 0:
+            fps_str = result.stdout.strip()
+            if '/' in fps_str:
+                num, den = map(int, fps_str.split('/'))
+                return num / den if den > 0 else 30.0
+            return float(fps_str) if fps_str else 30.0
+    except:
+        pass
+    if cap is not None:
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        return fps if fps > 0 else 30.0
+    return 30.0
+
+
+def _file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    """파일 내용 해시 (sha1)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def source_signature(path: str) -> dict:
+    """오프라인 산출물이 기록해 두는 원본 파일 서명 (크기, 수정 시각, 내용 해시)."""
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": _file_hash(path)}
+
+
+def source_unchanged(path: str, source: dict) -> bool:
+    """
+    원본이 서명을 기록한 뒤로 바뀌지 않았는지 (크기/수정 시각, 수정 시각만 다르면 에셋 인덱스의 내용 해시로 확인).
+    재생 중에 호출되므로 직접 해시하지 않으며, 인덱스에 현재 파일의 해시가 아직 없으면 바뀐 것으로 봅니다.
+    """
+    st = os.stat(path)
+    if st.st_size != source.get("size"):
+        return False
+    if st.st_mtime_ns == source.get("mtime_ns"):
+        return True
+    entry = ASSET_INDEX.get(path)
+    digest = entry.get("hash") if entry and entry.get("mtime_ns") == st.st_mtime_ns else None
+    return digest is not None and digest == source.get("hash")
+
+
+def _probe_asset(path: str) -> dict:
+    """에셋 메타데이터 (fps, 해상도, 프레임 수, 알파 여부, 길이)를 ffprobe로 읽습니다 (실패 시 OpenCV/wave)."""
+    info = {"fps": None, "width": None, "height": None, "frame_count": None, "has_alpha": False, "duration": None}
+    try:
+        probe_cmd = [
+            "ffprobe", "-v", "error",
+            "-show_entries", "stream=codec_type,r_frame_rate,width,height,nb_frames,pix_fmt:format=duration",
+            "-of", "json", path
+        ]
+        result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=10)
+        if result.returncode == 0:
+            data = json.loads(result.stdout)
+            duration = data.get("format", {}).get("duration")
+            if duration not in (None, "N/A"):
+                info["duration"] = float(duration)
+            for stream in data.get("streams", []):
+                if stream.get("codec_type") != "video":
+                    continue
+                num, _, den = stream.get("r_frame_rate", "0/1").partition("/")
+                if den and int(den) > 0 and int(num) > 0:
+                    info["fps"] = int(num) / int(den)
+                info["width"] = stream.get("width")
+                info["height"] = stream.get("height")
+                if str(stream.get("nb_frames", "")).isdigit():
+                    info["frame_count"] = int(stream["nb_frames"])
+                elif info["fps"] and info["duration"]:
+                    info["frame_count"] = int(round(info["fps"] * info["duration"]))
+                pix_fmt = stream.get("pix_fmt", "")
+                info["has_alpha"] = pix_fmt.startswith(_ALPHA_PIX_FMTS)
+                break
+            return info
+    except Exception:
+        pass
+    
+    # ffprobe가 없거나 실패한 경우
+    if path.lower().endswith(VIDEO_EXTENSIONS):
+        cap = cv2.VideoCapture(path)
+        if cap.isOpened():
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            info["fps"] = fps if fps > 0 else None
+            info["width"] = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            info["height"] = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            info["frame_count"] = frames if frames > 0 else None
+            if info["fps"] and info["frame_count"]:
+                info["duration"] = info["frame_count"] / info["fps"]
+        cap.release()
+    elif path.lower().endswith(".wav"):
+        try:
+            import wave
+            with wave.open(path, "rb") as w:
+                info["duration"] = w.getnframes() / float(w.getframerate())
+        except Exception:
+            pass
+    return info
+
+
+class AssetIndex:
+    """
+    에셋 폴더들을 시작 시 한 번 (병렬로) 스캔해 파일별 메타데이터를 JSON으로 저장해 두는 인덱스.
+    크기/수정 시각이 그대로면 이전 결과를 재사용합니다. 바뀐 파일의 내용 해시는 시작을 막지 않도록
+    백그라운드 스레드에서 계산합니다 (계산 전에는 hash가 None).
+    런타임 조회 (fps, 파일 존재 여부)는 ffprobe/파일 시스템 대신 이 인덱스를 읽습니다.
+    """
+    
+    def __init__(self, index_path: str, dirs):
+        self.index_path = index_path
+        self.dirs = [os.path.normpath(d) for d in dirs]
+        self._entries = {}  # 정규화된 경로 -> 메타데이터 dict
+        self._built = False
+        self._lock = threading.Lock()
+    
+    def _covers(self, key: str) -> bool:
+        return any(key == d or key.startswith(d + os.sep) for d in self.dirs)
+    
+    def _load(self) -> dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("assets", {})
+        except (OSError, ValueError):
+            return {}
+    
+    def save(self):
+        """인덱스를 파일로 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        with self._lock:
+            data = {"version": 1, "assets": dict(self._entries)}
+        tmp_path = self.index_path + ".tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            print(f"⚠️ 에셋 인덱스 저장 실패: {e}")
+    
+    def _index_file(self, path: str, previous: dict, hash_now: bool):
+        """(경로, 메타데이터, 새로 분석했는지) - 파일이 사라졌으면 None."""
+        key = os.path.normpath(path)
+        try:
+            st = os.stat(path)
+            old = previous.get(key)
+            if old and old.get("size") == st.st_size and old.get("mtime_ns") == st.st_mtime_ns:
+                return key, old, False
+            digest = None  # hash_now가 아니면 백그라운드에서 계산
+            if hash_now:
+                digest = _file_hash(path)
+                if old and old.get("hash") == digest:
+                    entry = dict(old)
+                    entry["mtime_ns"] = st.st_mtime_ns
+                    return key, entry, False
+            entry = _probe_asset(path)
+            entry.update(size=st.st_size, mtime_ns=st.st_mtime_ns, hash=digest)
+            return key, entry, True
+        except OSError:
+            return None
+    
+    def build(self, max_workers: int = None, hash_now: bool = False):
+        """
+        에셋 폴더를 스캔하여 인덱스를 만들고 저장합니다 (바뀐 파일만 병렬로 다시 분석).
+        
+        Args:
+            hash_now: True면 내용 해시까지 계산한 뒤 반환 (오프라인 도구용). False면 해시는 백그라운드에서 계산
+        """
+        previous = self._load()
+        paths = []
+        for d in self.dirs:
+            if not os.path.isdir(d):
+                continue
+            for root, _, names in os.walk(d):
+                for name in names:
+                    # 숨김 파일과 실행 중 생성되는 임시 파일은 제외
+                    if name.startswith(".") or name.startswith("temp_"):
+                        continue
+                    paths.append(os.path.join(root, name))
+        
+        with ThreadPoolExecutor(max_workers=max_workers or min(8, os.cpu_count() or 4)) as pool:
+            results = [r for r in pool.map(lambda p: self._index_file(p, previous, hash_now), paths)
+                       if r is not None]
+        
+        entries = {key: entry for key, entry, _ in results}
+        probed = sum(1 for _, _, fresh in results if fresh)
+        with self._lock:
+            self._entries = entries
+            self._built = True
+        if entries != previous:
+            self.save()
+        print(f"🗂️ 에셋 인덱스: {len(entries)}개 파일 ({probed}개 새로 분석)")
+        
+        pending = [key for key, entry in entries.items() if not entry.get("hash")]
+        if pending:
+            threading.Thread(target=self._hash_pending, args=(pending,), name="asset-hash", daemon=True).start()
+    
+    def _hash_pending(self, keys):
+        """해시가 없는 항목의 내용 해시를 계산해 저장합니다 (그 사이 파일이 바뀌었으면 다음 스캔에 맡김)."""
+        hashed = 0
+        for key in keys:
+            try:
+                st = os.stat(key)
+                digest = _file_hash(key)
+            except OSError:
+                continue
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is None or entry.get("size") != st.st_size or entry.get("mtime_ns") != st.st_mtime_ns:
+                    continue
+                entry["hash"] = digest
+            hashed += 1
+        if hashed:
+            self.save()
+    
+    def get(self, path: str):
+        """인덱스에 있는 메타데이터 dict (없으면 None)."""
+        with self._lock:
+            return self._entries.get(os.path.normpath(path))
+    
+    def exists(self, path: str) -> bool:
+        """에셋 존재 여부. 인덱싱된 폴더의 경로는 인덱스로, 그 외 (또는 인덱스 생성 전)는 파일 시스템으로 확인합니다."""
+        key = os.path.normpath(path)
+        with self._lock:
+            if self._built and self._covers(key):
+                return key in self._entries
+        return os.path.exists(path)
+    
+    def entries_in(self, directory: str):
+        """directory 아래 항목들 [(경로, 메타데이터 dict)]."""
+        prefix = os.path.normpath(directory) + os.sep
+        with self._lock:
+            return [(key, entry) for key, entry in self._entries.items() if key.startswith(prefix)]
+    
+    def record_extent(self, path: str, extent, frame_size):
+        """
+        오버레이 클립의 전체 내용 영역 (y0, y1, x0, x1)과 그 좌표의 프레임 크기 (h, w)를 기록합니다
+        (파일이 바뀌면 다음 스캔에서 무효화).
+        """
+        key = os.path.normpath(path)
+        extent = list(extent) if extent else None
+        frame_size = list(frame_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (entry.get("extent"), entry.get("extent_size")) == (extent, frame_size):
+                return
+            entry["extent"] = extent
+            entry["extent_size"] = frame_size
+        self.save()
+
+
+# 전역 에셋 인덱스 (run_webcam_detection 시작 시 build)
+ASSET_INDEX = AssetIndex(ASSET_INDEX_PATH, ASSET_DIRS)
+
+
+class RuntimeAssetManifest:
+    """
+    transcode_assets.py가 만든 변환본 매니페스트 (원본 경로 -> 재생용 변환본).
+    변환본은 디스플레이 해상도로 줄인 인트라 전용 코덱 색 스트림과, 알파 (또는 검은 배경 키 마스크)를
+    분리한 무손실 그레이 스트림으로 이루어집니다. 원본이 변환 이후 바뀌었으면 변환본을 쓰지 않습니다.
+    
+    항목 형식: {"source_hash", "source_size", "source_mtime_ns", "video", "alpha" (없으면 None),
+               "width", "height", "fps", "decode_fps_before", "decode_fps_after"}
+    """
+    
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self._entries = None  # 처음 조회할 때 로드
+        self._lock = threading.Lock()
+    
+    def _load(self) -> dict:
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                return json.load(f).get("assets", {})
+        except (OSError, ValueError):
+            return {}
+    
+    def resolve(self, path: str):
+        """원본에 대응하는 최신 변환본 항목 (없거나 원본이 바뀌었으면 None)."""
+        if not USE_RUNTIME_ASSETS:
+            return None
+        with self._lock:
+            if self._entries is None:
+                self._entries = self._load()
+            entry = self._entries.get(os.path.normpath(path))
+        if entry is None:
+            return None
+        indexed = ASSET_INDEX.get(path)
+        if indexed and indexed.get("hash"):
+            fresh = indexed["hash"] == entry.get("source_hash")
+        else:
+            try:
+                st = os.stat(path)
+                fresh = st.st_size == entry.get("source_size") and st.st_mtime_ns == entry.get("source_mtime_ns")
+            except OSError:
+                fresh = False
+        if not fresh or not os.path.exists(entry["video"]):
+            return None
+        if entry.get("alpha") and not os.path.exists(entry["alpha"]):
+            return None  # 알파 스트림이 없으면 원본 사용
+        return entry
+
+
+class AlphaPairCapture:
+    """
+    색 스트림과 알파 (그레이) 스트림 캡처를 같은 위치로 함께 읽어 BGRA 프레임을 돌려주는 VideoCapture 대용.
+    read/grab/set/get/release/isOpened만 제공하며, 디코더/캐시/캡처 풀은 일반 캡처처럼 다룹니다.
+    """
+    
+    def __init__(self, color_cap, alpha_cap):
+        self.color_cap = color_cap
+        self.alpha_cap = alpha_cap
+    
+    def isOpened(self) -> bool:
+        return self.color_cap.isOpened() and self.alpha_cap.isOpened()
+    
+    def read(self):
+        ret, color = self.color_cap.read()
+        ret_alpha, alpha = self.alpha_cap.read()
+        if not ret or not ret_alpha or color is None or alpha is None:
+            return False, None
+        frame = cv2.cvtColor(color, cv2.COLOR_BGR2BGRA)
+        frame[:, :, 3] = alpha if alpha.ndim == 2 else alpha[:, :, 0]
+        return True, frame
+    
+    def grab(self) -> bool:
+        # 한쪽이 실패해도 두 스트림 모두 한 프레임씩 진행해야 위치가 어긋나지 않음
+        ret = self.color_cap.grab()
+        ret_alpha = self.alpha_cap.grab()
+        return ret and ret_alpha
+    
+    def set(self, prop, value):
+        self.alpha_cap.set(prop, value)
+        return self.color_cap.set(prop, value)
+    
+    def get(self, prop):
+        return self.color_cap.get(prop)
+    
+    def release(self):
+        self.color_cap.release()
+        self.alpha_cap.release()
+
+
+def open_video_capture(path: str):
+    """
+    에셋 비디오를 엽니다. 변환본이 있으면 원본 대신 변환본을 열고 (알파 스트림이 있으면 AlphaPairCapture),
+    없으면 원본을 그대로 엽니다. 호출자는 isOpened()로 성공 여부를 확인합니다.
+    """
+    entry = RUNTIME_ASSETS.resolve(path)
+    if entry is not None:
+        color_cap = cv2.VideoCapture(entry["video"])
+        if entry.get("alpha"):
+            return AlphaPairCapture(color_cap, cv2.VideoCapture(entry["alpha"]))
+        return color_cap
+    return cv2.VideoCapture(path)
+
+
+# 전역 변환본 매니페스트 (처음 조회할 때 로드)
+RUNTIME_ASSETS = RuntimeAssetManifest(RUNTIME_ASSET_MANIFEST)
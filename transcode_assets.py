@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+bg_video/와 Interactions/의 비디오 에셋을 재생용 프로파일로 변환합니다.
+
+- 해상도: 디스플레이 높이(RUNTIME_ASSET_HEIGHT)에 맞춰 축소 (확대는 하지 않음)
+- 색 스트림: 모든 프레임이 키프레임인 MJPEG (.avi) - ProRes 4444 등보다 소프트웨어 디코딩이 훨씬 가벼움
+- 알파: 별도의 무손실 그레이 스트림 (FFV1, .mkv)으로 분리
+  (알파 없는 Interactions 클립은 검은 배경 키 마스크를 알파 스트림으로 만들어, 손실 압축 노이즈로 키가 깨지지 않게 함)
+
+원본 내용 해시가 매니페스트와 같고 변환본이 있으면 건너뛰며, 결과는 runtime_assets/manifest.json에 기록합니다.
+tts.py는 이 매니페스트를 읽어 원본 대신 변환본을 재생합니다.
+파일마다 변환 전/후 디코딩 속도(fps)를 측정해 출력합니다.
+
+사용법:
+    python transcode_assets.py [--height 720] [--quality 3] [--force] [경로 ...]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+
+import cv2
+
+# assets.py에서 공통 설정/함수 import (tts.py는 OpenAI 클라이언트 등을 만들므로 import하지 않음)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from assets import (ASSET_INDEX, BG_VIDEO_DIR, INTERACTIONS_DIR, RUNTIME_ASSET_DIR, RUNTIME_ASSET_MANIFEST,
+                 RUNTIME_ASSET_HEIGHT, AlphaPairCapture)
+
+VIDEO_EXTENSIONS = (".mov", ".mp4", ".avi", ".mkv", ".webm")
+MANIFEST_VERSION = 1
+BENCH_FRAMES = 120  # 디코딩 속도 측정에 쓸 최대 프레임 수
+
+
+def list_videos(paths):
+    """변환 대상 비디오 파일 목록"""
+    videos = []
+    for base in paths:
+        if os.path.isfile(base):
+            videos.append(base)
+            continue
+        for root, _, names in os.walk(base):
+            for name in sorted(names):
+                if name.startswith(".") or not name.lower().endswith(VIDEO_EXTENSIONS):
+                    continue
+                videos.append(os.path.join(root, name))
+    return videos
+
+
+def load_manifest() -> dict:
+    try:
+        with open(RUNTIME_ASSET_MANIFEST, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest: dict):
+    """매니페스트 저장 (임시 파일에 쓴 뒤 교체)"""
+    os.makedirs(RUNTIME_ASSET_DIR, exist_ok=True)
+    tmp_path = RUNTIME_ASSET_MANIFEST + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, RUNTIME_ASSET_MANIFEST)
+
+
+def measure_decode_fps(cap, max_frames: int = BENCH_FRAMES) -> float:
+    """캡처에서 최대 max_frames 프레임을 디코딩하는 속도 (fps). 실패하면 0.0"""
+    if not cap.isOpened():
+        return 0.0
+    try:
+        count = 0
+        start = time.perf_counter()
+        while count < max_frames:
+            ret, frame = cap.read()
+            if not ret or frame is None:
+                break
+            count += 1
+        elapsed = time.perf_counter() - start
+        return count / elapsed if count and elapsed > 0 else 0.0
+    finally:
+        cap.release()
+
+
+def run_ffmpeg(args) -> bool:
+    cmd = ["ffmpeg", "-y", "-v", "error"] + args
+    result = subprocess.run(cmd, capture_output=True, text=True)
+    if result.returncode != 0:
+        print(f"   ❌ ffmpeg 실패: {result.stderr.strip()[:300]}")
+        return False
+    return True
+
+
+def output_paths(source: str):
+    """변환본 경로 (runtime_assets/ 아래에 원본과 같은 폴더 구조)"""
+    rel = os.path.splitdrive(os.path.normpath(source))[1].lstrip(os.sep)
+    stem = os.path.splitext(rel)[0]
+    return (os.path.join(RUNTIME_ASSET_DIR, stem + ".avi"),
+            os.path.join(RUNTIME_ASSET_DIR, stem + ".alpha.mkv"))
+
+
+def transcode(source: str, info: dict, height: int, quality: int):
+    """
+    원본 하나를 변환합니다.
+
+    Returns:
+        (video_path, alpha_path 또는 None, (width, height)) 또는 실패 시 None
+    """
+    video_path, alpha_path = output_paths(source)
+    os.makedirs(os.path.dirname(video_path), exist_ok=True)
+
+    # 짝수 크기로 축소 (원본이 더 작으면 그대로)
+    scale = f"scale=-2:'min(ih,{height})':flags=area"
+    if not run_ffmpeg(["-i", source, "-an", "-vf", f"{scale},format=yuvj420p",
+                       "-c:v", "mjpeg", "-q:v", str(quality), video_path]):
+        return None
+
+    if info.get("has_alpha"):
+        # 알파 채널을 무손실 그레이 스트림으로 분리
+        alpha_filter = f"{scale},alphaextract,format=gray"
+    elif os.path.normpath(source).startswith(os.path.normpath(INTERACTIONS_DIR) + os.sep):
+        # 검은 배경 키 클립: 키 마스크 (밝기 > 1)를 알파 스트림으로 저장
+        alpha_filter = f"{scale},format=gray,lut=y='if(gt(val,1),255,0)'"
+    else:
+        alpha_filter = None
+        alpha_path = None
+    if alpha_filter and not run_ffmpeg(["-i", source, "-an", "-vf", alpha_filter,
+                                        "-c:v", "ffv1", "-level", "3", "-g", "1", alpha_path]):
+        return None
+
+    cap = cv2.VideoCapture(video_path)
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+    return video_path, alpha_path, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="비디오 에셋을 재생용 프로파일로 변환합니다.")
+    parser.add_argument("paths", nargs="*", default=[BG_VIDEO_DIR, INTERACTIONS_DIR],
+                        help="변환할 파일 또는 폴더 (기본: bg_video, Interactions)")
+    parser.add_argument("--height", type=int, default=RUNTIME_ASSET_HEIGHT, help="목표 높이 (기본: 디스플레이 높이)")
+    parser.add_argument("--quality", type=int, default=3, help="MJPEG 품질 (2~31, 낮을수록 고화질)")
+    parser.add_argument("--force", action="store_true", help="변경되지 않은 파일도 다시 변환")
+    args = parser.parse_args()
+
+    # 원본 해시/알파 여부/FPS는 에셋 인덱스에서 (바뀐 파일만 다시 분석)
+    ASSET_INDEX.build(hash_now=True)
+
+    profile = {"height": args.height, "codec": "mjpeg", "quality": args.quality, "alpha_codec": "ffv1"}
+    manifest = load_manifest()
+    if manifest.get("version") != MANIFEST_VERSION or manifest.get("profile") != profile:
+        manifest = {"version": MANIFEST_VERSION, "profile": profile, "assets": {}}
+    assets = manifest["assets"]
+
+    videos = list_videos(args.paths)
+    converted = skipped = failed = 0
+    print(f"🎬 변환 대상: {len(videos)}개 (목표 높이 {args.height}px, MJPEG q={args.quality})\n")
+    for source in videos:
+        key = os.path.normpath(source)
+        info = ASSET_INDEX.get(source)
+        if info is None:
+            print(f"⏭️ 인덱스에 없음 (건너뜀): {source}")
+            continue
+        old = assets.get(key)
+        if (not args.force and old and old.get("source_hash") == info.get("hash")
+                and os.path.exists(old["video"]) and (not old.get("alpha") or os.path.exists(old["alpha"]))):
+            skipped += 1
+            continue
+
+        print(f"🔄 {source}")
+        result = transcode(source, info, args.height, args.quality)
+        if result is None:
+            failed += 1
+            continue
+        video_path, alpha_path, (width, height) = result
+
+        before = measure_decode_fps(cv2.VideoCapture(source))
+        after_cap = cv2.VideoCapture(video_path)
+        if alpha_path:
+            after_cap = AlphaPairCapture(after_cap, cv2.VideoCapture(alpha_path))
+        after = measure_decode_fps(after_cap)
+
+        assets[key] = {
+            "source_hash": info.get("hash"),
+            "source_size": info.get("size"),
+            "source_mtime_ns": info.get("mtime_ns"),
+            "video": video_path,
+            "alpha": alpha_path,
+            "width": width,
+            "height": height,
+            "fps": info.get("fps"),
+            "decode_fps_before": round(before, 1),
+            "decode_fps_after": round(after, 1),
+        }
+        save_manifest(manifest)  # 중간에 멈춰도 끝난 파일은 기록
+        converted += 1
+        speedup = after / before if before > 0 else 0.0
+        print(f"   ✅ {info.get('width')}x{info.get('height')} → {width}x{height}"
+              f"{' + 알파' if alpha_path else ''} | 디코딩 {before:.1f} → {after:.1f} fps (x{speedup:.1f})")
+
+    # 원본이 사라진 항목 정리
+    for key in [k for k in assets if not os.path.exists(k)]:
+        del assets[key]
+    save_manifest(manifest)
+    print(f"\n🎯 변환 {converted}개, 최신 상태 {skipped}개, 실패 {failed}개 → {RUNTIME_ASSET_MANIFEST}")
+
+
+if __name__ == '__main__':
+    main()
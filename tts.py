@@ -2,14 +2,32 @@ import os
 import json
 import subprocess
 import threading
+import queue
 import time
 import random
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 from openai import OpenAI
 from dotenv import load_dotenv
 import cv2
 import cv2.aruco as aruco
 from PIL import Image, ImageDraw, ImageFont
+# 에셋 인덱스/변환본 (오프라인 도구가 tts.py 없이 import할 수 있도록 별도 모듈)
+from assets import (
+    BG_VIDEO_DIR, INTERACTIONS_DIR, VIDEO_EXTENSIONS, ASSET_INDEX, RUNTIME_ASSETS,
+    probe_video_fps, source_signature, source_unchanged, open_video_capture,
+)
+# 웹캠 캡처/마커 감지 (감지 프로세스가 tts.py 없이 import할 수 있도록 별도 모듈)
+from aruco_detection import (
+    IDLE_POLL_INTERVAL, CAMERA_INDEX, CAMERA_PROFILES, CAMERA_PROFILE,
+    ARUCO_DICTIONARY, ARUCO_TRACKING, ARUCO_DETECTION_PROCESS,
+    CameraCapture, MarkerTracker, DetectionProcess, load_aruco_detector_parameters,
+)
+try:
+    import numba  # 선택: 설치되어 있으면 JIT 합성 백엔드를 쓸 수 있음
+except ImportError:
+    numba = None
 
 # ============================================
 # 0. 공통 설정
@@ -36,16 +54,1400 @@ _current_audio_processes = []  # 현재 재생 중인 모든 오디오 프로세
 _audio_processes_lock = threading.Lock()  # 오디오 프로세스 리스트 보호용 락
 _should_stop_audio = False  # 오디오 재생 중단 플래그
 _stop_audio_lock = threading.Lock()  # 중단 플래그 보호용 락
+_tts_korean_lines = {}  # TTS 오디오 경로 -> 한국어 원문 (자막 한국어 줄 표시용, 재생 시 꺼냄)
+
+# 오버레이 프레임 캐시 설정 (환경 변수로 조정 가능)
+OVERLAY_CACHE_BUDGET_MB = float(os.getenv("OVERLAY_CACHE_BUDGET_MB", "1024"))  # 디코딩된 오버레이 프레임 메모리 예산 (MB)
+DECODER_QUEUE_SIZE = 3  # 레이어별 디코더 스레드가 미리 준비해 두는 프레임 수
+OVERLAY_READY_TIMEOUT = 2.0  # 스트리밍 오버레이 레이어가 첫 프레임을 디코딩할 때까지 기다리는 최대 시간 (초)
+BG_CAPTURE_POOL_SIZE = int(os.getenv("BG_CAPTURE_POOL_SIZE", "0"))  # 열어 둘 배경 비디오 캡처 수 (0 = 전부)
+DISPLAY_FPS = float(os.getenv("DISPLAY_FPS", "60"))  # 합성/출력 주기 (디스플레이 주사율), 레이어 FPS와 무관
+COMPOSITOR_TILES = int(os.getenv("COMPOSITOR_TILES", "0"))  # 합성을 나눌 가로 띠(스레드) 수 (0 = CPU 코어 수, 최대 8)
+COMPOSITOR_MIN_TILE_PIXELS = 64 * 1024  # 띠 하나가 맡을 최소 픽셀 수 (이보다 작은 영역은 나누지 않음)
+COMPOSITOR_BACKEND = os.getenv("COMPOSITOR_BACKEND", "auto")  # 합성 백엔드 (auto = 시작 시 측정해 가장 빠른 것, numpy/opencv/numba)
+COMPOSITOR_CALIBRATION_SIZE = (270, 480)  # 백엔드 측정용 프레임 크기 (h, w) - 커널 속도 순위는 해상도와 무관하므로 작게
+OVERLAY_LAYER_Z = {"ch1": 20, "ch2": 10}  # 캐릭터 채널별 기본 z-order (클수록 앞, ch1이 항상 앞)
+SUBTITLE_SPRITE_CACHE_SIZE = 32  # 렌더링된 자막 스프라이트 최대 보관 개수 (LRU)
+SUBTITLE_FONT_PATH = "fonts/Mansalva-Regular.ttf"  # 영어 자막 폰트 (번들)
+SUBTITLE_HANGUL_FONT_PATHS = [  # 한글 자막 폰트 후보 (Mansalva에는 한글 글리프가 없음)
+    os.getenv("SUBTITLE_KO_FONT", ""),
+    "fonts/NanumGothic.ttf",
+    "/System/Library/Fonts/AppleSDGothicNeo.ttc",
+    "/System/Library/Fonts/Supplemental/AppleGothic.ttf",
+    "/Library/Fonts/NanumGothic.ttf",
+    "/usr/share/fonts/truetype/nanum/NanumGothic.ttf",
+    "/usr/share/fonts/opentype/noto/NotoSansCJK-Regular.ttc",
+]
+SUBTITLE_SHOW_KOREAN = os.getenv("SUBTITLE_SHOW_KOREAN", "1") != "0"  # 영어 자막 아래에 한국어 원문 표시
+OVERLAY_MASK_DIR = "overlay_masks"  # 키 오버레이의 사전 계산 마스크 저장 폴더 (--build-overlay-masks로 생성)
+FRAME_STORE_DIR = "frame_store"  # 오버레이 프레임을 메모리 매핑용 .npy로 저장한 폴더 (--build-frame-store로 생성)
+
+
+def _div255_inplace(wide, tmp):
+    """uint16 버퍼의 값을 255로 나눈 반올림 값으로 바꿉니다 (0~65025 범위, 부동소수점 없이)."""
+    wide += 128
+    np.right_shift(wide, 8, out=tmp)
+    wide += tmp
+    wide >>= 8
+
+
+def content_bbox(mask):
+    """
+    마스크(알파 또는 불리언)에서 내용이 있는 최소 바운딩 박스를 구합니다.
+    
+    Returns:
+        (y0, y1, x0, x1) 튜플 (끝 좌표는 미포함), 내용이 없으면 None
+    """
+    rows = np.flatnonzero(mask.any(axis=1))
+    if rows.size == 0:
+        return None
+    y0, y1 = int(rows[0]), int(rows[-1]) + 1
+    cols = np.flatnonzero(mask[y0:y1].any(axis=0))
+    return (y0, y1, int(cols[0]), int(cols[-1]) + 1)
+
+
+def overlay_key_mask(bgr):
+    """알파 없는 BGR 오버레이에서 검은 배경을 제외한 마스크를 만듭니다 (uint8 0/255)."""
+    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+    _, mask = cv2.threshold(gray, 1, 255, cv2.THRESH_BINARY)
+    return mask
+
+
+def premultiply_bgra(frame):
+    """
+    BGRA 프레임을 프리멀티플라이드 BGR과 알파로 분리합니다 (정수 연산).
+    
+    Returns:
+        (premul_bgr uint8 HxWx3, alpha uint8 HxW) 튜플
+    """
+    alpha = np.ascontiguousarray(frame[:, :, 3])
+    wide = frame[:, :, :3].astype(np.uint16)
+    wide *= alpha[:, :, None]
+    _div255_inplace(wide, np.empty_like(wide))
+    return wide.astype(np.uint8), alpha
+
+
+def scale_box(box, src_size, dst_size):
+    """원본 프레임 좌표의 박스 (y0, y1, x0, x1)를 출력 프레임 크기 좌표로 변환합니다."""
+    y0, y1, x0, x1 = box
+    sy, sx = dst_size[0] / src_size[0], dst_size[1] / src_size[1]
+    y0, x0 = int(y0 * sy), int(x0 * sx)
+    y1 = max(y0 + 1, min(dst_size[0], int(np.ceil(y1 * sy))))
+    x1 = max(x0 + 1, min(dst_size[1], int(np.ceil(x1 * sx))))
+    return y0, y1, x0, x1
+
+
+def resize_interpolation(src_size, dst_size):
+    """배율에 맞는 보간법: 축소는 INTER_AREA (4K 마스터 → 1080p/720p 앨리어싱 방지), 확대는 INTER_LINEAR."""
+    scale = min(dst_size[0] / src_size[0], dst_size[1] / src_size[1])
+    return cv2.INTER_AREA if scale < 1.0 else cv2.INTER_LINEAR
+
+
+def video_frame_size(path: str, cap=None):
+    """비디오 프레임 크기 (h, w)를 변환 매니페스트/에셋 인덱스 (없으면 VideoCapture 속성)에서 읽습니다. 알 수 없으면 None."""
+    entry = RUNTIME_ASSETS.resolve(path) or ASSET_INDEX.get(path)
+    if entry and entry.get("width") and entry.get("height"):
+        return (entry["height"], entry["width"])
+    if cap is not None:
+        w, h = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if w > 0 and h > 0:
+            return (h, w)
+    return None
+
+
+class NumpyBlendBackend:
+    """합성 커널: numpy uint16 고정소수점 (추가 의존성 없음)"""
+    
+    name = "numpy"
+    
+    def over(self, dst, premul, alpha, scratch, opacity: int = 255):
+        """
+        dst = premul * o + dst * (255 - alpha * o) / 255 (제자리, o = opacity / 255).
+        dst/premul은 (h, w, 3), alpha는 (h, w). 불투명도는 레이어를 따로 배율 조정하지 않고 여기서 함께 적용합니다.
+        """
+        wide, tmp, inv, _ = scratch
+        if opacity >= 255:
+            np.subtract(255, alpha[:, :, None], out=inv)
+            np.multiply(dst, inv, out=wide)
+            # _div255_inplace의 마지막 시프트를 dst에 바로 쓰고, premul은 uint8로 더함 (uint16 패스 절약)
+            wide += 128
+            np.right_shift(wide, 8, out=tmp)
+            wide += tmp
+            np.right_shift(wide, 8, out=dst, casting="unsafe")
+            dst += premul
+            return
+        # inv = 255 - alpha * opacity / 255
+        np.multiply(alpha[:, :, None], opacity, out=inv, dtype=np.uint16)
+        _div255_inplace(inv, tmp[:, :, :1])
+        np.subtract(255, inv, out=inv)
+        # 프리멀티플라이드라 premul <= alpha이므로 dst * inv + premul * opacity는 uint16 범위 안
+        np.multiply(dst, inv, out=wide)
+        np.multiply(premul, opacity, out=tmp, dtype=np.uint16)
+        wide += tmp
+        _div255_inplace(wide, tmp)
+        np.copyto(dst, wide, casting="unsafe")
+
+
+class OpenCVBlendBackend:
+    """합성 커널: OpenCV 네이티브 연산 (cv2.multiply/cv2.add, 내부 SIMD)"""
+    
+    name = "opencv"
+    
+    def over(self, dst, premul, alpha, scratch, opacity: int = 255):
+        inv = scratch[3]  # uint8 역알파 작업 버퍼 (매 호출 새 배열을 만들지 않음)
+        cv2.cvtColor(alpha, cv2.COLOR_GRAY2BGR, dst=inv)
+        if opacity < 255:
+            cv2.convertScaleAbs(inv, dst=inv, alpha=opacity / 255.0)
+        cv2.bitwise_not(inv, dst=inv)
+        cv2.multiply(dst, inv, dst=dst, scale=1.0 / 255)
+        if opacity < 255:
+            cv2.addWeighted(dst, 1.0, premul, opacity / 255.0, 0.0, dst=dst)
+        else:
+            cv2.add(dst, premul, dst=dst)
+
+
+if numba is not None:
+    @numba.njit(nogil=True, cache=True)
+    def _numba_over(dst, premul, alpha, opacity):
+        h, w, c = dst.shape
+        for i in range(h):
+            for j in range(w):
+                a = np.int32(alpha[i, j]) * opacity + 128
+                inv = 255 - ((a + (a >> 8)) >> 8)
+                for k in range(c):
+                    v = np.int32(dst[i, j, k]) * inv + np.int32(premul[i, j, k]) * opacity + 128
+                    dst[i, j, k] = (v + (v >> 8)) >> 8
+
+
+class NumbaBlendBackend:
+    """합성 커널: numba JIT 픽셀 루프 (중간 배열 없이 한 번에, GIL 해제). numba가 설치된 경우만 사용 가능"""
+    
+    name = "numba"
+    
+    def over(self, dst, premul, alpha, scratch, opacity: int = 255):
+        _numba_over(dst, premul, alpha, opacity)
+
+
+# 사용 가능한 합성 백엔드 (이름 -> 클래스)
+COMPOSITOR_BACKENDS = {"numpy": NumpyBlendBackend, "opencv": OpenCVBlendBackend}
+if numba is not None:
+    COMPOSITOR_BACKENDS["numba"] = NumbaBlendBackend
+
+
+class FrameCompositor:
+    """
+    프리멀티플라이드 알파 오버레이를 uint8/uint16 고정소수점으로 합성하는 엔진.
+    float32 전체 프레임 임시 배열 없이, 호출자가 넘겨준 출력 버퍼(FramePresenter의 백 버퍼)에 직접 씁니다.
+    픽셀 연산 (over, 불투명도 배율)은 교체 가능한 백엔드(COMPOSITOR_BACKENDS)가 수행합니다.
+    
+    합성 영역이 크면 가로 띠(타일)로 나눠 스레드 풀에서 병렬로 처리합니다 (numpy/OpenCV 연산은 GIL을 해제).
+    작업 버퍼는 프레임 크기이고 항상 출력과 같은 좌표로 잘라 쓰므로 띠끼리 겹치지 않습니다.
+    """
+    
+    def __init__(self, tiles: int = None, backend=None):
+        self._wide = None  # uint16 작업 버퍼 (HxWx3)
+        self._tmp = None  # uint16 반올림용 버퍼 (HxWx3)
+        self._inv = None  # uint16 역알파 버퍼 (HxWx1)
+        self._inv8 = None  # uint8 역알파 버퍼 (HxWx3, OpenCV 백엔드)
+        self.out = None  # 현재 합성 중인 출력 버퍼
+        self.backend = backend or OpenCVBlendBackend()  # 픽셀 연산 백엔드 (시작 시 측정 결과로 교체)
+        self.tiles = max(1, tiles or COMPOSITOR_TILES or min(8, os.cpu_count() or 1))  # 가로 띠 수
+        # 마지막 띠는 호출 스레드가 직접 처리하므로 워커는 tiles - 1개
+        self._pool = ThreadPoolExecutor(max_workers=self.tiles - 1, thread_name_prefix="compositor") \
+            if self.tiles > 1 else None
+    
+    def _ensure_buffers(self, shape):
+        h, w = shape[:2]
+        if self._wide is not None and self._wide.shape[:2] == (h, w):
+            return
+        self._wide = np.empty((h, w, 3), dtype=np.uint16)
+        self._tmp = np.empty((h, w, 3), dtype=np.uint16)
+        self._inv = np.empty((h, w, 1), dtype=np.uint16)
+        self._inv8 = np.empty((h, w, 3), dtype=np.uint8)
+    
+    def _scratch(self, y0: int, y1: int, x0: int, x1: int):
+        """출력 좌표 영역에 해당하는 백엔드 작업 버퍼 (wide, tmp, inv, inv8)"""
+        return (self._wide[y0:y1, x0:x1], self._tmp[y0:y1, x0:x1],
+                self._inv[y0:y1, x0:x1], self._inv8[y0:y1, x0:x1])
+    
+    def _run_tiled(self, fn, y0: int, y1: int, width: int):
+        """행 [y0, y1)을 가로 띠로 나눠 fn(band_y0, band_y1)을 병렬 실행합니다 (작은 영역은 한 번에)."""
+        rows = y1 - y0
+        tiles = min(self.tiles, rows, max(1, rows * width // COMPOSITOR_MIN_TILE_PIXELS))
+        if tiles <= 1:
+            fn(y0, y1)
+            return
+        bounds = [y0 + rows * i // tiles for i in range(tiles + 1)]
+        futures = [self._pool.submit(fn, bounds[i], bounds[i + 1]) for i in range(tiles - 1)]
+        fn(bounds[-2], bounds[-1])
+        for future in futures:
+            future.result()
+    
+    def attach(self, out):
+        """이후 합성 결과를 쓸 출력 버퍼를 지정합니다."""
+        self._ensure_buffers(out.shape)
+        self.out = out
+    
+    def begin(self, background, out, fade_alpha: float = 1.0):
+        """배경 프레임을 출력 버퍼에 복사하고 (필요하면 페이드 적용) 그 버퍼를 반환합니다."""
+        self.attach(out)
+        if fade_alpha < 1.0:
+            # 검은색으로 페이드: out = background * fade_alpha
+            alpha = max(0.0, fade_alpha)
+            def band(a, b):
+                cv2.convertScaleAbs(background[a:b], dst=out[a:b], alpha=alpha)
+        else:
+            def band(a, b):
+                np.copyto(out[a:b], background[a:b])
+        self._run_tiled(band, 0, out.shape[0], out.shape[1])
+        return out
+    
+    def begin_crossfade(self, background, incoming, out, t: float):
+        """두 배경 프레임을 디졸브하여 출력 버퍼에 씁니다 (out = background * (1 - t) + incoming * t)."""
+        self.attach(out)
+        if incoming.shape != background.shape:
+            incoming = cv2.resize(incoming, (background.shape[1], background.shape[0]), interpolation=cv2.INTER_LINEAR)
+        t = min(1.0, max(0.0, t))
+        def band(a, b):
+            cv2.addWeighted(background[a:b], 1.0 - t, incoming[a:b], t, 0.0, dst=out[a:b])
+        self._run_tiled(band, 0, out.shape[0], out.shape[1])
+        return out
+    
+    def blend_premultiplied(self, premul, alpha, y: int = 0, x: int = 0, opacity: int = 255):
+        """
+        out = premul * o + out * (255 - alpha * o) / 255 (출력 버퍼에 제자리 합성, o = opacity / 255).
+        premul/alpha가 프레임보다 작으면 (y, x) 위치의 영역(ROI)만 합성합니다.
+        """
+        h, w = alpha.shape[:2]
+        backend = self.backend
+        def band(a, b):
+            # a, b는 출력 프레임 기준 행 번호
+            backend.over(self.out[a:b, x:x + w], premul[a - y:b - y], alpha[a - y:b - y],
+                         self._scratch(a, b, x, x + w), opacity)
+        self._run_tiled(band, y, y + h, w)
+    
+    def blend_layers(self, layers):
+        """
+        여러 프리멀티플라이드 레이어 [(premul, alpha, y, x, opacity 0~255), ...] (아래 → 위 순서)를 합성합니다.
+        
+        한 번에 합성하지 않고 레이어마다 자기 영역에만 차례로 over 연산을 합니다. 겹치는 영역의 출력 버퍼는
+        레이어 수만큼 읽고 쓰지만, 불투명도를 over 커널에서 함께 적용하므로 레이어당 한 번의 패스로 끝납니다.
+        모든 레이어를 합집합 영역의 누적 버퍼로 모아 출력을 한 번만 읽고 쓰는 방식은 레이어 사이 빈 영역까지
+        처리하고 누적 버퍼 패스가 추가되어 더 느렸습니다 (numpy, 720p 출력에 540x640 레이어 2개, 1스레드:
+        떨어진 레이어 29.4 → 12.1ms, 겹친 레이어 35.9 → 11.4ms, 한 레이어 페이드 중 35.3 → 13.5ms).
+        """
+        for premul, alpha, y, x, opacity in layers:
+            if opacity > 0:
+                self.blend_premultiplied(premul, alpha, y, x, opacity)
+
+
+def calibrate_compositor_backend(size=None, overlay_size=None, iterations: int = 5, log: bool = True):
+    """
+    짧은 합성을 백엔드별로 돌려 가장 빠른 백엔드를 고릅니다 (VideoPlayer.start에서 재생 전에 한 번).
+    size/overlay_size는 실제 출력/오버레이 크기 (h, w)이며, 비율은 그대로 두고 COMPOSITOR_CALIBRATION_SIZE
+    이하로 줄인 크기에서 측정하므로 수 ms 안에 끝납니다.
+    COMPOSITOR_BACKEND가 auto가 아니면 측정 없이 그 백엔드를 씁니다.
+    
+    Returns:
+        선택된 백엔드 인스턴스
+    """
+    if COMPOSITOR_BACKEND != "auto":
+        backend_cls = COMPOSITOR_BACKENDS.get(COMPOSITOR_BACKEND)
+        if backend_cls is None:
+            print(f"⚠️ 알 수 없거나 사용할 수 없는 합성 백엔드: {COMPOSITOR_BACKEND} (opencv 사용)")
+            backend_cls = OpenCVBlendBackend
+        if log:
+            print(f"🧮 합성 백엔드: {backend_cls.name} (COMPOSITOR_BACKEND 지정)")
+        return backend_cls()
+    
+    # 출력/오버레이 크기를 같은 비율로 측정용 크기까지 축소
+    full_h, full_w = h, w = size or COMPOSITOR_CALIBRATION_SIZE
+    oh, ow = overlay_size or (h * 3 // 4, w // 2)
+    ratio = min(1.0, COMPOSITOR_CALIBRATION_SIZE[0] / h, COMPOSITOR_CALIBRATION_SIZE[1] / w)
+    h, w = max(1, int(h * ratio)), max(1, int(w * ratio))
+    oh, ow = min(max(1, int(oh * ratio)), h), min(max(1, int(ow * ratio)), w)
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    alpha = rng.integers(0, 256, (oh, ow), dtype=np.uint8)
+    premul = ((rng.integers(0, 256, (oh, ow, 3), dtype=np.uint16) * alpha[:, :, None] + 127) // 255).astype(np.uint8)
+    layers = [(premul, alpha, 0, 0, 255), (premul, alpha, h - oh, w - ow, 200)]
+    out = np.empty_like(background)
+    
+    timings = {}
+    for name, backend_cls in COMPOSITOR_BACKENDS.items():
+        compositor = FrameCompositor(tiles=1, backend=backend_cls())  # 커널 자체 속도만 비교 (타일 병렬은 공통)
+        try:
+            compositor.begin(background, out)
+            compositor.blend_layers(layers)  # 첫 호출 (버퍼 할당, JIT 컴파일)은 측정에서 제외
+            start = time.perf_counter()
+            for _ in range(iterations):
+                compositor.begin(background, out)
+                compositor.blend_layers(layers)
+            timings[name] = (time.perf_counter() - start) / iterations * 1000
+        except Exception as e:
+            print(f"⚠️ 합성 백엔드 {name} 측정 실패: {e}")
+    if not timings:
+        return OpenCVBlendBackend()
+    best = min(timings, key=timings.get)
+    if log:
+        detail = ", ".join(f"{name} {ms:.1f}ms" for name, ms in sorted(timings.items(), key=lambda kv: kv[1]))
+        scaled = f", 실제 {full_w}x{full_h} 축소" if size else ""
+        print(f"🧮 합성 백엔드: {best} ({w}x{h} 측정{scaled}: {detail})")
+    return COMPOSITOR_BACKENDS[best]()
+
+
+class FramePresenter:
+    """
+    합성 스레드(쓰기)와 화면 표시(읽기) 사이의 트리플 버퍼.
+    합성기는 백 버퍼에 쓰고 publish()로 인덱스만 교환하며, 표시 쪽은 acquire()로 복사 없이 최신 프레임을 읽습니다.
+    acquire()가 반환한 버퍼는 다음 acquire() 호출 전까지 합성기가 덮어쓰지 않습니다.
+    """
+    
+    def __init__(self):
+        self._buffers = []
+        self._back = 0  # 합성기가 쓰는 버퍼
+        self._ready = 1  # 가장 최근에 게시된 버퍼
+        self._front = 2  # 표시 쪽이 읽고 있는 버퍼
+        self._fresh = False  # 아직 읽히지 않은 게시 프레임이 있는지
+        self._has_frame = False  # 게시된 프레임이 하나라도 있는지
+        self._lock = threading.Lock()
+    
+    def back_buffer(self, shape):
+        """합성기가 다음 프레임을 쓸 백 버퍼를 반환합니다 (크기가 바뀌면 새로 할당)."""
+        if not self._buffers or self._buffers[0].shape != shape:
+            buffers = [np.zeros(shape, dtype=np.uint8) for _ in range(3)]
+            with self._lock:
+                # 표시 쪽이 들고 있는 이전 버퍼는 참조가 남아 있으므로 그대로 유효
+                self._buffers = buffers
+                self._fresh = False
+                self._has_frame = False
+        return self._buffers[self._back]
+    
+    def publish(self):
+        """백 버퍼를 최신 프레임으로 게시합니다 (인덱스 교환만, 복사 없음)."""
+        with self._lock:
+            self._back, self._ready = self._ready, self._back
+            self._fresh = True
+            self._has_frame = True
+    
+    def acquire(self):
+        """가장 최근에 게시된 프레임을 반환합니다 (복사 없음, 읽기 전용). 없으면 None."""
+        with self._lock:
+            if not self._has_frame:
+                return None
+            if self._fresh:
+                self._front, self._ready = self._ready, self._front
+                self._fresh = False
+            return self._buffers[self._front]
+    
+    def clear(self):
+        """게시된 프레임을 비웁니다 (다음 publish 전까지 acquire()는 None)."""
+        with self._lock:
+            self._fresh = False
+            self._has_frame = False
+
+
+class FramePacer:
+    """
+    재생 루프의 틱 시각을 벽시계에 고정하는 페이싱 컨트롤러.
+    틱 k의 예정 시각은 기준 시각 + k * interval이며 (처리 시간만큼 밀리지 않음),
+    한 주기 이상 뒤처지면 밀린 틱들은 합성하지 않고 드롭한 뒤 현재 시각으로 따라잡습니다.
+    드롭/지연 틱 수와 누적 지연(드리프트)을 집계해 주기적으로 보고합니다.
+    """
+    
+    def __init__(self, interval: float, report_interval: float = 30.0):
+        self.interval = interval
+        self.report_interval = report_interval
+        self._scheduled = None  # 현재 틱의 예정 시작 시각 (perf_counter)
+        self.presented = 0  # 처리한 틱 수
+        self.dropped = 0  # 뒤처져서 건너뛴 틱 수
+        self.late = 0  # 다음 예정 시각을 넘겨 끝난 틱 수
+        self.drift = 0.0  # 누적 지연 (초)
+        self.max_lateness = 0.0  # 가장 늦게 끝난 틱의 지연 (초)
+        self._window = None  # 마지막 보고 시점의 (시각, presented, dropped, late, drift, decoder_skips)
+    
+    def begin_tick(self) -> float:
+        """틱을 시작하고 현재 시각을 반환합니다. 한 주기 이상 뒤처졌으면 밀린 틱을 드롭하고 따라잡습니다."""
+        now = time.perf_counter()
+        if self._scheduled is None:
+            self._scheduled = now
+        behind = int((now - self._scheduled) / self.interval)
+        if behind > 0:
+            self.dropped += behind
+            self._scheduled += behind * self.interval
+        self.presented += 1
+        return now
+    
+    def end_tick(self):
+        """다음 틱 예정 시각까지 대기합니다. 이미 지났으면 지연으로 기록하고 바로 반환합니다."""
+        deadline = self._scheduled + self.interval
+        remaining = deadline - time.perf_counter()
+        if remaining < 0:
+            self.late += 1
+            self.drift += -remaining
+            self.max_lateness = max(self.max_lateness, -remaining)
+        elif remaining < 0.001:
+            time.sleep(0)  # yield to other threads
+        else:
+            time.sleep(remaining)
+        self._scheduled = deadline
+    
+    def reset(self):
+        """일시 정지 등으로 시계가 끊겼을 때 예정 시각을 다시 잡습니다 (드롭으로 세지 않음)."""
+        self._scheduled = None
+    
+    def stats(self, decoder_skips: int = 0) -> dict:
+        return {
+            "presented": self.presented,
+            "dropped": self.dropped,
+            "late": self.late,
+            "drift_ms": self.drift * 1000.0,
+            "max_late_ms": self.max_lateness * 1000.0,
+            "decoder_skips": decoder_skips,
+        }
+    
+    def maybe_report(self, now: float, decoder_skips: int = 0):
+        """report_interval마다, 그 사이 드롭/지연이 있었으면 집계를 출력합니다."""
+        current = (now, self.presented, self.dropped, self.late, self.drift, decoder_skips)
+        if self._window is None:
+            self._window = current
+            return
+        if now - self._window[0] < self.report_interval:
+            return
+        _, presented, dropped, late, drift, skips = (c - w for c, w in zip(current, self._window))
+        self._window = current
+        if dropped or late or skips:
+            print(f"📊 재생 페이싱 (최근 {self.report_interval:.0f}초): 표시 {presented}, 드롭 {dropped}, 지연 {late}, "
+                  f"누적 지연 {drift * 1000:.0f}ms, 최대 지연 {self.max_lateness * 1000:.0f}ms, 디코더 건너뜀 {skips}프레임")
+            self.max_lateness = 0.0
+
+
+class OverlayMetadataIndex:
+    """
+    오버레이 클립별 메타데이터 인덱스.
+    원본 프레임 크기, FPS, 그리고 모든 프레임의 알파 바운딩 박스(내용 영역)를 저장하여
+    합성 시 투명한 부분을 건너뛰고 내용이 있는 영역만 처리할 수 있게 합니다.
+    """
+    
+    def __init__(self):
+        self._entries = {}  # path -> {"frame_size", "fps", "boxes", "extent"}
+        self._lock = threading.Lock()
+    
+    def put(self, path: str, frame_size: tuple, fps: float, boxes: list):
+        valid = [b for b in boxes if b is not None]
+        extent = None
+        if valid:
+            extent = (min(b[0] for b in valid), max(b[1] for b in valid),
+                      min(b[2] for b in valid), max(b[3] for b in valid))
+        with self._lock:
+            self._entries[path] = {
+                "frame_size": tuple(frame_size),
+                "fps": fps,
+                "boxes": list(boxes),
+                "extent": extent,  # 모든 프레임 박스의 합집합
+            }
+        ASSET_INDEX.record_extent(path, extent, frame_size)
+    
+    def get(self, path: str):
+        with self._lock:
+            return self._entries.get(path)
+
+
+class PackedOverlayMasks:
+    """
+    알파 없는 (검은 배경 키) 오버레이 클립의 프레임별 마스크를 오프라인에서 미리 계산해 둔 것.
+    프레임마다 내용 영역(바운딩 박스)의 마스크만 행 단위로 비트 패킹(np.packbits)해 저장하므로,
+    런타임에는 그레이 변환/임계값/바운딩 박스 탐색 없이 박스 영역만 풀어서 알파로 씁니다.
+    원본 비디오가 바뀌면 (크기/수정 시각, 다르면 내용 해시로 확인) 로드하지 않습니다.
+    """
+    
+    def __init__(self, frame_size: tuple, boxes, offsets, bits, source: dict = None):
+        self.frame_size = tuple(int(v) for v in frame_size)  # 원본 프레임 크기 (h, w)
+        self.boxes = boxes  # 프레임별 (y0, y1, x0, x1) int32 배열, 내용이 없는 프레임은 -1
+        self.offsets = offsets  # 프레임별 bits 시작 위치 (길이 = 프레임 수 + 1)
+        self.bits = bits  # 모든 프레임의 패킹된 박스 마스크를 이어 붙인 uint8 배열
+        self.source = source or {}  # 원본 비디오의 size, mtime_ns, hash
+    
+    def __len__(self):
+        return len(self.boxes)
+    
+    @staticmethod
+    def path_for(video_path: str) -> str:
+        """비디오에 대응하는 마스크 파일 경로 (OVERLAY_MASK_DIR 아래에 같은 폴더 구조로 저장)"""
+        rel = os.path.splitdrive(os.path.normpath(video_path))[1].lstrip(os.sep)
+        return os.path.join(OVERLAY_MASK_DIR, rel + ".npz")
+    
+    @classmethod
+    def build(cls, video_path: str):
+        """클립 전체를 디코딩해 마스크를 계산합니다 (알파 채널이 있거나 열 수 없으면 None)."""
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            return None
+        boxes, chunks, offsets = [], [], [0]
+        frame_size = None
+        try:
+            while True:
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    break
+                if frame.ndim == 3 and frame.shape[2] == 4:
+                    return None  # 알파 클립은 마스크가 필요 없음
+                frame_size = frame.shape[:2]
+                mask = overlay_key_mask(frame)
+                box = content_bbox(mask)
+                if box is None:
+                    boxes.append((-1, -1, -1, -1))
+                else:
+                    y0, y1, x0, x1 = box
+                    boxes.append(box)
+                    chunks.append(np.packbits(mask[y0:y1, x0:x1] > 0, axis=1).ravel())
+                offsets.append(offsets[-1] + (chunks[-1].size if box is not None else 0))
+        finally:
+            cap.release()
+        if frame_size is None:
+            return None
+        source = source_signature(video_path)
+        bits = np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.uint8)
+        return cls(frame_size, np.array(boxes, dtype=np.int32), np.array(offsets, dtype=np.int64), bits, source)
+    
+    def save(self, path: str):
+        """마스크를 npz 파일로 저장합니다 (임시 파일에 쓴 뒤 교체)."""
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, frame_size=np.array(self.frame_size), boxes=self.boxes,
+                            offsets=self.offsets, bits=self.bits,
+                            source_size=self.source["size"], source_mtime_ns=self.source["mtime_ns"],
+                            source_hash=self.source["hash"])
+        os.replace(tmp_path, path)
+    
+    @classmethod
+    def load(cls, video_path: str):
+        """미리 계산된 마스크를 불러옵니다 (없거나 원본이 바뀌었으면 None)."""
+        path = cls.path_for(video_path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                source = {"size": int(data["source_size"]), "mtime_ns": int(data["source_mtime_ns"]),
+                          "hash": str(data["source_hash"])}
+                masks = cls(data["frame_size"], data["boxes"], data["offsets"], data["bits"], source)
+            return masks if source_unchanged(video_path, source) else None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 오버레이 마스크 로드 실패: {path} ({e})")
+            return None
+    
+    def mask(self, index: int, size=None):
+        """
+        프레임의 내용 영역 박스와 그 영역의 마스크 (uint8 0/255)를 반환합니다.
+        index는 루프를 돌아도 계속 증가하는 프레임 번호이며, size가 원본과 다르면 그 크기 좌표로 맞춥니다.
+        
+        Returns:
+            (box, alpha) 튜플 또는 (None, None) (내용이 없는 프레임)
+        """
+        i = index % len(self.boxes)
+        y0, y1, x0, x1 = (int(v) for v in self.boxes[i])
+        if y0 < 0:
+            return None, None
+        h, w = y1 - y0, x1 - x0
+        packed = self.bits[self.offsets[i]:self.offsets[i + 1]].reshape(h, -1)
+        alpha = np.unpackbits(packed, axis=1, count=w)
+        alpha *= 255
+        box = (y0, y1, x0, x1)
+        if size is not None and tuple(size) != self.frame_size:
+            # 0/255 마스크를 유지하도록 최근접 보간 (프리멀티플라이가 마스킹과 같아지게)
+            box = scale_box(box, self.frame_size, size)
+            alpha = cv2.resize(alpha, (box[3] - box[2], box[1] - box[0]), interpolation=cv2.INTER_NEAREST)
+        return box, alpha
+
+
+def build_overlay_masks(dirs=None, force: bool = False):
+    """
+    오버레이 폴더의 알파 없는 클립마다 프레임별 키 마스크를 미리 계산해 OVERLAY_MASK_DIR에 저장합니다.
+    이미 최신 마스크가 있는 클립은 건너뜁니다 (force=True면 모두 다시 계산).
+    """
+    ASSET_INDEX.build(hash_now=True)  # 수정 시각만 바뀐 원본을 내용 해시로 확인하기 위해
+    dirs = dirs or [INTERACTIONS_DIR]
+    paths = []
+    for d in dirs:
+        for root, _, names in os.walk(d):
+            for name in sorted(names):
+                if name.lower().endswith(VIDEO_EXTENSIONS) and not name.startswith("."):
+                    paths.append(os.path.join(root, name))
+    
+    built = skipped = 0
+    for path in paths:
+        if not force and PackedOverlayMasks.load(path) is not None:
+            skipped += 1
+            continue
+        masks = PackedOverlayMasks.build(path)
+        if masks is None:
+            print(f"⏭️ 마스크 생략 (알파 채널 있음 또는 읽기 실패): {path}")
+            continue
+        out_path = PackedOverlayMasks.path_for(path)
+        masks.save(out_path)
+        built += 1
+        raw = len(masks) * masks.frame_size[0] * masks.frame_size[1]
+        print(f"✅ 마스크 저장: {out_path} ({len(masks)}프레임, {masks.bits.nbytes / 1024:.0f}KB, "
+              f"원본 마스크 대비 {masks.bits.nbytes / max(1, raw) * 100:.1f}%)")
+    print(f"\n🎯 오버레이 마스크: {built}개 생성, {skipped}개 최신 상태 (총 {len(paths)}개 클립)")
+
+
+class CachedOverlayClip:
+    """한 번 디코딩되어 메모리에 올라간 오버레이 루프 클립"""
+    
+    def __init__(self, path: str, frames: list, fps: float, frame_size: tuple, boxes: list, alphas: list = None,
+                 mapped: bool = False):
+        self.path = path
+        # 디코딩된 프레임 리스트: 바운딩 박스로 잘라낸 영역만 프리멀티플라이드 BGR로 저장 (내용이 없는 프레임은 None)
+        self.frames = frames
+        self.alphas = alphas  # 프레임별 알파 (uint8, 잘라낸 영역) - 알파 없는 클립은 키 마스크
+        self.boxes = boxes  # 프레임별 바운딩 박스 (y0, y1, x0, x1), frame_size 좌표
+        self.frame_size = frame_size  # 프레임 크기 (h, w) - 출력 해상도에 맞춰 로드했으면 출력 크기
+        self.fps = fps
+        self.mapped = mapped  # 프레임 스토어 (.npy)를 메모리 매핑한 클립이면 True
+        if mapped:
+            self.nbytes = 0  # 페이지 캐시에 있고 프로세스 간에 공유되므로 캐시 예산에 포함하지 않음
+        else:
+            self.nbytes = (sum(f.nbytes for f in frames if f is not None)
+                           + sum(a.nbytes for a in (alphas or []) if a is not None))
+    
+    def __len__(self):
+        return len(self.frames)
+
+
+class OverlayFrameStore:
+    """
+    짧은 루프 오버레이 클립의 프레임을 출력 해상도별로 미리 합성용 형식으로 저장해 둔 디스크 스토어.
+    모든 프레임 박스의 합집합 영역을 프리멀티플라이드 BGRA (N, h, w, 4) uint8 .npy 하나에 연속으로 저장하고,
+    프레임별 박스/FPS/원본 서명은 같은 이름의 .json에 둡니다.
+    런타임에는 np.load(mmap_mode="r")로 매핑만 하므로 디코딩이 없고, 프레임은 페이지 캐시에서
+    복사 없이 (뷰로) 읽으며, 같은 머신의 여러 플레이어 프로세스가 같은 페이지를 공유합니다.
+    원본이 바뀐 스토어는 쓰지 않고 표시해 두었다가, 캐시가 그 클립을 디코딩하면 백그라운드에서 다시 저장합니다.
+    """
+    
+    _stale = set()  # 원본이 바뀌어 다시 저장해야 하는 (원본 경로, 출력 크기)
+    _stale_lock = threading.Lock()
+    
+    @staticmethod
+    def path_for(video_path: str, size) -> str:
+        """출력 해상도 size (h, w)용 스토어 경로 (.npy, 메타데이터는 확장자만 .json)"""
+        rel = os.path.splitdrive(os.path.normpath(video_path))[1].lstrip(os.sep)
+        return os.path.join(FRAME_STORE_DIR, f"{rel}.{size[0]}x{size[1]}.npy")
+    
+    @classmethod
+    def write(cls, video_path: str, clip: CachedOverlayClip):
+        """디코딩된 클립 (출력 해상도에 맞춘 것)을 스토어로 저장합니다. 저장한 .npy 경로 또는 None (내용 없음)."""
+        valid = [b for b in clip.boxes if b is not None]
+        if not valid:
+            return None
+        ey0, ey1 = min(b[0] for b in valid), max(b[1] for b in valid)
+        ex0, ex1 = min(b[2] for b in valid), max(b[3] for b in valid)
+        path = cls.path_for(video_path, clip.frame_size)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path[:-len(".npy")] + ".tmp.npy"
+        store = np.lib.format.open_memmap(tmp_path, mode="w+", dtype=np.uint8,
+                                          shape=(len(clip), ey1 - ey0, ex1 - ex0, 4))
+        store[:] = 0
+        for i, box in enumerate(clip.boxes):
+            if box is None:
+                continue
+            y0, y1, x0, x1 = box
+            region = store[i, y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+            region[:, :, :3] = clip.frames[i]
+            region[:, :, 3] = clip.alphas[i]
+        store.flush()
+        del store
+        meta = {
+            "fps": clip.fps,
+            "frame_size": list(clip.frame_size),
+            "extent": [ey0, ey1, ex0, ex1],
+            "boxes": [list(b) if b is not None else None for b in clip.boxes],
+            "source": source_signature(video_path),
+        }
+        meta_path = path[:-len(".npy")] + ".json"
+        with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, path)
+        os.replace(meta_path + ".tmp", meta_path)
+        return path
+    
+    @classmethod
+    def load(cls, video_path: str, size):
+        """스토어를 메모리 매핑해 클립으로 반환합니다 (없거나 원본이 바뀌었으면 None)."""
+        if not size:
+            return None
+        path = cls.path_for(video_path, size)
+        meta_path = path[:-len(".npy")] + ".json"
+        if not os.path.exists(path) or not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if not source_unchanged(video_path, meta["source"]):
+                with cls._stale_lock:
+                    cls._stale.add((video_path, tuple(size)))
+                return None
+            store = np.load(path, mmap_mode="r")
+            ey0, _, ex0, _ = meta["extent"]
+            frames, alphas, boxes = [], [], []
+            for i, box in enumerate(meta["boxes"]):
+                if box is None:
+                    frames.append(None)
+                    alphas.append(None)
+                    boxes.append(None)
+                    continue
+                y0, y1, x0, x1 = box
+                # 프레임 박스 영역의 뷰 (복사 없음, 합성기가 페이지 캐시에서 바로 읽음)
+                region = store[i, y0 - ey0:y1 - ey0, x0 - ex0:x1 - ex0]
+                frames.append(region[:, :, :3])
+                alphas.append(region[:, :, 3])
+                boxes.append(tuple(box))
+            return CachedOverlayClip(video_path, frames, meta["fps"], tuple(meta["frame_size"]), boxes, alphas,
+                                     mapped=True)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"⚠️ 오버레이 프레임 스토어 로드 실패: {path} ({e})")
+            return None
+    
+    @classmethod
+    def rebuild_if_stale(cls, video_path: str, clip: CachedOverlayClip):
+        """load에서 원본이 바뀐 것으로 확인된 스토어면, 새로 디코딩한 clip으로 백그라운드에서 다시 저장합니다."""
+        key = (video_path, tuple(clip.frame_size))
+        with cls._stale_lock:
+            if key not in cls._stale:
+                return
+            cls._stale.discard(key)
+        
+        def worker():
+            try:
+                if cls.write(video_path, clip):
+                    print(f"🗂️ 오버레이 프레임 스토어 갱신: {os.path.basename(video_path)}")
+            except OSError as e:
+                print(f"⚠️ 오버레이 프레임 스토어 갱신 실패: {video_path} ({e})")
+        threading.Thread(target=worker, name="frame-store-rebuild", daemon=True).start()
+
+
+class OverlayFrameCache:
+    """
+    Interactions 오버레이 클립(bg*_chN_*.mov)을 한 번만 디코딩해 메모리에 보관하는 LRU 캐시.
+    클립은 로드 시 출력 해상도(target_size)에 맞게 한 번만 스케일하여 (경로, 출력 크기)별로 보관합니다.
+    예산(budget_bytes)을 넘으면 가장 오래 사용하지 않은 클립부터 제거합니다.
+    예산보다 큰 클립은 캐시하지 않으며, 이 경우 호출자는 VideoCapture 스트리밍으로 대체합니다.
+    """
+    
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.used_bytes = 0
+        self._clips = OrderedDict()  # (path, target_size) -> CachedOverlayClip (LRU 순서, 마지막이 최근 사용)
+        self._loading = {}  # (path, target_size) -> threading.Event (같은 클립 중복 디코딩 방지)
+        self._lock = threading.Lock()
+    
+    def get(self, path: str, target_size=None, allow_evict: bool = True, decode: bool = True):
+        """
+        클립을 반환합니다. 캐시에 없으면 디코딩 후 저장합니다. 캐시할 수 없으면 None.
+        target_size (h, w)가 있으면 그 출력 해상도에 맞게 스케일된 클립을 반환합니다.
+        decode=False면 캐시나 프레임 스토어 매핑으로 바로 얻을 수 있을 때만 반환합니다 (디코딩/대기 없음).
+        """
+        key = (path, tuple(target_size) if target_size else None)
+        while True:
+            with self._lock:
+                clip = self._clips.get(key)
+                if clip is not None:
+                    self._clips.move_to_end(key)
+                    return clip
+                loading = self._loading.get(key)
+                if loading is None:
+                    loading = threading.Event()
+                    self._loading[key] = loading
+                    break
+            if not decode:
+                return None
+            # 다른 스레드가 같은 클립을 디코딩 중이면 끝날 때까지 대기 후 다시 확인
+            loading.wait()
+        
+        try:
+            # 미리 만들어 둔 프레임 스토어가 있으면 디코딩 없이 매핑만 함
+            clip = OverlayFrameStore.load(path, key[1])
+            if clip is None and decode:
+                clip = self._decode(path, key[1])
+                if clip is not None:
+                    OverlayFrameStore.rebuild_if_stale(path, clip)
+            if clip is None:
+                return None
+            with self._lock:
+                if not self._make_room(clip.nbytes, allow_evict):
+                    return None
+                self._clips[key] = clip
+                self.used_bytes += clip.nbytes
+            if clip.mapped:
+                print(f"🗂️ 오버레이 프레임 스토어 매핑: {os.path.basename(path)} ({len(clip)}프레임)")
+            else:
+                print(f"🗂️ 오버레이 캐시 저장: {os.path.basename(path)} "
+                      f"({len(clip)}프레임, {clip.nbytes / 1e6:.1f}MB, 사용량 {self.used_bytes / 1e6:.0f}/{self.budget_bytes / 1e6:.0f}MB)")
+            return clip
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+            loading.set()
+    
+    def prefetch(self, paths: list[str], target_size=None):
+        """남은 예산 안에서 클립들을 백그라운드로 미리 디코딩합니다 (기존 클립은 제거하지 않음)."""
+        target_size = tuple(target_size) if target_size else None
+        def worker():
+            for path in paths:
+                with self._lock:
+                    if (path, target_size) in self._clips or self.used_bytes >= self.budget_bytes:
+                        continue
+                self.get(path, target_size, allow_evict=False)
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def clear(self):
+        with self._lock:
+            self._clips.clear()
+            self.used_bytes = 0
+    
+    def _make_room(self, needed: int, allow_evict: bool) -> bool:
+        """needed 바이트가 들어갈 공간을 확보합니다 (lock 안에서 호출)."""
+        if needed > self.budget_bytes:
+            return False
+        while self.used_bytes + needed > self.budget_bytes:
+            if not allow_evict or not self._clips:
+                return False
+            # 재생 중인 클립이 제거되어도 플레이어가 참조를 들고 있으므로 안전함
+            _, evicted = self._clips.popitem(last=False)
+            self.used_bytes -= evicted.nbytes
+            print(f"🗂️ 오버레이 캐시 제거 (LRU): {os.path.basename(evicted.path)}")
+        return True
+    
+    def _decode(self, path: str, target_size=None):
+        """
+        클립 전체를 디코딩합니다. 예산을 넘으면 중단하고 None을 반환합니다.
+        target_size가 원본 크기와 다르면 프레임별 내용 영역만 출력 좌표로 한 번 스케일해 둡니다.
+        """
+        cap = open_video_capture(path)
+        if not cap.isOpened():
+            return None
+        try:
+            fps = probe_video_fps(path, cap)
+            masks = PackedOverlayMasks.load(path)  # 키 클립의 사전 계산 마스크 (있으면 마스크 계산 생략)
+            frames = []
+            alphas = []
+            boxes = []  # 원본 좌표 (메타데이터 인덱스용)
+            out_boxes = []  # 출력 좌표 (합성용)
+            frame_size = None
+            out_size = None
+            has_alpha = False
+            total = 0
+            while True:
+                ret, frame = cap.read()
+                if not ret or frame is None:
+                    break
+                frame_size = frame.shape[:2]
+                out_size = tuple(target_size) if target_size else frame_size
+                has_alpha = frame.ndim == 3 and frame.shape[2] == 4
+                # 프레임별 내용 영역(바운딩 박스)만 잘라서 저장
+                mask = None
+                if has_alpha:
+                    box = content_bbox(frame[:, :, 3])
+                elif masks is not None and frame_size == masks.frame_size:
+                    box, mask = masks.mask(len(boxes))
+                else:
+                    mask = overlay_key_mask(frame)
+                    box = content_bbox(mask)
+                    if box is not None:
+                        mask = mask[box[0]:box[1], box[2]:box[3]]
+                boxes.append(box)
+                if box is None:
+                    out_boxes.append(None)
+                    frames.append(None)
+                    alphas.append(None)
+                    continue
+                y0, y1, x0, x1 = box
+                roi = frame[y0:y1, x0:x1]
+                if has_alpha:
+                    # 알파 클립은 로드 시 한 번만 프리멀티플라이 (스케일 전에 해야 가장자리 색이 번지지 않음)
+                    roi, alpha = premultiply_bgra(roi)
+                else:
+                    # 알파 없는 클립은 키 마스크를 알파로 사용 (마스크 밖을 0으로 만들면 프리멀티플라이드와 같음)
+                    alpha = np.ascontiguousarray(mask)
+                    roi = cv2.bitwise_and(roi, roi, mask=alpha)
+                if out_size != frame_size:
+                    # 출력 해상도와 다르면 내용 영역만 로드 시 한 번 스케일 (재생 중에는 리사이즈하지 않음)
+                    box = scale_box(box, frame_size, out_size)
+                    size = (box[3] - box[2], box[1] - box[0])
+                    interpolation = resize_interpolation(frame_size, out_size)
+                    roi = cv2.resize(roi, size, interpolation=interpolation)
+                    alpha = cv2.resize(alpha, size, interpolation=interpolation)
+                out_boxes.append(box)
+                frames.append(np.ascontiguousarray(roi))
+                alphas.append(alpha)
+                total += roi.nbytes + alpha.nbytes
+                if total > self.budget_bytes:
+                    print(f"⚠️ 오버레이 클립이 캐시 예산보다 큼, 스트리밍 재생: {os.path.basename(path)}")
+                    return None
+        finally:
+            cap.release()
+        if not frames:
+            return None
+        OVERLAY_METADATA.put(path, frame_size, fps, boxes)
+        return CachedOverlayClip(path, frames, fps, out_size, out_boxes, alphas)
+
+
+class LayerDecoder:
+    """
+    비디오 레이어 하나(배경, ch1, ch2)를 전용 스레드에서 디코딩하여
+    작은 크기 제한 큐에 준비된 프레임을 채워 두는 워커입니다 (끝나면 처음으로 돌아가 무한 루프).
+    OpenCV는 디코딩 중 GIL을 해제하므로 레이어별 디코딩이 여러 코어에서 병렬로 진행되고,
+    한 스트림의 디코딩 지연이 합성 루프 전체를 멈추지 않습니다.
+    캡처 객체는 이 워커가 소유하며, 중지 시 워커 스레드가 직접 해제합니다
+    (release 콜백이 있으면 해제 대신 콜백에 돌려줍니다 - BackgroundCapturePool 반납용).
+    target_size가 있으면 크기가 다른 프레임은 이 워커 스레드에서 출력 해상도로 맞춰 둡니다.
+    
+    각 프레임은 레이어 자신의 FPS 기준 프레임 번호(PTS)와 함께 큐에 들어가며, 표시 시각은
+    첫 get_frame() 호출 시점부터의 단조 시계로 정합니다. 늦으면 grab()으로 디코딩 결과를 버리고 건너뛰고,
+    빠르면 직전 프레임을 반복하므로 레이어마다 FPS가 달라도 모두 제 속도로 재생됩니다.
+    """
+    
+    def __init__(self, cap, name: str, queue_size: int = None, release=None, target_size=None, fps: float = 30.0):
+        self.cap = cap
+        self.name = name
+        self._release = release
+        self.target_size = tuple(target_size) if target_size else None
+        self.fps = fps if fps and fps > 0 else 30.0
+        self._queue = queue.Queue(maxsize=queue_size or DECODER_QUEUE_SIZE)
+        self._stop_event = threading.Event()
+        self._clock_start = None  # 첫 표시 시각 (perf_counter), 이 시각에 프레임 0을 표시
+        self._pending = None  # 큐에서 꺼냈지만 아직 표시 시각이 안 된 (index, frame)
+        self.skipped_frames = 0  # 표시 시각이 지나 grab()으로 건너뛴 프레임 수
+        self._last_frame = None  # 큐가 비었을 때 반복 표시할 직전 프레임
+        self.frame_index = None  # 직전에 get_frame()이 반환한 프레임의 번호 (루프해도 계속 증가)
+        self._ready = threading.Event()  # 첫 프레임이 큐에 들어가면 설정 (프리롤 완료)
+        self._thread = threading.Thread(target=self._run, name=f"decoder-{name}", daemon=True)
+    
+    def start(self):
+        self._thread.start()
+        return self
+    
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+    
+    def due_index(self, now: float):
+        """now 시각에 표시해야 할 프레임 번호 (시계가 아직 시작되지 않았으면 None)."""
+        if self._clock_start is None:
+            return None
+        return int((now - self._clock_start) * self.fps)
+    
+    def _run(self):
+        try:
+            index = 0  # 다음에 읽을 프레임의 번호 (루프해도 계속 증가)
+            while not self._stop_event.is_set():
+                # 이미 다음 프레임의 표시 시각이 지났으면 색 변환/복사 없이 grab()으로 건너뜀
+                due = self.due_index(time.perf_counter())
+                if due is not None and index < due:
+                    if not self.cap.grab():
+                        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        if not self.cap.grab():
+                            print(f"⚠️ {self.name} 디코더: 프레임을 읽을 수 없어 중지합니다")
+                            break
+                    index += 1
+                    self.skipped_frames += 1
+                    continue
+                ret, frame = self.cap.read()
+                if not ret:
+                    # 비디오 끝나면 처음으로 돌아가기 (무한 루프)
+                    self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                    ret, frame = self.cap.read()
+                    if not ret:
+                        print(f"⚠️ {self.name} 디코더: 프레임을 읽을 수 없어 중지합니다")
+                        break
+                if self.target_size is not None and frame.shape[:2] != self.target_size:
+                    frame = cv2.resize(frame, (self.target_size[1], self.target_size[0]),
+                                       interpolation=resize_interpolation(frame.shape[:2], self.target_size))
+                # 큐가 가득 차면 소비될 때까지 대기 (중지 요청은 주기적으로 확인)
+                while not self._stop_event.is_set():
+                    try:
+                        self._queue.put((index, frame), timeout=0.1)
+                        self._ready.set()
+                        break
+                    except queue.Full:
+                        continue
+                index += 1
+        except Exception as e:
+            print(f"⚠️ {self.name} 디코더 오류: {e}")
+        finally:
+            try:
+                if self._release is not None:
+                    self._release(self.cap)
+                else:
+                    self.cap.release()
+            except:
+                pass
+    
+    def wait_ready(self, timeout: float = None) -> bool:
+        """첫 프레임이 디코딩될 때까지 기다립니다 (프리롤). 준비되었으면 True."""
+        return self._ready.wait(timeout) and self.is_alive()
+    
+    def get_frame(self, now: float = None):
+        """
+        now 시각에 표시할 프레임을 반환합니다. 표시 시각이 지난 프레임은 버리고 가장 최근 것을 쓰며,
+        다음 프레임이 아직 이르거나 준비되지 않았으면 직전 프레임을 반복합니다 (처음이면 None).
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self._clock_start is None:
+            self._clock_start = now
+        due = self.due_index(now)
+        while True:
+            if self._pending is None:
+                try:
+                    self._pending = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            index, frame = self._pending
+            if index > due and self._last_frame is not None:
+                break  # 아직 표시할 때가 아님: 직전 프레임 반복
+            self._last_frame = frame
+            self.frame_index = index
+            self._pending = None
+        return self._last_frame
+    
+    def stop(self, wait: bool = False):
+        """디코딩 중지를 요청합니다. 캡처 해제는 워커 스레드가 종료하면서 수행합니다."""
+        self._stop_event.set()
+        if wait:
+            self._thread.join(timeout=1.0)
+
+
+class BackgroundCapturePool:
+    """
+    배경 비디오 캡처 풀. 시작 시 배경 비디오들을 미리 열고 첫 프레임을 디코딩한 뒤 처음으로 되감아 두어,
+    배경 전환 시 컨테이너 열기/프로브 없이 바로 디코딩을 시작할 수 있게 합니다.
+    사용이 끝난 캡처는 디코더가 반납하며(되감기 후 재보관), max_open이 있으면 최근 사용한 N개만 열어 둡니다.
+    """
+    
+    def __init__(self, max_open: int = 0):
+        self.max_open = max_open  # 0이면 제한 없음
+        self._caps = OrderedDict()  # path -> (cap, fps), 마지막이 가장 최근 사용
+        self._lock = threading.Lock()
+    
+    def _open(self, path: str):
+        cap = open_video_capture(path)
+        if not cap.isOpened():
+            return None
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        # 첫 프레임을 한 번 디코딩해 디코더를 초기화한 뒤 처음으로 되감기
+        cap.read()
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return cap, (fps if fps > 0 else 30.0)
+    
+    def warm(self, paths):
+        """배경 비디오들을 미리 엽니다 (max_open이 있으면 앞에서부터 N개까지)."""
+        if self.max_open > 0:
+            paths = paths[:self.max_open]
+        opened = 0
+        for path in paths:
+            with self._lock:
+                if path in self._caps:
+                    continue
+            entry = self._open(path)
+            if entry is None:
+                print(f"⚠️ 배경 캡처 풀: 열 수 없음 {path}")
+                continue
+            self._store(path, entry)
+            opened += 1
+        print(f"🎞️ 배경 캡처 풀 준비 완료: {opened}개")
+    
+    def _store(self, path, entry):
+        evicted = []
+        with self._lock:
+            if path in self._caps:
+                # 같은 경로가 이미 보관 중이면 새로 들어온 것은 해제
+                evicted.append(entry[0])
+            else:
+                self._caps[path] = entry
+            self._caps.move_to_end(path)
+            while self.max_open > 0 and len(self._caps) > self.max_open:
+                _, (old_cap, _) = self._caps.popitem(last=False)
+                evicted.append(old_cap)
+        for cap in evicted:
+            cap.release()
+    
+    def acquire(self, path: str):
+        """(cap, fps)를 꺼냅니다. 풀에 없으면 새로 엽니다 (실패 시 None). 꺼낸 캡처는 release()로 반납합니다."""
+        with self._lock:
+            entry = self._caps.pop(path, None)
+        if entry is None:
+            entry = self._open(path)
+        return entry
+    
+    def release_callback(self, path: str, fps: float):
+        """LayerDecoder의 release 인자로 넘길 반납 함수를 만듭니다."""
+        def give_back(cap):
+            try:
+                if not cap.isOpened() or not cap.set(cv2.CAP_PROP_POS_FRAMES, 0):
+                    cap.release()
+                    return
+            except Exception:
+                cap.release()
+                return
+            self._store(path, (cap, fps))
+        return give_back
+    
+    def clear(self):
+        """보관 중인 캡처를 모두 해제합니다."""
+        with self._lock:
+            caps = [cap for cap, _ in self._caps.values()]
+            self._caps.clear()
+        for cap in caps:
+            cap.release()
+
+
+class OverlayLayer:
+    """
+    배경 위에 쌓이는 오버레이 레이어 하나 (캐릭터 등).
+    z가 클수록 앞에 그려지며, 레이어별 불투명도와 불투명도 페이드를 가집니다.
+    프레임 소스는 캐시된 클립(clip) 또는 스트리밍 디코더(decoder) 중 하나입니다.
+    """
+    
+    def __init__(self, name: str, path: str, z: int = 0, opacity: float = 1.0,
+                 clip: CachedOverlayClip = None, decoder: LayerDecoder = None, fps: float = 30.0, fade_in: float = 0.0,
+                 masks: PackedOverlayMasks = None, size=None):
+        self.name = name
+        self.path = path
+        self.z = z
+        self.size = tuple(size) if size else None  # 로드할 때 맞춘 출력 해상도 (h, w)
+        self.conforming = False  # 새 출력 해상도에 맞춘 레이어를 준비 중 (중복 요청 방지)
+        self.clip = clip
+        self.decoder = decoder
+        self.fps = fps
+        self.masks = masks  # 스트리밍 키 클립의 사전 계산 마스크 (있으면 프레임마다 마스크를 만들지 않음)
+        self._masked = (None, None)  # (디코더 프레임, 마스크 적용 결과) - 같은 프레임을 반복할 때 재사용
+        self.opacity = opacity  # 목표 불투명도 (0.0 ~ 1.0), 페이드 중이면 페이드가 끝날 때의 값
+        self.remove_when_faded = False  # 페이드 아웃이 끝나면 스택에서 제거
+        self._clock_start = None  # 캐시된 클립의 프레임 0 표시 시각 (perf_counter)
+        self._fade_from = 0.0
+        self._fade_start = None  # 페이드 시작 시각 (perf_counter), 페이드 중이 아니면 None
+        self._fade_duration = 0.0
+        if fade_in > 0:
+            self.fade_to(opacity, fade_in, start_from=0.0)
+    
+    def fade_to(self, opacity: float, duration: float, remove: bool = False, start_from: float = None):
+        """현재 불투명도에서 opacity까지 duration초 동안 페이드합니다 (remove=True면 끝난 뒤 제거)."""
+        now = time.perf_counter()
+        self._fade_from = self.opacity_at(now) if start_from is None else start_from
+        self.opacity = max(0.0, min(1.0, opacity))
+        self._fade_duration = duration
+        self._fade_start = now if duration > 0 else None
+        self.remove_when_faded = remove
+    
+    def opacity_at(self, now: float) -> float:
+        """now 시각의 불투명도 (페이드 중이면 선형 보간)"""
+        start = self._fade_start
+        if start is None:
+            return self.opacity
+        t = (now - start) / self._fade_duration
+        if t >= 1.0:
+            self._fade_start = None
+            return self.opacity
+        return self._fade_from + (self.opacity - self._fade_from) * max(0.0, t)
+    
+    def adopt_state(self, other: "OverlayLayer"):
+        """
+        같은 클립을 다른 소스로 대신하는 레이어가 이전 레이어의 불투명도/페이드와 재생 위치를 이어받습니다.
+        (스트리밍 디코더는 되감을 수 없으므로 재생 위치는 이 레이어가 캐시된 클립일 때만 이어짐)
+        """
+        self.opacity = other.opacity
+        self._fade_from = other._fade_from
+        self._fade_start = other._fade_start
+        self._fade_duration = other._fade_duration
+        self.remove_when_faded = other.remove_when_faded
+        if self.clip is not None:
+            self._clock_start = other.decoder._clock_start if other.decoder is not None else other._clock_start
+    
+    def is_finished(self, now: float) -> bool:
+        """페이드 아웃이 끝나 스택에서 제거할 레이어인지 여부"""
+        return self.remove_when_faded and self.opacity_at(now) <= 0.0
+    
+    def is_alive(self) -> bool:
+        """재생 가능한 프레임 소스가 있는지 여부"""
+        return self.clip is not None or (self.decoder is not None and self.decoder.is_alive())
+    
+    def next_frame(self, now: float):
+        """
+        now 시각에 표시할 프레임을 가져옵니다.
+        캐시된 클립이면 클립 FPS 기준 경과 시간으로 인덱싱하고, 스트리밍이면 디코더가 PTS로 골라 줍니다.
+        
+        Returns:
+            (frame, alpha, box, src_size) 튜플 또는 None (표시할 프레임 없음)
+        """
+        clip = self.clip
+        if clip is not None:
+            # 캐시된 클립: 디코딩 없이 경과 시간으로 프레임 인덱싱 (늦으면 건너뛰고, 빠르면 반복)
+            if self._clock_start is None:
+                self._clock_start = now
+            idx = int((now - self._clock_start) * clip.fps) % len(clip)
+            if clip.frames[idx] is None:
+                return None  # 이 프레임은 완전히 투명
+            return (clip.frames[idx], clip.alphas[idx], clip.boxes[idx], clip.frame_size)
+        
+        decoder = self.decoder
+        if decoder is None or not decoder.is_alive():
+            # 디코더가 오류로 종료됨 (비디오가 해제되는 중일 수 있음)
+            return None
+        frame = decoder.get_frame(now)
+        if frame is None:
+            return None
+        if self.masks is None or frame.ndim != 3 or frame.shape[2] != 3:
+            return (frame, None, None, None)
+        
+        # 사전 계산 마스크: 박스 영역만 잘라 마스킹 (전체 프레임 그레이 변환/임계값/박스 탐색 생략)
+        if self._masked[0] is frame:
+            return self._masked[1]
+        box, alpha = self.masks.mask(decoder.frame_index, frame.shape[:2])
+        result = None
+        if box is not None:
+            y0, y1, x0, x1 = box
+            roi = frame[y0:y1, x0:x1]
+            result = (cv2.bitwise_and(roi, roi, mask=alpha), alpha, box, frame.shape[:2])
+        self._masked = (frame, result)
+        return result
+    
+    def stop(self):
+        """스트리밍 디코더 중지 (캡처 해제는 디코더 스레드가 수행)"""
+        if self.decoder is not None:
+            self.decoder.stop()
+
+
+# 전역 오버레이 메타데이터 인덱스 및 프레임 캐시
+OVERLAY_METADATA = OverlayMetadataIndex()
+OVERLAY_FRAME_CACHE = OverlayFrameCache(int(OVERLAY_CACHE_BUDGET_MB * 1024 * 1024))
+IDLE_BLACK_FRAME = np.zeros((720, 1280, 3), dtype=np.uint8)  # 비디오가 없을 때 표시할 까만 화면 (한 번만 할당)
+BG_CAPTURE_POOL = BackgroundCapturePool(BG_CAPTURE_POOL_SIZE)
 
 # 비디오 플레이어 (스레드 기반)
+def _is_hangul(ch: str) -> bool:
+    """한글 음절/자모 코드포인트인지 확인합니다."""
+    code = ord(ch)
+    return 0xAC00 <= code <= 0xD7A3 or 0x1100 <= code <= 0x11FF or 0x3130 <= code <= 0x318F
+
+
+class GlyphAtlas:
+    """
+    TTF 글리프 아틀라스.
+    PIL(FreeType)은 (글자, 크기)마다 처음 한 번만 사용해 fill/stroke 비트맵을 래스터화하고,
+    이후 줄 조합은 캐시된 비트맵을 numpy로 복사만 합니다.
+    Mansalva에는 한글 글리프가 없으므로 한글은 fallback 폰트로 래스터화합니다.
+    """
+    
+    def __init__(self, font_path: str, fallback_paths=(), stroke_width: int = 2):
+        self.font_path = font_path
+        self.fallback_path = next((p for p in fallback_paths if p and os.path.exists(p)), None)
+        self.stroke_width = stroke_width
+        self._fonts = {}  # (path, size) -> ImageFont
+        self._glyphs = {}  # (char, size) -> (fill, stroke, left, top, advance)
+        self._lock = threading.Lock()
+        if self.fallback_path is None:
+            print("⚠️ 한글 자막 폰트를 찾을 수 없습니다 (SUBTITLE_KO_FONT 설정 필요) - 한글 줄은 표시되지 않습니다")
+    
+    def supports(self, text: str) -> bool:
+        """텍스트를 그릴 수 있는 폰트가 있는지 확인합니다."""
+        return self.fallback_path is not None or not any(_is_hangul(ch) for ch in text)
+    
+    def _font(self, path, size):
+        key = (path, size)
+        font = self._fonts.get(key)
+        if font is None:
+            try:
+                font = ImageFont.truetype(path, size)
+            except OSError:
+                print(f"⚠️ 폰트 로드 실패: {path} - 기본 폰트 사용")
+                font = ImageFont.load_default(size)
+            self._fonts[key] = font
+        return font
+    
+    def metrics(self, size):
+        """(ascent, descent): 사용할 폰트들 중 가장 큰 값."""
+        paths = [self.font_path] + ([self.fallback_path] if self.fallback_path else [])
+        ascent, descent = 0, 0
+        for path in paths:
+            a, d = self._font(path, size).getmetrics()
+            ascent, descent = max(ascent, a), max(descent, d)
+        return ascent, descent
+    
+    def glyph(self, ch, size):
+        """(fill, stroke, left, top, advance) - left/top은 펜 위치(베이스라인) 기준 오프셋."""
+        key = (ch, size)
+        cached = self._glyphs.get(key)
+        if cached is not None:
+            return cached
+        with self._lock:
+            cached = self._glyphs.get(key)
+            if cached is not None:
+                return cached
+            path = self.fallback_path if (_is_hangul(ch) and self.fallback_path) else self.font_path
+            font = self._font(path, size)
+            sw = self.stroke_width
+            advance = int(round(font.getlength(ch)))
+            left, top, right, bottom = font.getbbox(ch, stroke_width=sw, anchor="ls")
+            gw, gh = right - left, bottom - top
+            if gw <= 0 or gh <= 0:
+                fill = stroke = np.zeros((0, 0), dtype=np.uint8)
+            else:
+                canvas = Image.new("L", (gw, gh), 0)
+                ImageDraw.Draw(canvas).text((-left, -top), ch, font=font, fill=255, anchor="ls",
+                                            stroke_width=sw, stroke_fill=255)
+                stroke = np.asarray(canvas, dtype=np.uint8).copy()
+                canvas = Image.new("L", (gw, gh), 0)
+                ImageDraw.Draw(canvas).text((-left, -top), ch, font=font, fill=255, anchor="ls")
+                fill = np.asarray(canvas, dtype=np.uint8).copy()
+            cached = (fill, stroke, left, top, advance)
+            self._glyphs[key] = cached
+            return cached
+    
+    def measure(self, text, size):
+        """줄의 픽셀 너비 (advance 합)."""
+        return sum(self.glyph(ch, size)[4] for ch in text) + self.stroke_width * 2
+    
+    def render_line(self, text, size):
+        """
+        한 줄을 아틀라스 글리프로 조합합니다.
+        
+        Returns:
+            (fill, stroke) uint8 마스크 (높이 = ascent + descent + stroke 여유)
+        """
+        ascent, descent = self.metrics(size)
+        sw = self.stroke_width
+        height = ascent + descent + sw * 2
+        width = max(1, self.measure(text, size))
+        fill = np.zeros((height, width), dtype=np.uint8)
+        stroke = np.zeros((height, width), dtype=np.uint8)
+        baseline = ascent + sw
+        pen_x = sw
+        for ch in text:
+            g_fill, g_stroke, left, top, advance = self.glyph(ch, size)
+            gh, gw = g_fill.shape
+            if gw:
+                x0, y0 = pen_x + left, baseline + top
+                # 캔버스 밖으로 나가는 부분은 잘라냄
+                cx0, cy0 = max(0, x0), max(0, y0)
+                cx1, cy1 = min(width, x0 + gw), min(height, y0 + gh)
+                if cx1 > cx0 and cy1 > cy0:
+                    src = (slice(cy0 - y0, cy1 - y0), slice(cx0 - x0, cx1 - x0))
+                    dst = (slice(cy0, cy1), slice(cx0, cx1))
+                    np.maximum(fill[dst], g_fill[src], out=fill[dst])
+                    np.maximum(stroke[dst], g_stroke[src], out=stroke[dst])
+            pen_x += advance
+        return fill, stroke
+
+
 class VideoPlayer:
     """OpenCV 기반 비디오 플레이어 (별도 스레드에서 무한 루프 재생)"""
     
     def __init__(self):
         self.current_video_path = None
-        self.video_cap = None
+        self.video_cap = None  # 현재 배경 비디오 캡처 (bg_decoder 스레드가 읽고 해제함)
         self.next_video_path = None
-        self.frame = None
+        self.presenter = FramePresenter()  # 합성 결과를 복사 없이 화면 표시 쪽으로 넘기는 트리플 버퍼
         self.lock = threading.Lock()
         self.running = False
         self.thread = None
@@ -53,90 +1455,83 @@ class VideoPlayer:
         self.is_fading = False  # 페이드 중인지 여부
         self.fade_duration = 0.5  # 페이드 지속 시간 (초)
         self.fade_start_time = None
-        self.overlay_video_cap = None  # 오버레이 비디오 ch1 (캐릭터 움직임)
-        self.overlay_video_path = None  # 오버레이 비디오 ch1 경로
-        self.overlay_video_cap2 = None  # 오버레이 비디오 ch2 (캐릭터 움직임)
-        self.overlay_video_path2 = None  # 오버레이 비디오 ch2 경로
+        self.crossfade_duration = 1.0  # 배경 전환 디졸브 지속 시간 (초)
+        self.bg_decoder = None  # 배경 비디오 디코더 스레드 (video_cap을 소유)
+        self.incoming_decoder = None  # 프리롤이 끝나 디졸브를 기다리는 다음 배경 디코더
+        self.incoming_video_path = None  # 다음 배경 비디오 경로
+        self.incoming_fps = 30.0  # 다음 배경 비디오 FPS
+        self.crossfade_start_time = None  # 디졸브 시작 시각 (perf_counter), 진행 중이 아니면 None
+        self._transition_id = 0  # 배경 전환 요청 번호 (늦게 끝난 프리로드 무시용)
+        self.layers = {}  # 오버레이 레이어 스택: 이름 -> OverlayLayer (z 순서로 합성, ch1/ch2 캐릭터 포함)
+        self._last_composed_layers = []  # 직전에 합성한 레이어 프레임들 (바뀌지 않았으면 합성 생략)
+        self._last_composed_state = None  # 직전 합성의 페이드/디졸브/자막 상태
+        self.output_size = None  # 출력 해상도 (h, w) = 배경 비디오 크기, 오버레이는 로드 시 이 크기에 맞춤
+        self._compositor = FrameCompositor()  # 정수 프리멀티플라이드 알파 합성기 (재생 스레드 전용)
         self.bg_fps = 30.0  # 배경 비디오 FPS (기본값)
-        self.overlay_fps = 30.0  # 오버레이 비디오 ch1 FPS (기본값)
-        self.overlay_fps2 = 30.0  # 오버레이 비디오 ch2 FPS (기본값)
-        self.last_frame_time = None  # 마지막 프레임 표시 시간
-        self.frame_accumulator = 0.0  # 프레임 누적 시간 (드롭 보상용)
+        self.pacer = FramePacer(1.0 / DISPLAY_FPS)  # 틱 시각을 벽시계에 고정하고 드롭/지연을 집계
+        self._wake_event = threading.Event()  # 대기 모드에서 재생 루프를 깨우는 이벤트
+        self._idle_event = threading.Event()  # 재생 루프가 대기 모드로 잠들어 있으면 설정
+        self._idle_state = None  # 대기 화면에 게시한 자막 상태 (바뀌면 한 번 다시 그림)
         self.current_subtitle_text = None  # 현재 자막 텍스트 (예: "toad: Haha")
+        self.current_subtitle_korean = None  # 현재 자막의 한국어 원문 (영어 자막 아래에 표시)
         self.current_subtitle_lock = threading.Lock()  # 자막 정보 보호용 락
         
-        # 폰트 캐시 (성능 최적화)
-        self._subtitle_cache = {}  # (text, width, font_scale) -> lines
-        self._last_frame_size = None  # 마지막 프레임 크기 (폰트 재계산 방지)
+        # 자막 스프라이트 캐시 (성능 최적화, LRU)
+        self._subtitle_sprites = OrderedDict()  # (text, korean, h, w) -> (premul, alpha, y, x) 또는 None
+        self._atlas = None  # TTF 글리프 캐시 (첫 자막을 그릴 때 생성 - import 시 폰트 경고가 나오지 않도록)
+    
+    @property
+    def _glyph_atlas(self) -> GlyphAtlas:
+        if self._atlas is None:
+            self._atlas = GlyphAtlas(SUBTITLE_FONT_PATH, SUBTITLE_HANGUL_FONT_PATHS)
+        return self._atlas
     
     def _play_loop(self):
-        """비디오 재생 루프 (별도 스레드에서 실행)"""
+        """비디오 재생 루프 (별도 스레드에서 실행). 디코딩은 레이어별 LayerDecoder 스레드가 담당하고, 여기서는 합성만 합니다."""
         import time as time_module
+        pacer = self.pacer
         while self.running:
-            loop_start_time = time_module.perf_counter()
+            # 틱 시작 (한 주기 이상 뒤처졌으면 밀린 틱은 합성 없이 드롭하고 현재 시각으로 따라잡음)
+            loop_start_time = pacer.begin_tick()
             
-            # 비디오 전환 처리 (페이드와 독립적으로, 즉시 처리)
-            next_path = None
-            old_cap_to_release = None
+            # 페이드 아웃 (검은 화면) 처리. 다른 비디오로의 전환은 프리로드 스레드가 준비한 뒤 디졸브로 처리
+            old_decoder_to_stop = None
             with self.lock:
                 if self.next_video_path == "":
                     # 페이드 아웃 요청
                     elapsed = time_module.time() - self.fade_start_time if self.fade_start_time else 0
                     if elapsed >= self.fade_duration:
                         # 페이드 아웃 완료: 비디오 해제
-                        if self.video_cap:
-                            old_cap_to_release = self.video_cap
+                        if self.bg_decoder:
+                            old_decoder_to_stop = self.bg_decoder
+                            self.bg_decoder = None
                             self.video_cap = None
                             self.current_video_path = None
                         self.next_video_path = None
                         self.is_fading = False
                         self.fade_alpha = 1.0
                         self.fade_start_time = None
-                elif self.next_video_path is not None:
-                    # 비디오 전환 요청
-                    next_path = self.next_video_path
-                    self.next_video_path = None  # 즉시 클리어하여 중복 처리 방지
             
-            # lock 밖에서 비디오 해제 (페이드 아웃)
-            if old_cap_to_release is not None:
-                try:
-                    if old_cap_to_release.isOpened():
-                        old_cap_to_release.release()
-                except:
-                    pass
+            # lock 밖에서 디코더 중지 (페이드 아웃, 캡처 해제는 디코더 스레드가 수행)
+            if old_decoder_to_stop is not None:
+                old_decoder_to_stop.stop()
             
-            if next_path is not None:
-                # 비디오 전환 즉시 처리
-                old_cap = None
-                with self.lock:
-                    old_cap = self.video_cap
-                    self.video_cap = None  # 먼저 None으로 설정하여 _play_loop가 검은 프레임 표시
-                
-                # lock 밖에서 기존 비디오 해제
-                if old_cap is not None:
-                    try:
-                        if old_cap.isOpened():
-                            old_cap.release()
-                    except:
-                        pass
-                
-                # 새 비디오 열기 (lock 밖에서, 시간이 걸릴 수 있음)
-                new_cap = cv2.VideoCapture(next_path)
-                if new_cap.isOpened():
-                    new_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                    fps = new_cap.get(cv2.CAP_PROP_FPS)
-                    # 비디오가 성공적으로 열린 후에만 경로와 캡처 객체 설정
-                    with self.lock:
-                        self.current_video_path = next_path
-                        self.bg_fps = fps if fps > 0 else 30.0
-                        self.video_cap = new_cap
-                    print(f"🎬 비디오 전환 완료: {os.path.basename(next_path)} (FPS: {self.bg_fps:.2f})")
-                else:
-                    print(f"❌ 비디오를 열 수 없음: {next_path}")
-                    with self.lock:
-                        self.video_cap = None
-                        self.current_video_path = None
-                        self.bg_fps = 30.0
+            # 배경 디졸브 진행도 계산 (다음 배경이 준비되면 시작, 끝나면 다음 배경으로 승격)
+            crossfade_t = None
+            incoming_decoder = None
+            with self.lock:
+                if self.incoming_decoder is not None:
+                    if self.crossfade_start_time is None:
+                        self.crossfade_start_time = time_module.perf_counter()
+                    crossfade_t = (time_module.perf_counter() - self.crossfade_start_time) / self.crossfade_duration
+                    # 현재 배경이 없거나 디코더가 멈췄으면 (대기 모드) 디졸브 없이 바로 승격
+                    if crossfade_t >= 1.0 or self.bg_decoder is None or not self.bg_decoder.is_alive():
+                        old_decoder_to_stop = self._promote_incoming_locked()
+                        crossfade_t = None
+                    else:
+                        incoming_decoder = self.incoming_decoder
+            if old_decoder_to_stop is not None:
+                old_decoder_to_stop.stop()
             
             # 페이드 효과 계산 (시각 효과만)
             fade_alpha = 1.0
@@ -155,536 +1550,403 @@ class VideoPlayer:
                         self.fade_alpha = 1.0
                         self.fade_start_time = None
             
-            # 프레임 읽기 및 처리 (lock 최소화)
+            # 디코더 참조 가져오기 (lock 최소화)
             frame = None
             with self.lock:
-                # 비디오 캡처 객체 참조만 가져오기 (lock 안에서 최소한만)
-                # 오버레이 비디오는 직접 참조하지 않고, 매번 lock 안에서 확인
-                video_cap = self.video_cap
+                bg_decoder = self.bg_decoder
                 self.fade_alpha = fade_alpha
             
-            # 비디오가 없으면 검은 프레임 생성
-            if video_cap is None:
-                # 검은 프레임 생성 (기본 해상도 1280x720)
-                frame = np.zeros((720, 1280, 3), dtype=np.uint8)
-                # 페이드 효과 적용 (페이드 아웃 중이면 검은 화면 유지)
-                if self.is_fading and fade_alpha < 1.0:
-                    # 페이드 아웃 중이면 검은 화면
-                    pass  # 이미 검은 프레임이므로 추가 처리 불필요
-                # 검은 프레임은 오버레이 없이 바로 저장
-                with self.lock:
-                    self.frame = frame
-                # 기본 프레임 간격 설정 (30 FPS)
-                frame_interval = 1.0 / 30.0
-                # 프레임 처리 시간 고려하여 정확한 타이밍으로 재생
-                elapsed = time_module.perf_counter() - loop_start_time
-                sleep_time = max(0, frame_interval - elapsed)
-                if sleep_time > 0:
-                    if sleep_time < 0.001:
-                        time_module.sleep(0)
-                    else:
-                        time_module.sleep(sleep_time)
+            # 비디오가 없거나 디코더가 멈췄으면 검은 프레임 생성
+            if bg_decoder is None or not bg_decoder.is_alive():
+                idle_state = (self.current_subtitle_text, self.current_subtitle_korean)
+                if idle_state != self._idle_state:
+                    # 검은 프레임 (기본 해상도 1280x720)을 백 버퍼에 쓰고, 오버레이 없이 자막만 그려 한 번만 게시
+                    if self._idle_state is None:
+                        print("💤 대기 모드 (마커 대기 중)")
+                    frame = self.presenter.back_buffer((720, 1280, 3))
+                    frame.fill(0)
+                    self._draw_subtitle(frame)
+                    self.presenter.publish()
+                    self._idle_state = idle_state
+                    pacer.end_tick()
+                    continue
+                # 화면이 바뀔 일이 없으면 대기 모드: 비디오/자막 변경이나 중지 요청이 올 때까지 잠듦 (저전력)
+                self._idle_event.set()
+                while self.running and not self._wake_event.wait(timeout=1.0):
+                    pass
+                self._wake_event.clear()
+                self._idle_event.clear()
+                pacer.reset()  # 잠든 동안은 드롭으로 세지 않음
                 continue  # 다음 루프로
+            self._idle_state = None
             
-            # video_cap이 있지만 열려있지 않은 경우도 체크
-            try:
-                is_opened = video_cap.isOpened()
-            except:
-                is_opened = False
+            # 출력 주기는 디스플레이 기준. 각 레이어는 같은 시각(now)에 자기 FPS/PTS에 맞는 프레임을 고름
+            now = loop_start_time
             
-            if not is_opened:
-                # 검은 프레임 생성 (기본 해상도 1280x720)
-                frame = np.zeros((720, 1280, 3), dtype=np.uint8)
-                # 페이드 효과 적용 (페이드 아웃 중이면 검은 화면 유지)
-                if self.is_fading and fade_alpha < 1.0:
-                    # 페이드 아웃 중이면 검은 화면
-                    pass  # 이미 검은 프레임이므로 추가 처리 불필요
-                # 검은 프레임은 오버레이 없이 바로 저장
-                with self.lock:
-                    self.frame = frame
-                # 기본 프레임 간격 설정 (30 FPS)
-                frame_interval = 1.0 / 30.0
-                # 프레임 처리 시간 고려하여 정확한 타이밍으로 재생
-                elapsed = time_module.perf_counter() - loop_start_time
-                sleep_time = max(0, frame_interval - elapsed)
-                if sleep_time > 0:
-                    if sleep_time < 0.001:
-                        time_module.sleep(0)
+            # 디코더 큐에서 지금 표시할 배경 프레임 가져오기 (디코딩을 기다리지 않음)
+            frame = bg_decoder.get_frame(now)
+            incoming_frame = incoming_decoder.get_frame(now) if incoming_decoder is not None else None
+            
+            # 오버레이 레이어 스택을 z 순서(뒤 → 앞)로 샘플링
+            # 페이드/디졸브 중일 때는 오버레이를 표시하지 않음 (배경이 바뀌는 동안 캐릭터가 보이지 않도록)
+            overlays = []
+            layer_stack = self._layer_stack()
+            for layer in layer_stack:
+                if layer.is_finished(now):
+                    self._drop_layer(layer)
+            if not (self.is_fading and fade_alpha < 1.0) and crossfade_t is None:
+                for layer in layer_stack:
+                    opacity = int(round(layer.opacity_at(now) * 255))
+                    if opacity <= 0:
+                        continue
+                    overlay = layer.next_frame(now)
+                    if overlay is not None:
+                        overlays.append((overlay, opacity, layer))
+            
+            if frame is not None:
+                # 모든 레이어가 직전 틱과 같은 프레임/불투명도면 합성을 건너뜀 (디스플레이 주기가 에셋 FPS보다 빠를 때)
+                layers = [frame, incoming_frame] + [overlay[0] for overlay, _, _ in overlays]
+                state = (crossfade_t, fade_alpha if self.is_fading else 1.0,
+                         tuple(opacity for _, opacity, _ in overlays),
+                         self.current_subtitle_text, self.current_subtitle_korean)
+                unchanged = (state == self._last_composed_state and len(layers) == len(self._last_composed_layers)
+                             and all(a is b for a, b in zip(layers, self._last_composed_layers)))
+                if not unchanged:
+                    self._last_composed_layers, self._last_composed_state = layers, state
+                    
+                    # 인덱스에 없던 배경 등으로 출력 해상도가 예상과 다르면 오버레이를 다시 맞춤 (디졸브 중에는 다음 배경 기준)
+                    if incoming_decoder is None and frame.shape[:2] != self.output_size:
+                        self._set_output_size(frame.shape[:2])
+                    
+                    # 배경을 프레젠터의 백 버퍼에 복사 (페이드 효과 또는 다음 배경과의 디졸브 적용)
+                    out = self.presenter.back_buffer(frame.shape)
+                    if incoming_frame is not None:
+                        frame = self._compositor.begin_crossfade(frame, incoming_frame, out, crossfade_t)
                     else:
-                        time_module.sleep(sleep_time)
-                continue  # 다음 루프로
-            else:
-                # 실제 비디오 FPS에 맞춰 프레임 간격 조정 (먼저 계산)
-                with self.lock:
-                    overlay_cap = self.overlay_video_cap
-                    overlay_cap2 = self.overlay_video_cap2
-                
-                # 오버레이가 없을 때는 배경 비디오 FPS만 사용
-                if overlay_cap is None and overlay_cap2 is None:
-                    # 오버레이가 없으면 배경 비디오의 실제 FPS 사용
-                    target_fps = self.bg_fps if self.bg_fps > 0 else 30.0
-                else:
-                    # 오버레이가 있으면 가장 높은 FPS 사용 (동기화를 위해)
-                    target_fps = max(self.bg_fps, 
-                                   self.overlay_fps if overlay_cap and overlay_cap.isOpened() else 0,
-                                   self.overlay_fps2 if overlay_cap2 and overlay_cap2.isOpened() else 0)
-                    if target_fps <= 0:
-                        target_fps = self.bg_fps if self.bg_fps > 0 else 30.0  # 기본값은 배경 비디오 FPS
-                
-                frame_interval = 1.0 / target_fps
-                
-                # lock 밖에서 프레임 읽기 (비디오 I/O는 느릴 수 있음)
-                ret, frame = video_cap.read()
-                if not ret:
-                    # 비디오 끝나면 처음으로 돌아가기 (무한 루프)
-                    with self.lock:
-                        if self.video_cap:
-                            self.video_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    ret, frame = video_cap.read()
-                
-                if ret:
-                    # 페이드 효과 적용
-                    if self.is_fading and fade_alpha < 1.0:
-                        black_frame = frame.copy()
-                        black_frame.fill(0)
-                        frame = cv2.addWeighted(frame, fade_alpha, black_frame, 1.0 - fade_alpha, 0)
+                        frame = self._compositor.begin(frame, out, fade_alpha if self.is_fading else 1.0)
                     
-                    # 페이드 중일 때는 오버레이를 표시하지 않음 (까만 화면에 캐릭터가 보이지 않도록)
-                    if not (self.is_fading and fade_alpha < 1.0):
-                        # 오버레이 비디오 처리 순서: ch2 먼저 (뒤 레이어), ch1 나중 (앞 레이어)
-                        # ch2 오버레이 비디오 처리 (뒤 레이어) - 매번 lock에서 최신 참조 가져오기
-                        overlay_cap2 = None
-                        overlay_ret2 = False
-                        overlay_frame2 = None
-                        
-                        with self.lock:
-                            if self.overlay_video_cap2 is not None:
-                                try:
-                                    # 참조를 가져오고 즉시 유효성 확인 (안전하게)
-                                    cap2_ref = self.overlay_video_cap2
-                                    if cap2_ref is not None:
-                                        try:
-                                            if cap2_ref.isOpened():
-                                                overlay_cap2 = cap2_ref
-                                            else:
-                                                self.overlay_video_cap2 = None
-                                        except:
-                                            # isOpened() 호출 중 오류 (비디오가 해제되는 중일 수 있음)
-                                            self.overlay_video_cap2 = None
-                                except:
-                                    self.overlay_video_cap2 = None
-                        
-                        if overlay_cap2 is not None:
-                            try:
-                                # 비디오 캡처가 여전히 유효한지 확인
-                                try:
-                                    if not overlay_cap2.isOpened():
-                                        overlay_ret2 = False
-                                        overlay_frame2 = None
-                                        with self.lock:
-                                            if self.overlay_video_cap2 == overlay_cap2:
-                                                self.overlay_video_cap2 = None
-                                    else:
-                                        overlay_ret2, overlay_frame2 = overlay_cap2.read()
-                                        if not overlay_ret2:
-                                            try:
-                                                overlay_cap2.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                                                overlay_ret2, overlay_frame2 = overlay_cap2.read()
-                                            except:
-                                                overlay_ret2 = False
-                                                overlay_frame2 = None
-                                except:
-                                    # isOpened() 또는 read() 중 오류 (비디오가 해제되는 중일 수 있음)
-                                    overlay_ret2 = False
-                                    overlay_frame2 = None
-                                    with self.lock:
-                                        if self.overlay_video_cap2 == overlay_cap2:
-                                            self.overlay_video_cap2 = None
-                            except Exception as e:
-                                # 오류 발생 시 안전하게 처리
-                                overlay_ret2 = False
-                                overlay_frame2 = None
-                                with self.lock:
-                                    if self.overlay_video_cap2 == overlay_cap2:
-                                        self.overlay_video_cap2 = None
-                            
-                            if overlay_ret2 and overlay_cap2 is not None and overlay_frame2 is not None:
-                                try:
-                                    # 오버레이 프레임 크기를 배경 프레임 크기에 맞춤
-                                    if overlay_frame2.shape[:2] != frame.shape[:2]:
-                                        overlay_frame2 = cv2.resize(overlay_frame2, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_LINEAR)
-                                    
-                                    # 알파 채널이 있으면 알파 블렌딩, 없으면 일반 오버레이
-                                    if len(overlay_frame2.shape) == 3 and overlay_frame2.shape[2] == 4:
-                                        # RGBA -> BGR 변환
-                                        overlay_bgr2 = overlay_frame2[:, :, :3]
-                                        # 알파 마스크 추출 (uint8)
-                                        alpha2 = overlay_frame2[:, :, 3]
-                                        # 알파가 0이 아닌 영역만 블렌딩 (성능 최적화)
-                                        mask2_alpha = alpha2 > 0
-                                        if np.any(mask2_alpha):
-                                            # 알파를 float로 변환 (0-1 범위)
-                                            alpha2_f = alpha2.astype(np.float32) / 255.0
-                                            alpha_3d2 = alpha2_f[:, :, None]  # np.newaxis 대신 None 사용
-                                            # 알파 블렌딩 (벡터화된 연산)
-                                            frame = (frame.astype(np.float32) * (1 - alpha_3d2) + overlay_bgr2.astype(np.float32) * alpha_3d2).astype(np.uint8)
-                                    elif len(overlay_frame2.shape) == 3:
-                                        # 그레이스케일 마스크 생성 및 블렌딩
-                                        mask2 = cv2.cvtColor(overlay_frame2, cv2.COLOR_BGR2GRAY)
-                                        _, mask2 = cv2.threshold(mask2, 1, 255, cv2.THRESH_BINARY)
-                                        # 마스크가 있는 영역만 오버레이 복사 (더 빠름)
-                                        cv2.copyTo(overlay_frame2, mask2, frame)
-                                except Exception as e:
-                                    print(f"⚠️ ch2 오버레이 처리 중 오류: {e}")
-                        
-                        # ch1 오버레이 비디오 처리 (앞 레이어 - 마지막에 적용하여 항상 앞에 표시)
-                        # 매번 lock에서 최신 참조 가져오기
-                        overlay_cap = None
-                        overlay_ret = False
-                        overlay_frame = None
-                        
-                        with self.lock:
-                            if self.overlay_video_cap is not None:
-                                try:
-                                    # 참조를 가져오고 즉시 유효성 확인 (안전하게)
-                                    cap_ref = self.overlay_video_cap
-                                    if cap_ref is not None:
-                                        try:
-                                            if cap_ref.isOpened():
-                                                overlay_cap = cap_ref
-                                            else:
-                                                self.overlay_video_cap = None
-                                        except:
-                                            # isOpened() 호출 중 오류 (비디오가 해제되는 중일 수 있음)
-                                            self.overlay_video_cap = None
-                                except:
-                                    self.overlay_video_cap = None
-                        
-                        if overlay_cap is not None:
-                            try:
-                                # 비디오 캡처가 여전히 유효한지 확인
-                                try:
-                                    if not overlay_cap.isOpened():
-                                        overlay_ret = False
-                                        overlay_frame = None
-                                        with self.lock:
-                                            if self.overlay_video_cap == overlay_cap:
-                                                self.overlay_video_cap = None
-                                    else:
-                                        overlay_ret, overlay_frame = overlay_cap.read()
-                                        if not overlay_ret:
-                                            try:
-                                                overlay_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                                                overlay_ret, overlay_frame = overlay_cap.read()
-                                            except:
-                                                overlay_ret = False
-                                                overlay_frame = None
-                                except:
-                                    # isOpened() 또는 read() 중 오류 (비디오가 해제되는 중일 수 있음)
-                                    overlay_ret = False
-                                    overlay_frame = None
-                                    with self.lock:
-                                        if self.overlay_video_cap == overlay_cap:
-                                            self.overlay_video_cap = None
-                            except Exception as e:
-                                # 오류 발생 시 안전하게 처리
-                                overlay_ret = False
-                                overlay_frame = None
-                                with self.lock:
-                                    if self.overlay_video_cap == overlay_cap:
-                                        self.overlay_video_cap = None
-                            
-                            if overlay_ret and overlay_cap is not None and overlay_frame is not None:
-                                try:
-                                    # 오버레이 프레임 크기를 배경 프레임 크기에 맞춤
-                                    if overlay_frame.shape[:2] != frame.shape[:2]:
-                                        overlay_frame = cv2.resize(overlay_frame, (frame.shape[1], frame.shape[0]), interpolation=cv2.INTER_LINEAR)
-                                    
-                                    # 알파 채널이 있으면 알파 블렌딩, 없으면 일반 오버레이
-                                    if len(overlay_frame.shape) == 3 and overlay_frame.shape[2] == 4:
-                                        # RGBA -> BGR 변환
-                                        overlay_bgr = overlay_frame[:, :, :3]
-                                        # 알파 마스크 추출 (uint8)
-                                        alpha = overlay_frame[:, :, 3]
-                                        # 알파가 0이 아닌 영역만 블렌딩 (성능 최적화)
-                                        mask = alpha > 0
-                                        if np.any(mask):
-                                            # 알파를 float로 변환 (0-1 범위)
-                                            alpha_f = alpha.astype(np.float32) / 255.0
-                                            alpha_3d = alpha_f[:, :, None]  # np.newaxis 대신 None 사용
-                                            # 알파 블렌딩 (벡터화된 연산) - ch1은 항상 앞 레이어
-                                            frame = (frame.astype(np.float32) * (1 - alpha_3d) + overlay_bgr.astype(np.float32) * alpha_3d).astype(np.uint8)
-                                    elif len(overlay_frame.shape) == 3:
-                                        # 그레이스케일 마스크 생성 및 블렌딩
-                                        mask = cv2.cvtColor(overlay_frame, cv2.COLOR_BGR2GRAY)
-                                        _, mask = cv2.threshold(mask, 1, 255, cv2.THRESH_BINARY)
-                                        # 마스크가 있는 영역만 오버레이 복사 (더 빠름) - ch1은 항상 앞 레이어
-                                        cv2.copyTo(overlay_frame, mask, frame)
-                                except Exception as e:
-                                    print(f"⚠️ ch1 오버레이 처리 중 오류: {e}")
-                            elif overlay_cap is None:
-                                # 디버깅: ch1 오버레이가 None인 경우 (첫 프레임에서만 출력)
-                                pass
+                    # 오버레이 레이어를 z 순서대로 하나씩 합성 (레이어마다 자기 영역만 읽고 씀, blend_layers 참고)
+                    prepared = []
+                    for overlay, opacity, layer in overlays:
+                        item = self._prepare_overlay(*overlay, label=layer.name, layer=layer)
+                        if item is not None:
+                            prepared.append(item + (opacity,))
+                    try:
+                        self._compositor.blend_layers(prepared)
+                    except Exception as e:
+                        print(f"⚠️ 오버레이 레이어 합성 중 오류: {e}")
                     
-                    # 최종 프레임 저장 (lock 안에서)
-                    with self.lock:
-                        self.frame = frame
+                    # 자막을 백 버퍼에 그린 뒤 게시 (제일 위 레이어, 인덱스 교환만)
+                    self._draw_subtitle(frame)
+                    self.presenter.publish()
             
-                # 프레임 처리 시간 고려하여 정확한 타이밍으로 재생 (perf_counter 사용)
-                elapsed = time_module.perf_counter() - loop_start_time
-                sleep_time = max(0, frame_interval - elapsed)
+            # 다음 틱 예정 시각까지 대기 (처리 시간이 길어도 일정이 밀리지 않음) 및 주기적 페이싱 보고
+            pacer.end_tick()
+            pacer.maybe_report(now, sum(d.skipped_frames for d in [bg_decoder, incoming_decoder]
+                                        + [layer.decoder for layer in layer_stack] if d is not None))
+    
+    def _layer_stack(self) -> list:
+        """오버레이 레이어들을 z 순서(뒤 → 앞)로 정렬한 스냅샷"""
+        with self.lock:
+            return sorted(self.layers.values(), key=lambda layer: layer.z)
+    
+    def _drop_layer(self, layer: OverlayLayer):
+        """페이드 아웃이 끝난 레이어를 스택에서 제거합니다 (그 사이 교체되지 않았을 때만)."""
+        with self.lock:
+            if self.layers.get(layer.name) is not layer:
+                return
+            del self.layers[layer.name]
+        layer.stop()
+    
+    def _prepare_overlay(self, overlay_frame, overlay_alpha, box=None, src_size=None, label: str = "",
+                         layer: OverlayLayer = None):
+        """
+        오버레이 한 프레임을 합성용 (premul, alpha, y, x)로 준비합니다.
+        overlay_alpha가 있으면 overlay_frame은 프리멀티플라이드 BGR입니다.
+        box가 있으면 overlay_frame은 src_size 좌표의 box 영역만 잘라낸 프레임이며,
+        없으면 (스트리밍 프레임) 여기서 내용 영역을 찾아 잘라내고 프리멀티플라이합니다.
+        
+        Returns:
+            (premul, alpha, y, x) 또는 None (내용 없음, 출력 해상도와 다름, 오류)
+        """
+        try:
+            if box is None:
+                # 스트리밍 프레임: 내용 영역을 찾아 잘라내기
+                src_size = overlay_frame.shape[:2]
+                if overlay_frame.ndim == 3 and overlay_frame.shape[2] == 4:
+                    box = content_bbox(overlay_frame[:, :, 3])
+                    if box is None:
+                        return None
+                    y0, y1, x0, x1 = box
+                    overlay_frame, overlay_alpha = premultiply_bgra(overlay_frame[y0:y1, x0:x1])
+                else:
+                    # 알파 없는 BGR: 키 마스크를 알파로 사용 (마스크 밖을 0으로 만들면 프리멀티플라이드와 같음)
+                    full_mask = overlay_key_mask(overlay_frame)
+                    box = content_bbox(full_mask)
+                    if box is None:
+                        return None
+                    y0, y1, x0, x1 = box
+                    overlay_alpha = np.ascontiguousarray(full_mask[y0:y1, x0:x1])
+                    roi = overlay_frame[y0:y1, x0:x1]
+                    overlay_frame = cv2.bitwise_and(roi, roi, mask=overlay_alpha)
             
-            # 프레임 드롭 보상: 처리 시간이 프레임 간격보다 길면 다음 프레임을 즉시 읽기
-            if elapsed > frame_interval * 1.5:
-                # 프레임이 너무 늦으면 누적 시간 초기화하고 계속 진행
-                self.frame_accumulator = 0.0
-                # 다음 프레임을 즉시 읽기 위해 sleep 건너뛰기
-            else:
-                # 정상적인 경우 sleep
-                if sleep_time > 0:
-                    # 작은 sleep 시간은 더 정확하게 처리
-                    if sleep_time < 0.001:
-                        time_module.sleep(0)  # yield to other threads
-                    else:
-                        time_module.sleep(sleep_time)
+            # 오버레이는 로드 시 출력 해상도에 맞춰 두므로 여기서는 리사이즈하지 않음.
+            # 크기가 다르면 이 프레임은 건너뛰고, 레이어를 현재 출력 해상도에 맞춰 다시 준비 (이미 준비 중이면 무시)
+            if tuple(src_size) != self._compositor.out.shape[:2]:
+                if layer is not None:
+                    self._request_conform(layer)
+                return None
+            return (overlay_frame, overlay_alpha, box[0], box[2])
+        except Exception as e:
+            print(f"⚠️ {label} 오버레이 처리 중 오류: {e}")
+            return None
     
     def start(self):
         """플레이어 시작"""
         if not self.running:
             self.running = True
+            # 합성 백엔드는 재생 전에 실제 에셋 크기 비율로 한 번 측정 (재생 중 CPU를 두고 경쟁하지 않도록)
+            self._compositor.backend = calibrate_compositor_backend(*self._calibration_sizes())
             self.thread = threading.Thread(target=self._play_loop, daemon=True)
             self.thread.start()
     
-    def set_overlay_video(self, overlay_path: str):
-        """오버레이 비디오 ch1 설정 (배경 위에 표시될 캐릭터 움직임)"""
-        # 기존 오버레이 비디오 해제 (lock 밖에서 먼저 해제)
-        old_cap = None
+    def _calibration_sizes(self):
+        """
+        백엔드 측정에 쓸 실제 에셋 크기 (출력 크기, 오버레이 크기) - 알 수 없으면 None (기본 비율).
+        출력은 첫 배경 비디오의 크기, 오버레이는 에셋 인덱스에 기록된 캐릭터 클립 내용 영역 중
+        가장 큰 것을 출력 해상도로 환산한 크기입니다.
+        """
+        size = None
+        for name in BOOK_TO_VIDEO.values():
+            size = video_frame_size(os.path.join(BG_VIDEO_DIR, name))
+            if size is not None:
+                break
+        if size is None:
+            return None, None
+        overlay_size = None
+        for _, entry in ASSET_INDEX.entries_in(INTERACTIONS_DIR):
+            extent, extent_size = entry.get("extent"), entry.get("extent_size")
+            if not extent or not extent_size:
+                continue
+            scale = size[0] / extent_size[0]
+            candidate = (int((extent[1] - extent[0]) * scale), int((extent[3] - extent[2]) * scale))
+            if overlay_size is None or candidate[0] * candidate[1] > overlay_size[0] * overlay_size[1]:
+                overlay_size = candidate
+        return size, overlay_size
+    
+    def _swap_layer(self, name: str, layer: OverlayLayer = None) -> OverlayLayer:
+        """이름의 레이어를 교체(layer가 None이면 제거)하고 이전 레이어를 반환합니다 (lock 안에서 교체)."""
         with self.lock:
-            old_cap = self.overlay_video_cap
-            self.overlay_video_cap = None  # 먼저 None으로 설정하여 재생 루프에서 사용하지 않도록
-            self.overlay_video_path = None
-        
-        # lock 밖에서 해제 (재생 루프와의 충돌 방지)
-        # 짧은 대기로 재생 루프가 참조를 놓도록 함
-        import time
-        time.sleep(0.1)  # 재생 루프가 현재 프레임 처리를 완료할 시간 제공
+            old_layer = self.layers.pop(name, None)
+            if layer is not None:
+                self.layers[name] = layer
+        return old_layer
+    
+    def _replace_layer(self, name: str, expected: OverlayLayer, layer: OverlayLayer) -> bool:
+        """이름의 레이어가 아직 expected일 때만 layer로 교체합니다 (그 사이 다른 레이어로 바뀌었으면 False)."""
+        with self.lock:
+            if self.layers.get(name) is not expected:
+                return False
+            self.layers[name] = layer
+        expected.stop()
+        return True
+    
+    def _open_layer(self, name: str, path: str, z: int, opacity: float, fade_in: float, target_size):
+        """
+        target_size에 맞춘 레이어를 준비합니다 (스택에는 넣지 않음).
+        캐시(또는 프레임 스토어)에 클립이 있으면 바로 사용하고, 없으면 디코더 스레드로 스트리밍을 시작해
+        첫 프레임이 나올 때까지 기다린 뒤 반환하며, 캐시는 백그라운드에서 채웁니다 (전체 디코딩을 기다리지 않음).
         
-        if old_cap is not None:
-            try:
-                # 안전하게 해제
-                if hasattr(old_cap, 'isOpened'):
-                    try:
-                        if old_cap.isOpened():
-                            old_cap.release()
-                    except:
-                        pass  # 이미 해제되었거나 오류 발생
-                else:
-                    try:
-                        old_cap.release()
-                    except:
-                        pass
-            except:
-                pass  # 해제 중 오류는 무시
-            finally:
-                old_cap = None
+        Returns:
+            OverlayLayer 또는 None (열 수 없음)
+        """
+        clip = OVERLAY_FRAME_CACHE.get(path, target_size, decode=False)
+        if clip is not None:
+            print(f"🎬 오버레이 비디오 {name} 준비 완료 (캐시): {path} (FPS: {clip.fps:.2f}, {len(clip)}프레임)")
+            return OverlayLayer(name, path, z, opacity, clip=clip, fps=clip.fps, fade_in=fade_in, size=target_size)
         
-        if overlay_path and os.path.exists(overlay_path):
-            with self.lock:
-                self.overlay_video_path = overlay_path
-                self.overlay_video_cap = cv2.VideoCapture(overlay_path)
-                if not self.overlay_video_cap.isOpened():
-                    print(f"❌ 오버레이 비디오를 열 수 없음: {overlay_path}")
-                    self.overlay_video_cap = None
-                    self.overlay_video_path = None
-                    self.overlay_fps = 30.0  # 기본값
-                else:
-                    # 비디오 캡처 최적화 설정
-                    self.overlay_video_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                    # 비디오를 처음부터 재생하도록 설정
-                    self.overlay_video_cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    # FPS 정보를 ffprobe로 먼저 시도
-                    try:
-                        probe_cmd = [
-                            "ffprobe", "-v", "error", "-select_streams", "v:0",
-                            "-show_entries", "stream=r_frame_rate",
-                            "-of", "default=noprint_wrappers=1:nokey=1",
-                            overlay_path
-                        ]
-                        result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=2)
-                        if result.returncode == 0:
-                            fps_str = result.stdout.strip()
-                            if '/' in fps_str:
-                                num, den = map(int, fps_str.split('/'))
-                                self.overlay_fps = num / den if den > 0 else 30.0
-                            else:
-                                self.overlay_fps = float(fps_str) if fps_str else 30.0
-                        else:
-                            fps = self.overlay_video_cap.get(cv2.CAP_PROP_FPS)
-                            self.overlay_fps = fps if fps > 0 else 30.0
-                    except:
-                        fps = self.overlay_video_cap.get(cv2.CAP_PROP_FPS)
-                        self.overlay_fps = fps if fps > 0 else 30.0
-                    print(f"🎬 오버레이 비디오 ch1 설정 완료: {overlay_path} (FPS: {self.overlay_fps:.2f}, 열림: {self.overlay_video_cap.isOpened()})")
-        else:
-            with self.lock:
-                self.overlay_video_cap = None
-                self.overlay_video_path = None
+        cap = open_video_capture(path)
+        if not cap.isOpened():
+            print(f"❌ 오버레이 비디오 {name}를 열 수 없음: {path}")
+            return None
+        # 비디오 캡처 최적화 설정
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # 비디오를 처음부터 재생하도록 설정
+        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        # FPS 정보를 ffprobe로 먼저 시도
+        fps = probe_video_fps(path, cap)
+        masks = PackedOverlayMasks.load(path)
+        decoder = LayerDecoder(cap, name, target_size=target_size, fps=fps).start()
+        if not decoder.wait_ready(OVERLAY_READY_TIMEOUT):
+            print(f"❌ 오버레이 비디오 {name}의 첫 프레임을 디코딩할 수 없음: {path}")
+            decoder.stop()
+            return None
+        layer = OverlayLayer(name, path, z, opacity, decoder=decoder, fps=fps, fade_in=fade_in, masks=masks,
+                             size=target_size)
+        threading.Thread(target=self._cache_layer, args=(layer,), name=f"overlay-cache-{name}", daemon=True).start()
+        print(f"🎬 오버레이 비디오 {name} 준비 완료 (스트리밍, 캐시는 백그라운드): {path} "
+              f"(FPS: {fps:.2f}{', 사전 계산 마스크' if masks else ''})")
+        return layer
     
-    def set_overlay_video2(self, overlay_path: str):
-        """오버레이 비디오 ch2 설정 (배경 위에 표시될 캐릭터 움직임)"""
-        # 기존 오버레이 비디오 ch2 해제 (lock 밖에서 먼저 해제)
-        old_cap2 = None
+    def _cache_layer(self, layer: OverlayLayer):
+        """스트리밍 레이어의 클립을 캐시에 채우고, 그 레이어가 아직 재생 중이면 캐시된 클립으로 교체합니다."""
+        clip = OVERLAY_FRAME_CACHE.get(layer.path, layer.size)
+        if clip is None:
+            return  # 캐시 예산보다 큰 클립은 계속 스트리밍
+        cached = OverlayLayer(layer.name, layer.path, layer.z, clip=clip, fps=clip.fps, size=layer.size)
+        cached.adopt_state(layer)
+        if self._replace_layer(layer.name, layer, cached):
+            print(f"🎬 오버레이 비디오 {layer.name}: 스트리밍 → 캐시된 클립으로 전환")
+    
+    def _request_conform(self, layer: OverlayLayer):
+        """레이어를 현재 출력 해상도에 맞춘 버전으로 교체하도록 요청합니다 (레이어당 한 번, 별도 스레드)."""
+        with self.lock:
+            if layer.conforming or layer.remove_when_faded or self.layers.get(layer.name) is not layer:
+                return
+            layer.conforming = True
+        threading.Thread(target=self._conform_layer, args=(layer,), name=f"overlay-conform-{layer.name}",
+                         daemon=True).start()
+    
+    def _conform_layer(self, layer: OverlayLayer):
+        """
+        레이어를 현재 출력 해상도로 다시 준비해, 그동안 레이어가 교체되지 않았을 때만 바꿔 넣습니다
+        (핸들러가 그 사이 새 캐릭터를 설정했으면 이전 클립으로 덮어쓰지 않음).
+        """
+        with self.lock:
+            target_size = self.output_size
+        if layer.size == target_size:
+            layer.conforming = False
+            return
+        conformed = self._open_layer(layer.name, layer.path, layer.z, layer.opacity, 0.0, target_size)
+        if conformed is None:
+            return
+        conformed.adopt_state(layer)
+        if not self._replace_layer(layer.name, layer, conformed):
+            conformed.stop()
+            return
+        # 준비하는 동안 해상도가 또 바뀌었으면 다시 맞춤
         with self.lock:
-            old_cap2 = self.overlay_video_cap2
-            self.overlay_video_cap2 = None  # 먼저 None으로 설정하여 재생 루프에서 사용하지 않도록
-            self.overlay_video_path2 = None
+            stale = self.output_size != target_size
+        if stale:
+            self._request_conform(conformed)
+    
+    def set_layer(self, name: str, path: str, z: int = 0, opacity: float = 1.0, fade_in: float = 0.0):
+        """
+        오버레이 레이어 설정 (같은 이름의 레이어는 교체). path가 없으면 레이어를 제거합니다.
+        새 레이어가 첫 프레임을 낼 수 있게 된 뒤에 교체하므로 이전 레이어가 그동안 계속 표시됩니다.
         
-        # lock 밖에서 해제 (재생 루프와의 충돌 방지)
-        # 짧은 대기로 재생 루프가 참조를 놓도록 함
-        import time
-        time.sleep(0.1)  # 재생 루프가 현재 프레임 처리를 완료할 시간 제공
+        Args:
+            name: 레이어 이름 (예: "ch1")
+            path: 오버레이 비디오 경로
+            z: z-order (클수록 앞에 그려짐)
+            opacity: 레이어 불투명도 (0.0 ~ 1.0)
+            fade_in: 0에서 opacity까지 페이드 인할 시간 (초)
+        """
+        layer = None
+        target_size = None
+        if path and ASSET_INDEX.exists(path):
+            with self.lock:
+                target_size = self.output_size
+            layer = self._open_layer(name, path, z, opacity, fade_in, target_size)
         
-        if old_cap2 is not None:
-            try:
-                # 안전하게 해제
-                if hasattr(old_cap2, 'isOpened'):
-                    try:
-                        if old_cap2.isOpened():
-                            old_cap2.release()
-                    except:
-                        pass  # 이미 해제되었거나 오류 발생
-                else:
-                    try:
-                        old_cap2.release()
-                    except:
-                        pass
-            except:
-                pass  # 해제 중 오류는 무시
-            finally:
-                old_cap2 = None
+        # 준비된 레이어로 교체 (실패했거나 path가 없으면 제거) 후 lock 밖에서 이전 디코더 중지
+        old_layer = self._swap_layer(name, layer)
+        if old_layer is not None:
+            old_layer.stop()
+        if layer is None:
+            return
         
-        if overlay_path and os.path.exists(overlay_path):
-            with self.lock:
-                self.overlay_video_path2 = overlay_path
-                self.overlay_video_cap2 = cv2.VideoCapture(overlay_path)
-                if not self.overlay_video_cap2.isOpened():
-                    print(f"❌ 오버레이 비디오 ch2를 열 수 없음: {overlay_path}")
-                    self.overlay_video_cap2 = None
-                    self.overlay_video_path2 = None
-                    self.overlay_fps2 = 30.0  # 기본값
-                else:
-                    # 비디오 캡처 최적화 설정
-                    self.overlay_video_cap2.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                    # 비디오를 처음부터 재생하도록 설정
-                    self.overlay_video_cap2.set(cv2.CAP_PROP_POS_FRAMES, 0)
-                    # FPS 정보를 ffprobe로 먼저 시도
-                    try:
-                        probe_cmd = [
-                            "ffprobe", "-v", "error", "-select_streams", "v:0",
-                            "-show_entries", "stream=r_frame_rate",
-                            "-of", "default=noprint_wrappers=1:nokey=1",
-                            overlay_path
-                        ]
-                        result = subprocess.run(probe_cmd, capture_output=True, text=True, timeout=2)
-                        if result.returncode == 0:
-                            fps_str = result.stdout.strip()
-                            if '/' in fps_str:
-                                num, den = map(int, fps_str.split('/'))
-                                self.overlay_fps2 = num / den if den > 0 else 30.0
-                            else:
-                                self.overlay_fps2 = float(fps_str) if fps_str else 30.0
-                        else:
-                            fps = self.overlay_video_cap2.get(cv2.CAP_PROP_FPS)
-                            self.overlay_fps2 = fps if fps > 0 else 30.0
-                    except:
-                        fps = self.overlay_video_cap2.get(cv2.CAP_PROP_FPS)
-                        self.overlay_fps2 = fps if fps > 0 else 30.0
-                    print(f"🎬 오버레이 비디오 ch2 설정 완료: {overlay_path} (FPS: {self.overlay_fps2:.2f}, 열림: {self.overlay_video_cap2.isOpened()})")
-        else:
+        # 준비하는 동안 출력 해상도가 바뀌었으면 새 해상도로 다시 맞춤
+        with self.lock:
+            stale = self.output_size != target_size
+        if stale:
+            self._request_conform(layer)
+    
+    def remove_layer(self, name: str, fade_out: float = 0.0):
+        """오버레이 레이어 제거 (fade_out초 동안 페이드 아웃한 뒤 제거)"""
+        if fade_out > 0:
             with self.lock:
-                self.overlay_video_cap2 = None
-                self.overlay_video_path2 = None
+                layer = self.layers.get(name)
+                if layer is not None:
+                    layer.fade_to(0.0, fade_out, remove=True)
+            return
+        old_layer = self._swap_layer(name)
+        if old_layer is not None:
+            old_layer.stop()
+    
+    def set_layer_opacity(self, name: str, opacity: float, duration: float = 0.0):
+        """오버레이 레이어의 불투명도 변경 (duration초 동안 페이드)"""
+        with self.lock:
+            layer = self.layers.get(name)
+            if layer is not None:
+                layer.fade_to(opacity, duration)
+    
+    def has_layer(self, name: str) -> bool:
+        """해당 이름의 재생 가능한 오버레이 레이어가 있는지 확인"""
+        with self.lock:
+            layer = self.layers.get(name)
+        return layer is not None and layer.is_alive()
+    
+    def set_overlay_video(self, overlay_path: str):
+        """오버레이 비디오 ch1 설정 (배경 위에 표시될 캐릭터 움직임)"""
+        self.set_layer("ch1", overlay_path, z=OVERLAY_LAYER_Z["ch1"])
+    
+    def set_overlay_video2(self, overlay_path: str):
+        """오버레이 비디오 ch2 설정 (배경 위에 표시될 캐릭터 움직임)"""
+        self.set_layer("ch2", overlay_path, z=OVERLAY_LAYER_Z["ch2"])
     
     def clear_overlay_video(self):
-        """오버레이 비디오 모두 제거"""
-        # 기존 오버레이 비디오 해제 (lock 밖에서 먼저 해제)
-        old_cap = None
-        old_cap2 = None
+        """오버레이 비디오 (모든 레이어) 제거"""
         with self.lock:
-            old_cap = self.overlay_video_cap
-            old_cap2 = self.overlay_video_cap2
-            self.overlay_video_cap = None  # 먼저 None으로 설정하여 재생 루프에서 사용하지 않도록
-            self.overlay_video_cap2 = None
-            self.overlay_video_path = None
-            self.overlay_video_path2 = None
-        
-        # lock 밖에서 해제 (재생 루프와의 충돌 방지)
-        import time
-        time.sleep(0.1)  # 재생 루프가 현재 프레임 처리를 완료할 시간 제공
-        
-        if old_cap is not None:
-            try:
-                if hasattr(old_cap, 'isOpened'):
-                    try:
-                        if old_cap.isOpened():
-                            old_cap.release()
-                    except:
-                        pass
-                else:
-                    try:
-                        old_cap.release()
-                    except:
-                        pass
-            except:
-                pass
-            finally:
-                old_cap = None
-        
-        if old_cap2 is not None:
-            try:
-                if hasattr(old_cap2, 'isOpened'):
-                    try:
-                        if old_cap2.isOpened():
-                            old_cap2.release()
-                    except:
-                        pass
-                else:
-                    try:
-                        old_cap2.release()
-                    except:
-                        pass
-            except:
-                pass
-            finally:
-                old_cap2 = None
-        
+            old_layers = list(self.layers.values())
+            self.layers.clear()
+        # lock 밖에서 디코더 중지 (캡처 해제는 디코더 스레드가 수행)
+        for layer in old_layers:
+            layer.stop()
         print("🎬 오버레이 비디오 모두 제거")
     
+    def has_overlay(self, channel: int = 1) -> bool:
+        """해당 채널(1 또는 2)에 재생 가능한 오버레이가 설정되어 있는지 확인"""
+        return self.has_layer(f"ch{channel}")
+    
+    def is_idle(self) -> bool:
+        """재생 루프가 대기 모드 (검은 화면, 변화 없음)로 잠들어 있는지 여부"""
+        return self._idle_event.is_set()
+    
+    def wake(self):
+        """대기 모드의 재생 루프를 깨웁니다."""
+        self._wake_event.set()
+    
     def stop(self):
         """플레이어 중지"""
         self.running = False
+        self.wake()
         if self.thread:
             self.thread.join(timeout=1.0)
         with self.lock:
-            if self.video_cap:
-                self.video_cap.release()
-                self.video_cap = None
-            if self.overlay_video_cap:
-                self.overlay_video_cap.release()
-                self.overlay_video_cap = None
-            if self.overlay_video_cap2:
-                self.overlay_video_cap2.release()
-                self.overlay_video_cap2 = None
-            self.frame = None
+            decoders = [self.bg_decoder, self._take_incoming_locked()]
+            decoders += [layer.decoder for layer in self.layers.values()]
+            self.bg_decoder = None
+            self.video_cap = None
+            self.layers.clear()
+        self.presenter.clear()
+        for decoder in decoders:
+            if decoder is not None:
+                decoder.stop()
     
     def set_video(self, video_path: str):
-        """비디오 파일 변경 (페이드 효과와 함께 부드러운 전환). None을 전달하면 페이드 아웃 (검은 화면)"""
+        """비디오 파일 변경 (다음 비디오를 미리 열어 현재 비디오와 디졸브 전환). None을 전달하면 페이드 아웃 (검은 화면)"""
         if video_path is None:
-            # None이면 페이드 아웃 (검은 화면)
+            # None이면 페이드 아웃 (검은 화면), 준비 중인 다음 배경은 취소
             with self.lock:
                 self.next_video_path = ""  # 빈 문자열로 페이드 아웃 표시
                 self.is_fading = True
                 self.fade_start_time = time.time()
+                self._transition_id += 1
+                incoming = self._take_incoming_locked()
+            if incoming is not None:
+                incoming.stop()
+            self.wake()
             return
         
         # 첫 번째 비디오인지 확인
@@ -692,15 +1954,17 @@ class VideoPlayer:
             is_first = (self.current_video_path is None)
         
         if is_first:
-            # 첫 번째 비디오는 페이드 없이 바로 시작
-            new_cap = cv2.VideoCapture(video_path)
-            if new_cap.isOpened():
-                new_cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                fps = new_cap.get(cv2.CAP_PROP_FPS)
+            # 첫 번째 비디오는 페이드 없이 바로 시작 (캡처 풀에 열려 있으면 그대로 사용)
+            entry = BG_CAPTURE_POOL.acquire(video_path)
+            if entry is not None:
+                new_cap, fps = entry
+                self._set_output_size(video_frame_size(video_path, new_cap))
                 with self.lock:
                     self.current_video_path = video_path
-                    self.bg_fps = fps if fps > 0 else 30.0
+                    self.bg_fps = fps
                     self.video_cap = new_cap
+                    self.bg_decoder = LayerDecoder(new_cap, "bg", release=BG_CAPTURE_POOL.release_callback(video_path, fps), fps=fps).start()
+                self.wake()  # 대기 모드였으면 재생 루프 깨우기
                 print(f"🎬 첫 비디오 시작: {os.path.basename(video_path)} (FPS: {self.bg_fps:.2f})")
             else:
                 print(f"❌ 비디오를 열 수 없음: {video_path}")
@@ -708,38 +1972,115 @@ class VideoPlayer:
                     self.video_cap = None
                     self.bg_fps = 30.0
         else:
-            # 다음 비디오로 전환 (페이드 효과)
+            # 다음 비디오로 전환: 별도 스레드에서 열고 프리롤한 뒤 현재 배경과 디졸브 (재생 루프는 멈추지 않음)
             with self.lock:
                 self.next_video_path = video_path
-                self.is_fading = True
-                self.fade_start_time = time.time()
+                self._transition_id += 1
+                transition_id = self._transition_id
+            threading.Thread(target=self._preload_video, args=(video_path, transition_id),
+                             name="bg-preload", daemon=True).start()
+            self.wake()
+    
+    def _preload_video(self, video_path: str, transition_id: int):
+        """다음 배경 비디오를 (캡처 풀에서) 가져와 첫 프레임까지 디코딩해 둡니다 (프리로드 스레드)."""
+        entry = BG_CAPTURE_POOL.acquire(video_path)
+        if entry is None:
+            print(f"❌ 비디오를 열 수 없음: {video_path}")
+            with self.lock:
+                if self._transition_id == transition_id:
+                    self.next_video_path = None
+            return
+        new_cap, fps = entry
+        frame_size = video_frame_size(video_path, new_cap)
+        decoder = LayerDecoder(new_cap, "bg-next", release=BG_CAPTURE_POOL.release_callback(video_path, fps), fps=fps).start()
+        if not decoder.wait_ready(timeout=5.0):
+            print(f"❌ 비디오 프리롤 실패: {video_path}")
+            decoder.stop()
+            with self.lock:
+                if self._transition_id == transition_id:
+                    self.next_video_path = None
+            return
+        
+        replaced = None
+        with self.lock:
+            if self._transition_id != transition_id or not self.running:
+                # 그 사이 다른 전환/페이드 아웃이 요청됨: 준비한 디코더 폐기
+                replaced = decoder
+            else:
+                replaced = self._take_incoming_locked()
+                self.incoming_decoder = decoder
+                self.incoming_video_path = video_path
+                self.incoming_fps = fps
+        if replaced is not decoder:
+            self.wake()  # 대기 모드였으면 재생 루프를 깨워 디졸브/승격 진행
+        if replaced is not None:
+            replaced.stop()
+        if replaced is not decoder:
+            # 디졸브 동안은 오버레이를 숨기므로, 그 사이 오버레이를 새 해상도에 맞춰 둠
+            self._set_output_size(frame_size)
+    
+    def _set_output_size(self, size):
+        """출력 해상도를 갱신하고, 바뀌었으면 현재 오버레이를 새 해상도에 맞춰 다시 로드합니다 (별도 스레드)."""
+        if size is None:
+            return
+        size = tuple(size)
+        with self.lock:
+            if self.output_size == size:
+                return
+            self.output_size = size
+        self._conform_overlays()
+    
+    def _conform_overlays(self):
+        """현재 설정된 오버레이들을 출력 해상도에 맞춘 버전으로 교체하도록 요청합니다."""
+        with self.lock:
+            layers = list(self.layers.values())
+        for layer in layers:
+            self._request_conform(layer)
+    
+    def _take_incoming_locked(self):
+        """준비된 다음 배경을 떼어내 반환합니다 (self.lock 보유 상태에서 호출)."""
+        incoming = self.incoming_decoder
+        self.incoming_decoder = None
+        self.incoming_video_path = None
+        self.crossfade_start_time = None
+        return incoming
+    
+    def _promote_incoming_locked(self):
+        """디졸브가 끝난 다음 배경을 현재 배경으로 올리고, 기존 배경 디코더를 반환합니다 (self.lock 보유 상태에서 호출)."""
+        old_decoder = self.bg_decoder
+        path = self.incoming_video_path
+        self.bg_fps = self.incoming_fps
+        self.bg_decoder = self._take_incoming_locked()
+        self.video_cap = self.bg_decoder.cap
+        self.current_video_path = path
+        if self.next_video_path == path:
+            self.next_video_path = None
+        print(f"🎬 비디오 전환 완료: {os.path.basename(path)} (FPS: {self.bg_fps:.2f})")
+        return old_decoder
     
-    def set_subtitle(self, subtitle_text: str):
-        """자막 텍스트를 설정합니다."""
+    def set_subtitle(self, subtitle_text: str, korean_text: str = None):
+        """자막 텍스트를 설정합니다. korean_text가 있으면 영어 자막 아래에 한국어 원문을 함께 표시합니다."""
         with self.current_subtitle_lock:
             self.current_subtitle_text = subtitle_text
+            self.current_subtitle_korean = korean_text if SUBTITLE_SHOW_KOREAN else None
+        self.wake()
     
     def clear_subtitle(self):
         """자막을 지웁니다."""
         with self.current_subtitle_lock:
             self.current_subtitle_text = None
+            self.current_subtitle_korean = None
+        self.wake()
     
-    def _wrap_text_cv2(self, text, font_scale, thickness, max_width):
-        """OpenCV를 사용하여 텍스트를 화면 너비에 맞게 줄바꿈 (캐시 사용)."""
-        cache_key = (text, max_width, font_scale)
-        if cache_key in self._subtitle_cache:
-            return self._subtitle_cache[cache_key]
-        
-        font = cv2.FONT_HERSHEY_SIMPLEX
+    def _wrap_text(self, text, font_px, max_width, max_lines=2):
+        """글리프 아틀라스 너비 기준으로 텍스트를 화면 너비에 맞게 줄바꿈 (스프라이트를 만들 때만 호출)."""
         words = text.split()
         lines = []
         current_line = ""
         
         for word in words:
             test_line = current_line + (" " if current_line else "") + word
-            (text_width, text_height), baseline = cv2.getTextSize(test_line, font, font_scale, thickness)
-            
-            if text_width <= max_width:
+            if self._glyph_atlas.measure(test_line, font_px) <= max_width:
                 current_line = test_line
             else:
                 if current_line:
@@ -751,91 +2092,104 @@ class VideoPlayer:
         
         if len(lines) == 0:
             lines = [text]
-        elif len(lines) > 2:
-            lines = lines[:2]
+        elif len(lines) > max_lines:
+            lines = lines[:max_lines]
         
-        self._subtitle_cache[cache_key] = lines
         return lines
     
+    def _render_subtitle_sprite(self, subtitle_text, korean_text, h, w):
+        """
+        자막을 한 번만 렌더링하여 프리멀티플라이드 스프라이트로 만듭니다.
+        영어 줄 아래에 한국어 줄(있으면)을 붙이고, 글자는 GlyphAtlas의 캐시된 글리프로 조합합니다.
+        
+        Returns:
+            (premul_bgr, alpha, y, x) 튜플 (프레임 좌표의 내용 영역만), 그릴 내용이 없으면 None
+        """
+        font_px = max(12, int(h / 720.0 * 34))  # 720p 기준으로 스케일링
+        korean_px = max(12, int(font_px * 0.85))
+        max_width = int(w * 0.9)
+        
+        # (줄 텍스트, 폰트 크기) 목록: 영어 최대 2줄 + 한국어 최대 2줄
+        entries = [(line, font_px) for line in self._wrap_text(subtitle_text, font_px, max_width)]
+        if korean_text and self._glyph_atlas.supports(korean_text):
+            entries += [(line, korean_px) for line in self._wrap_text(korean_text, korean_px, max_width)]
+        
+        rendered = [self._glyph_atlas.render_line(line, px) for line, px in entries]
+        line_spacing = int(font_px * 0.1)
+        total_height = sum(fill.shape[0] for fill, _ in rendered) + (len(rendered) - 1) * line_spacing
+        
+        # 하단 자막 영역만 캔버스로 사용
+        strip_top = max(0, h - 64 - total_height)
+        strip_h = h - strip_top
+        color = np.zeros((strip_h, w, 3), dtype=np.uint8)  # 검은 바탕에 흰 글씨 = 프리멀티플라이드 색
+        alpha = np.zeros((strip_h, w), dtype=np.uint8)  # stroke + fill 커버리지
+        
+        y = 0
+        for fill, stroke in rendered:
+            lh, lw = fill.shape
+            lw = min(lw, w)
+            lh = min(lh, strip_h - y)
+            if lh <= 0:
+                break
+            x = (w - lw) // 2
+            # 검은색 stroke (외곽선)는 알파에만, 흰색 fill (본문)은 색과 알파 모두에
+            np.maximum(alpha[y:y + lh, x:x + lw], stroke[:lh, :lw], out=alpha[y:y + lh, x:x + lw])
+            np.maximum(alpha[y:y + lh, x:x + lw], fill[:lh, :lw], out=alpha[y:y + lh, x:x + lw])
+            color[y:y + lh, x:x + lw] = fill[:lh, :lw, None]
+            y += lh + line_spacing
+        
+        # 프리멀티플라이드 조건 (색 <= 알파) 보장 후 내용 영역만 잘라서 보관
+        np.minimum(color, alpha[:, :, None], out=color)
+        box = content_bbox(alpha)
+        if box is None:
+            return None
+        y0, y1, x0, x1 = box
+        return (np.ascontiguousarray(color[y0:y1, x0:x1]), np.ascontiguousarray(alpha[y0:y1, x0:x1]),
+                strip_top + y0, x0)
+    
     def _draw_subtitle(self, frame):
-        """프레임에 자막을 그립니다 (제일 위 레이어). OpenCV 기본 폰트 사용 (최고 성능)."""
+        """
+        프레임(백 버퍼)에 자막을 직접 그립니다 (제일 위 레이어).
+        자막은 (텍스트, 프레임 크기)마다 한 번만 스프라이트로 렌더링해 LRU 캐시에 두고,
+        매 프레임에는 하단 자막 영역만 알파 블렌딩합니다.
+        """
         with self.current_subtitle_lock:
             subtitle_text = self.current_subtitle_text
+            korean_text = self.current_subtitle_korean
         
         # 자막이 없으면 프레임 그대로 반환
         if subtitle_text is None or subtitle_text == "":
             return frame
         
         h, w = frame.shape[:2]
-        frame_size = (h, w)
-        
-        # 프레임 크기가 바뀌면 캐시 클리어
-        if self._last_frame_size != frame_size:
-            self._subtitle_cache.clear()
-            self._last_frame_size = frame_size
-        
-        frame_with_subtitle = frame.copy()
-        
-        # OpenCV 기본 폰트 사용 (PIL보다 훨씬 빠름)
-        font = cv2.FONT_HERSHEY_SIMPLEX
-        line_type = cv2.LINE_AA
-        
-        # 일반 자막 그리기 (하단)
-        if subtitle_text and subtitle_text != "":
-            font_scale = h / 720.0 * 0.8  # 720p 기준으로 스케일링
-            thickness = max(1, int(h / 360.0))
-            max_width = int(w * 0.9)
-            
-            lines = self._wrap_text_cv2(subtitle_text, font_scale, thickness, max_width)
-            
-            # 각 줄의 높이 계산
-            line_height = 0
-            for line in lines:
-                (text_width, text_height), baseline = cv2.getTextSize(line, font, font_scale, thickness)
-                line_height = max(line_height, text_height)
-            
-            line_spacing = int(line_height * 0.3)
-            total_height = len(lines) * line_height + (len(lines) - 1) * line_spacing
-            y_start = h - 64 - total_height
-            
-            # 각 줄을 그리기
-            for i, line in enumerate(lines):
-                (text_width, text_height), baseline = cv2.getTextSize(line, font, font_scale, thickness)
-                x = (w - text_width) // 2
-                y = y_start + i * (line_height + line_spacing) + text_height
-                
-                # 검은색 stroke (외곽선) 그리기 - 8방향만
-                stroke_width = 2
-                stroke_offsets = [
-                    (-stroke_width, -stroke_width), (-stroke_width, 0), (-stroke_width, stroke_width),
-                    (0, -stroke_width), (0, stroke_width),
-                    (stroke_width, -stroke_width), (stroke_width, 0), (stroke_width, stroke_width)
-                ]
-                for dx, dy in stroke_offsets:
-                    cv2.putText(frame_with_subtitle, line, (x + dx, y + dy), font, font_scale,
-                               (0, 0, 0), thickness + 1, line_type)
-                
-                # 흰색 fill (본문) 그리기
-                cv2.putText(frame_with_subtitle, line, (x, y), font, font_scale,
-                           (255, 255, 255), thickness, line_type)
+        cache_key = (subtitle_text, korean_text, h, w)
+        sprite = self._subtitle_sprites.get(cache_key)
+        if sprite is None and cache_key not in self._subtitle_sprites:
+            sprite = self._render_subtitle_sprite(subtitle_text, korean_text, h, w)
+            self._subtitle_sprites[cache_key] = sprite
+            # 오래 사용하지 않은 스프라이트부터 제거 (하루 종일 운영해도 메모리가 늘지 않도록)
+            while len(self._subtitle_sprites) > SUBTITLE_SPRITE_CACHE_SIZE:
+                self._subtitle_sprites.popitem(last=False)
+        else:
+            self._subtitle_sprites.move_to_end(cache_key)
         
-        return frame_with_subtitle
+        if sprite is not None:
+            premul, alpha, y, x = sprite
+            self._compositor.attach(frame)
+            self._compositor.blend_premultiplied(premul, alpha, y, x)
+        return frame
     
     def get_frame(self):
-        """현재 프레임 가져오기"""
-        with self.lock:
-            if self.frame is not None:
-                frame = self.frame.copy()
-                # 자막 그리기 (제일 위 레이어)
-                frame = self._draw_subtitle(frame)
-                return frame
-        return None
+        """
+        현재 프레임 가져오기 (자막 포함, 복사 없음).
+        반환된 배열은 읽기 전용이며 다음 get_frame 호출 전까지 유효합니다.
+        """
+        return self.presenter.acquire()
 
 # 전역 비디오 플레이어 인스턴스
 VIDEO_PLAYER = VideoPlayer()
 
 # 배경 비디오 설정
-BG_VIDEO_DIR = "bg_video"
 BOOK_TO_VIDEO = {
     "BJBJ": "10bgBJBJ.mov",
     "PSJ": "11bgPSJ.mov",
@@ -847,6 +2201,15 @@ BOOK_TO_VIDEO = {
     "JHHRJ": "6bgJHHRJ.mov",
     "SCJ": "7bgSCJ.mov",
 }
+
+
+def warm_background_capture_pool():
+    """모든 배경 비디오를 캡처 풀에 미리 열어 둡니다 (별도 스레드, 재생을 막지 않음)."""
+    paths = [os.path.join(BG_VIDEO_DIR, f) for f in BOOK_TO_VIDEO.values()]
+    paths = [p for p in paths if ASSET_INDEX.exists(p)]
+    threading.Thread(target=BG_CAPTURE_POOL.warm, args=(paths,), name="bg-pool-warm", daemon=True).start()
+
+
 # 오버레이 비디오 파일명 매핑 (파일명과 일치)
 BOOK_TO_OVERLAY_CODE = {
     "BJBJ": "BJBJ",
@@ -860,9 +2223,6 @@ BOOK_TO_OVERLAY_CODE = {
     "SCJ": "SCJ",
 }
 
-# Interactions 폴더 경로
-INTERACTIONS_DIR = "Interactions"
-
 
 def get_overlay_video_path(bg_book_code: str, char_num: int, char_book_code: str) -> str:
     """
@@ -880,6 +2240,102 @@ def get_overlay_video_path(bg_book_code: str, char_num: int, char_book_code: str
     filename = f"bg{bg_book_code}_ch{char_num}_{overlay_code}.mov"
     return os.path.join(INTERACTIONS_DIR, f"bg{bg_book_code}", filename)
 
+
+def _background_overlay_paths(bg_book_code: str) -> list[str]:
+    """배경에 해당하는 Interactions 오버레이 클립 경로들"""
+    overlay_dir = os.path.join(INTERACTIONS_DIR, f"bg{bg_book_code}")
+    if not os.path.isdir(overlay_dir):
+        return []
+    return sorted(
+        os.path.join(overlay_dir, name) for name in os.listdir(overlay_dir)
+        if name.startswith(f"bg{bg_book_code}_ch") and name.endswith(".mov")
+    )
+
+
+def _background_output_size(bg_book_code: str):
+    """배경 비디오 해상도 (h, w) = 그 배경 위 오버레이의 출력 해상도 (알 수 없으면 None)"""
+    video_file = BOOK_TO_VIDEO.get(bg_book_code)
+    if not video_file:
+        return None
+    return video_frame_size(os.path.join(BG_VIDEO_DIR, video_file))
+
+
+def prefetch_overlays_for_background(bg_book_code: str):
+    """
+    배경에 해당하는 Interactions 오버레이 클립들을 남은 캐시 예산 안에서 미리 디코딩합니다.
+    캐릭터 교체 시 디코딩 없이 바로 캐시에서 꺼내 쓰기 위함입니다.
+    """
+    paths = _background_overlay_paths(bg_book_code)
+    if not paths:
+        return
+    # 배경 비디오 해상도에 맞춘 버전으로 미리 디코딩 (재생 중 리사이즈 방지)
+    OVERLAY_FRAME_CACHE.prefetch(paths, _background_output_size(bg_book_code))
+
+
+def build_overlay_frame_store(force: bool = False):
+    """
+    모든 배경의 Interactions 오버레이 클립을 그 배경 해상도에 맞춰 디코딩해 프레임 스토어(.npy)로 저장합니다.
+    이미 최신 스토어가 있는 클립은 건너뜁니다 (force=True면 모두 다시 저장).
+    """
+    ASSET_INDEX.build(hash_now=True)  # 수정 시각만 바뀐 원본을 내용 해시로 확인하기 위해
+    decoder = OverlayFrameCache(1 << 62)  # 스토어 저장용 디코딩 (예산 제한 없음)
+    built = skipped = 0
+    for bg_book_code in BOOK_TO_VIDEO:
+        size = _background_output_size(bg_book_code)
+        for path in _background_overlay_paths(bg_book_code):
+            if size is None:
+                print(f"⏭️ 배경 해상도를 알 수 없어 건너뜀: {path}")
+                continue
+            if not force and OverlayFrameStore.load(path, size) is not None:
+                skipped += 1
+                continue
+            clip = decoder._decode(path, size)
+            if clip is None:
+                print(f"⏭️ 디코딩 실패 또는 내용 없음: {path}")
+                continue
+            store_path = OverlayFrameStore.write(path, clip)
+            if store_path:
+                built += 1
+                print(f"✅ 프레임 스토어 저장: {store_path} ({len(clip)}프레임, "
+                      f"{os.path.getsize(store_path) / 1e6:.1f}MB)")
+    print(f"\n🎯 오버레이 프레임 스토어: {built}개 생성, {skipped}개 최신 상태")
+
+def benchmark_compositor(size=(1080, 1920), iterations: int = 60):
+    """
+    백엔드별, 타일(가로 띠) 수별 합성 속도를 측정합니다 (배경 복사 + 오버레이 두 장, 한 장은 반투명).
+    COMPOSITOR_BACKEND/COMPOSITOR_TILES를 정할 때 참고용입니다.
+    """
+    h, w = size
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 256, (h, w, 3), dtype=np.uint8)
+    layers = []
+    for (y, x, lh, lw), opacity in (((h // 8, w // 10, h * 3 // 4, w // 2), 255),
+                                    ((h // 4, w * 2 // 5, h * 2 // 3, w // 2), 200)):
+        alpha = rng.integers(0, 256, (lh, lw), dtype=np.uint8)
+        color = rng.integers(0, 256, (lh, lw, 3), dtype=np.uint8)
+        premul = ((color.astype(np.uint16) * alpha[:, :, None] + 127) // 255).astype(np.uint8)
+        layers.append((premul, alpha, y, x, opacity))
+    out = np.empty_like(background)
+    
+    counts = sorted({1, 2, 4, 8, min(8, os.cpu_count() or 1)})
+    print(f"🧪 합성 벤치마크: {w}x{h}, 오버레이 2장, {iterations}회 (CPU 코어 {os.cpu_count()}개)")
+    for backend_cls in COMPOSITOR_BACKENDS.values():
+        baseline = None
+        for tiles in counts:
+            compositor = FrameCompositor(tiles, backend_cls())
+            compositor.begin(background, out)
+            compositor.blend_layers(layers)  # 버퍼 할당/스레드 생성/JIT 컴파일은 측정에서 제외
+            start = time.perf_counter()
+            for _ in range(iterations):
+                compositor.begin(background, out)
+                compositor.blend_layers(layers)
+            ms = (time.perf_counter() - start) / iterations * 1000
+            baseline = baseline or ms
+            print(f"   {backend_cls.name:6s} 타일 {tiles}개: {ms:6.2f}ms/프레임 ({1000 / ms:6.1f} fps, x{baseline / ms:.2f})")
+            if compositor._pool is not None:
+                compositor._pool.shutdown()
+
+
 def measure_character_height(overlay_path: str) -> tuple[int, int]:
     """
     캐릭터 오버레이 비디오의 높이와 키 중앙점을 측정합니다 (투명 부분 제외).
@@ -890,7 +2346,7 @@ def measure_character_height(overlay_path: str) -> tuple[int, int]:
     Returns:
         (캐릭터의 실제 높이, 키 중앙점 Y 좌표) 튜플
     """
-    if not os.path.exists(overlay_path):
+    if not ASSET_INDEX.exists(overlay_path):
         return (0, 0)
     
     try:
@@ -910,21 +2366,19 @@ def measure_character_height(overlay_path: str) -> tuple[int, int]:
         # RGBA 또는 BGR 확인
         if len(frame.shape) == 3 and frame.shape[2] == 4:
             # RGBA: 알파 채널 사용
-            alpha = frame[:, :, 3]
-            # 각 행에서 알파가 0이 아닌 픽셀이 있는지 확인
-            rows_with_content = np.any(alpha > 0, axis=1)
+            content_mask = frame[:, :, 3]
         else:
             # BGR: 그레이스케일로 변환하여 검은색이 아닌 부분 찾기
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            rows_with_content = np.any(gray > 0, axis=1)
+            content_mask = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         
         # 내용이 있는 첫 행과 마지막 행 찾기
-        if not np.any(rows_with_content):
+        box = content_bbox(content_mask)
+        if box is None:
             # 내용이 없으면 전체 높이 반환, 중앙점은 프레임 중앙
             return (frame_height, frame_height // 2)
         
-        first_row = np.argmax(rows_with_content)
-        last_row = len(rows_with_content) - 1 - np.argmax(rows_with_content[::-1])
+        first_row = box[0]
+        last_row = box[1] - 1
         
         height = last_row - first_row + 1
         # 키 중앙점: first_row와 last_row의 중간점
@@ -963,8 +2417,9 @@ ROLE_MAP = {
 # ============================================
 # ArUco 마커 설정
 # ============================================
-ARUCO_DICTIONARY = aruco.getPredefinedDictionary(aruco.DICT_5X5_1000)
 ARUCO_MARKER_SIZE = 200  # pixels
+MARKER_VOTE_WINDOW = 8  # 마커 확정 투표에 쓰는 최근 프레임 수 (M)
+MARKER_VOTES_REQUIRED = 5  # 최근 MARKER_VOTE_WINDOW 프레임 중 이만큼 보여야 마커 확정 (N)
 
 # 마커 ID → 책 코드 매핑
 MARKER_TO_BOOK = {
@@ -1097,7 +2552,7 @@ def play_background_music(book_code: str):
     bg_sound_path = None
     if bg_sound_file:
         bg_sound_path = os.path.join(BG_SOUND_DIR, bg_sound_file)
-        if not os.path.exists(bg_sound_path):
+        if not ASSET_INDEX.exists(bg_sound_path):
             print(f"⚠️ bg_sound 파일을 찾을 수 없음: {bg_sound_path}")
             bg_sound_path = None
     
@@ -1106,7 +2561,7 @@ def play_background_music(book_code: str):
     bg_music_path = None
     if bg_music_file:
         bg_music_path = os.path.join(BG_MUSIC_DIR, bg_music_file)
-        if not os.path.exists(bg_music_path):
+        if not ASSET_INDEX.exists(bg_music_path):
             print(f"⚠️ bg_music 파일을 찾을 수 없음: {bg_music_path}")
             bg_music_path = None
     
@@ -1274,7 +2729,7 @@ def play_background_video(book_code: str):
         return
     
     video_path = os.path.join(BG_VIDEO_DIR, video_file)
-    if not os.path.exists(video_path):
+    if not ASSET_INDEX.exists(video_path):
         print(f"🎬 비디오 파일을 찾을 수 없음: {video_path}")
         return
     
@@ -2088,6 +3543,9 @@ def generate_tts(character: dict, text: str, output_path: str):
     except:
         pass
 
+    # 재생 시 자막에 한국어 원문도 함께 표시할 수 있도록 기록
+    _tts_korean_lines[temp_output] = text
+
     return temp_output, english_text, character_name
 
 
@@ -2123,8 +3581,9 @@ def stop_all_audio():
         except:
             pass
     
-    # 자막 지우기
+    # 자막 지우기 (재생되지 못한 TTS의 한국어 원문도 정리)
     VIDEO_PLAYER.clear_subtitle()
+    _tts_korean_lines.clear()
     
     # 잠시 대기 후 플래그 리셋 (다음 시퀀스가 시작될 수 있도록)
     import time
@@ -2149,9 +3608,10 @@ def play_audio(path: str, blocking: bool = False, subtitle_text: str = None):
     
     print(f"🔊 PLAY AUDIO: {path}")
     
-    # 자막 설정
+    # 자막 설정 (TTS 오디오면 한국어 원문도 함께)
+    korean_text = _tts_korean_lines.pop(path, None)
     if subtitle_text:
-        VIDEO_PLAYER.set_subtitle(subtitle_text)
+        VIDEO_PLAYER.set_subtitle(subtitle_text, korean_text)
     
     def play():
         import tempfile
@@ -2302,13 +3762,14 @@ def handle_book_input(book_code: str, index_in_sequence: int):
         print(f"[BACKGROUND INIT] {book_code} → {bg.get('background')}")
         play_background_video(book_code)  # 배경 비디오 재생 (무한 루프, 오디오 포함)
         play_background_music(book_code)  # 배경 음악 재생 (무한 루프)
+        prefetch_overlays_for_background(book_code)  # 이 배경의 캐릭터 오버레이 미리 디코딩
         
         # 배경이 바뀔 때 사운드 이펙트만 재생 (제목 말하기는 마커 감지 시에만 재생)
         sound_effect_path = "soundeffect/ES_Dream, Harp - Epidemic Sound.wav"
         
         def play_sound():
             # ES_Dream 사운드 이펙트를 음량 20%로 처리한 임시 파일 생성 및 재생
-            if os.path.exists(sound_effect_path):
+            if ASSET_INDEX.exists(sound_effect_path):
                 try:
                     os.makedirs("title_saying", exist_ok=True)
                     temp_sound = f"title_saying/temp_sound_{book_code}.wav"
@@ -2354,14 +3815,13 @@ def handle_book_input(book_code: str, index_in_sequence: int):
             overlay_path = get_overlay_video_path(CURRENT_BG_BOOK_CODE, 1, book_code)
             print(f"🔍 [index 2] ch1 오버레이 비디오 경로: {overlay_path}")
             print(f"🔍 [index 2] 배경: {CURRENT_BG_BOOK_CODE}, 캐릭터: {book_code}")
-            if os.path.exists(overlay_path):
+            if ASSET_INDEX.exists(overlay_path):
                 print(f"✅ 파일 존재 확인, 오버레이 비디오 설정 중...")
                 VIDEO_PLAYER.set_overlay_video(overlay_path)
                 # 비디오가 제대로 설정되었는지 확인
                 import time
                 time.sleep(0.15)  # 비디오 초기화를 위한 대기
-                with VIDEO_PLAYER.lock:
-                    is_set = VIDEO_PLAYER.overlay_video_cap is not None and VIDEO_PLAYER.overlay_video_cap.isOpened()
+                is_set = VIDEO_PLAYER.has_overlay(1)
                 print(f"🎬 오버레이 비디오 ch1 설정 완료: {overlay_path} (설정됨: {is_set})")
             else:
                 print(f"⚠️ 오버레이 비디오를 찾을 수 없음: {overlay_path}")
@@ -2422,13 +3882,12 @@ def handle_book_input(book_code: str, index_in_sequence: int):
         # ch2 오버레이 비디오 설정 (배경에 맞는 폴더에서 찾기)
         if CURRENT_BG_BOOK_CODE:
             overlay_path2 = get_overlay_video_path(CURRENT_BG_BOOK_CODE, 2, book_code)
-            if os.path.exists(overlay_path2):
+            if ASSET_INDEX.exists(overlay_path2):
                 VIDEO_PLAYER.set_overlay_video2(overlay_path2)
                 print(f"🎬 오버레이 비디오 ch2 설정: {overlay_path2}")
                 import time
                 time.sleep(0.15)
-                with VIDEO_PLAYER.lock:
-                    is_set = VIDEO_PLAYER.overlay_video_cap2 is not None and VIDEO_PLAYER.overlay_video_cap2.isOpened()
+                is_set = VIDEO_PLAYER.has_overlay(2)
                 print(f"🎬 오버레이 비디오 ch2 업데이트 완료: {overlay_path2} (설정됨: {is_set})")
             else:
                 print(f"⚠️ 오버레이 비디오 ch2를 찾을 수 없음: {overlay_path2}")
@@ -2520,20 +3979,20 @@ def handle_book_input(book_code: str, index_in_sequence: int):
         # 배경 교체 및 오버레이 비디오도 새 배경에 맞게 업데이트
         play_background_video(book_code)  # 배경 비디오 교체 (무한 루프, 오디오 포함, 페이드 효과)
         play_background_music(book_code)  # 배경 음악 교체 (무한 루프)
+        prefetch_overlays_for_background(book_code)  # 새 배경의 캐릭터 오버레이 미리 디코딩
         
         # 현재 캐릭터들의 오버레이 비디오를 새 배경에 맞게 업데이트
         if CURRENT_CHA1_INFO is not None and CURRENT_CHA1_INFO.get('book_code'):
             try:
                 overlay_path_ch1 = get_overlay_video_path(book_code, 1, CURRENT_CHA1_INFO['book_code'])
                 print(f"🔍 [배경 교체] ch1 오버레이 비디오 경로: {overlay_path_ch1}")
-                if os.path.exists(overlay_path_ch1):
+                if ASSET_INDEX.exists(overlay_path_ch1):
                     print(f"✅ 파일 존재 확인, 오버레이 비디오 설정 중...")
                     VIDEO_PLAYER.set_overlay_video(overlay_path_ch1)
                     # 비디오가 제대로 설정되었는지 확인
                     import time
                     time.sleep(0.15)  # 비디오 초기화를 위한 대기
-                    with VIDEO_PLAYER.lock:
-                        is_set = VIDEO_PLAYER.overlay_video_cap is not None and VIDEO_PLAYER.overlay_video_cap.isOpened()
+                    is_set = VIDEO_PLAYER.has_overlay(1)
                     print(f"🎬 오버레이 비디오 ch1 업데이트 완료 (새 배경): {overlay_path_ch1} (설정됨: {is_set})")
                 else:
                     print(f"⚠️ 오버레이 비디오 ch1를 찾을 수 없음: {overlay_path_ch1}")
@@ -2552,14 +4011,13 @@ def handle_book_input(book_code: str, index_in_sequence: int):
             try:
                 overlay_path_ch2 = get_overlay_video_path(book_code, 2, CURRENT_CHA2_INFO['book_code'])
                 print(f"🔍 [배경 교체] ch2 오버레이 비디오 경로: {overlay_path_ch2}")
-                if os.path.exists(overlay_path_ch2):
+                if ASSET_INDEX.exists(overlay_path_ch2):
                     print(f"✅ 파일 존재 확인, 오버레이 비디오 설정 중...")
                     VIDEO_PLAYER.set_overlay_video2(overlay_path_ch2)
                     # 비디오가 제대로 설정되었는지 확인
                     import time
                     time.sleep(0.15)  # 비디오 초기화를 위한 대기
-                    with VIDEO_PLAYER.lock:
-                        is_set = VIDEO_PLAYER.overlay_video_cap2 is not None and VIDEO_PLAYER.overlay_video_cap2.isOpened()
+                    is_set = VIDEO_PLAYER.has_overlay(2)
                     print(f"🎬 오버레이 비디오 ch2 업데이트 완료 (새 배경): {overlay_path_ch2} (설정됨: {is_set})")
                 else:
                     print(f"⚠️ 오버레이 비디오 ch2를 찾을 수 없음: {overlay_path_ch2}")
@@ -2579,7 +4037,7 @@ def handle_book_input(book_code: str, index_in_sequence: int):
         
         def play_sound():
             # ES_Dream 사운드 이펙트를 음량 20%로 처리한 임시 파일 생성 및 재생
-            if os.path.exists(sound_effect_path):
+            if ASSET_INDEX.exists(sound_effect_path):
                 try:
                     os.makedirs("title_saying", exist_ok=True)
                     temp_sound = f"title_saying/temp_sound_{book_code}.wav"
@@ -2633,7 +4091,7 @@ def handle_book_input(book_code: str, index_in_sequence: int):
             overlay_path = get_overlay_video_path(CURRENT_BG_BOOK_CODE, 1, book_code)
             print(f"🔍 [cha1 교체] ch1 오버레이 비디오 경로: {overlay_path}")
             print(f"🔍 [cha1 교체] 배경: {CURRENT_BG_BOOK_CODE}, 새 캐릭터: {book_code}")
-            if os.path.exists(overlay_path):
+            if ASSET_INDEX.exists(overlay_path):
                 print(f"✅ 파일 존재 확인됨, 오버레이 비디오 설정 중...")
                 # 오버레이 비디오 즉시 설정
                 VIDEO_PLAYER.set_overlay_video(overlay_path)
@@ -2712,14 +4170,13 @@ def handle_book_input(book_code: str, index_in_sequence: int):
             overlay_path2 = get_overlay_video_path(CURRENT_BG_BOOK_CODE, 2, book_code)
             print(f"🔍 [cha2 교체] ch2 오버레이 비디오 경로: {overlay_path2}")
             print(f"🔍 [cha2 교체] 배경: {CURRENT_BG_BOOK_CODE}, 새 캐릭터: {book_code}")
-            if os.path.exists(overlay_path2):
+            if ASSET_INDEX.exists(overlay_path2):
                 print(f"✅ 파일 존재 확인, 오버레이 비디오 설정 중...")
                 # 오버레이 비디오 즉시 설정
                 VIDEO_PLAYER.set_overlay_video2(overlay_path2)
                 import time
                 time.sleep(0.15)
-                with VIDEO_PLAYER.lock:
-                    is_set = VIDEO_PLAYER.overlay_video_cap2 is not None and VIDEO_PLAYER.overlay_video_cap2.isOpened()
+                is_set = VIDEO_PLAYER.has_overlay(2)
                 print(f"🎬 오버레이 비디오 ch2 업데이트 완료: {overlay_path2} (설정됨: {is_set})")
             else:
                 print(f"⚠️ 오버레이 비디오 ch2를 찾을 수 없음: {overlay_path2}")
@@ -2772,6 +4229,62 @@ def handle_book_input(book_code: str, index_in_sequence: int):
 # ============================================
 # 7. 웹캠 ArUco 마커 감지
 # ============================================
+class MarkerEventGate:
+    """
+    마커 감지 결과를 handle_book_input 실행 이벤트로 바꾸는 단계.
+    
+    마커는 최근 window 프레임 중 votes 프레임 이상 보여야 확정되고, 확정된 마커가 바뀔 때만 이벤트를 냅니다.
+    책을 밀어 지나가거나 두 ID 사이에서 깜빡이는 동안의 변화는 모두 흡수됩니다.
+    확정은 이번 프레임에 보인 마커만 할 수 있으므로 (오래된 투표가 빠지면서 다른 마커가 과반이 되어도
+    그 마커가 다시 보일 때까지 기다림) 이벤트는 항상 마커가 감지된 프레임에서 나고,
+    여러 마커가 동시에 조건을 만족하면 지금 보이는 마커가 이깁니다.
+    매 프레임 ID가 바뀔 때마다 바로 실행하던 기존 방식과 비교해 억제된 실행 횟수를 셉니다.
+    """
+    
+    def __init__(self, votes: int = MARKER_VOTES_REQUIRED, window: int = MARKER_VOTE_WINDOW):
+        self.votes = min(votes, window)
+        self._history = deque(maxlen=window)  # 최근 프레임별 마커 ID (없으면 None)
+        self.confirmed = None  # 마지막으로 이벤트를 낸 마커 ID
+        self._raw_last = None  # 기존 방식이었다면 마지막으로 실행했을 마커 ID
+        self.raw_changes = 0  # 기존 방식의 실행 횟수
+        self.events = 0  # 실제로 낸 이벤트 수
+    
+    @property
+    def suppressed(self) -> int:
+        """기존 방식 대비 억제된 handle_book_input 실행 횟수"""
+        return self.raw_changes - self.events
+    
+    @property
+    def pending(self) -> bool:
+        """확정되지 않은 새 마커를 투표 중인지 (대기 모드에서도 매 프레임 감지해야 함)"""
+        return any(marker_id is not None and marker_id != self.confirmed for marker_id in self._history)
+    
+    def update(self, marker_id):
+        """
+        이번 프레임의 마커 ID (없으면 None)를 반영합니다.
+        
+        Returns:
+            새로 확정된 마커 ID (이벤트가 없으면 None)
+        """
+        self._history.append(marker_id)
+        if marker_id is not None and marker_id != self._raw_last:
+            self._raw_last = marker_id
+            self.raw_changes += 1
+        
+        # 이번 프레임의 마커가 조건을 만족할 때만 확정
+        if marker_id is None or marker_id == self.confirmed or self._history.count(marker_id) < self.votes:
+            return None
+        self.confirmed = marker_id
+        self.events += 1
+        return marker_id
+    
+    def reset(self):
+        """마커가 사라져 리셋된 뒤에는 같은 마커도 다시 이벤트를 냄"""
+        self._history.clear()
+        self.confirmed = None
+        self._raw_last = None
+
+
 def run_webcam_detection():
     """
     웹캠으로 ArUco 마커를 감지하고, 감지된 마커에 따라 handle_book_input을 호출합니다.
@@ -2780,19 +4293,34 @@ def run_webcam_detection():
     """
     global CURRENT_BG_BOOK_CODE
     
-    cap = cv2.VideoCapture(0)
-    if not cap.isOpened():
+    # 웹캠은 전용 캡처 스레드가 계속 읽고, 감지 루프는 항상 가장 최근 프레임만 가져감
+    # (ARUCO_DETECTION_PROCESS=1이면 캡처와 감지 모두 별도 프로세스에서)
+    profile = CAMERA_PROFILES.get(CAMERA_PROFILE)
+    if profile is None:
+        print(f"⚠️ 알 수 없는 웹캠 프로파일: {CAMERA_PROFILE} (기본 설정 사용)")
+    if ARUCO_DETECTION_PROCESS:
+        camera = DetectionProcess(CAMERA_INDEX, profile)
+    else:
+        camera = CameraCapture(CAMERA_INDEX, profile)
+    if not camera.open():
         print("❌ 웹캠을 열 수 없습니다!")
         return
+    camera.start()
     
     print("📷 Camera . Press 'q' to quit.")
     print("📚 Show your book to camera...")
     
-    # 비디오 플레이어 시작
+    # 에셋 메타데이터 인덱스 (바뀐 파일만 다시 분석) - 이후 fps/존재 여부 조회는 인덱스 사용
+    ASSET_INDEX.build()
+    
+    # 비디오 플레이어 시작 (배경 비디오 캡처는 미리 열어 둠)
     VIDEO_PLAYER.start()
+    warm_background_capture_pool()
     
-    detector_params = aruco.DetectorParameters()
+    detector_params = load_aruco_detector_parameters()
     detector = aruco.ArucoDetector(ARUCO_DICTIONARY, detector_params)
+    tracker = MarkerTracker(detector) if ARUCO_TRACKING else None
+    marker_gate = MarkerEventGate()  # N/M 프레임 투표로 마커 확정 (깜빡임/책 밀기로 인한 중복 실행 방지)
     
     sequence_index = 0  # 현재 시퀀스 인덱스
     last_detected_marker = None  # 마지막으로 감지된 마커 (중복 방지)
@@ -2816,17 +4344,46 @@ def run_webcam_detection():
         finally:
             is_processing = False
     
+    last_idle_poll = 0.0  # 대기 모드에서 마지막으로 마커를 감지한 시각
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("❌ 프레임을 읽을 수 없습니다!")
-            break
+        # 대기 모드 (검은 화면, 마커 없음)에서는 IDLE_POLL_INTERVAL마다만 감지/화면 갱신하고
+        # 그 사이에는 캡처 스레드가 grab()으로 버퍼만 비움 (디코딩/감지/imshow 생략)
+        idle = VIDEO_PLAYER.is_idle() and not is_processing and not marker_gate.pending
+        camera.set_idle(idle)
+        remaining = IDLE_POLL_INTERVAL - (time.time() - last_idle_poll)
+        if idle and remaining > 0:
+            if cv2.waitKey(max(1, int(remaining * 1000))) & 0xFF == ord('q'):
+                break
+            continue
+        last_idle_poll = time.time()
         
-        # ArUco 마커 감지
-        corners, ids, rejected = detector.detectMarkers(frame)
+        if ARUCO_DETECTION_PROCESS:
+            # 감지 프로세스가 이미 감지한 결과
+            frame, captured_at, corners, ids = camera.read_latest()
+        else:
+            frame, captured_at = camera.read_latest()
+        if frame is None:
+            if not camera.is_alive():
+                print("❌ 프레임을 읽을 수 없습니다!")
+                break
+            continue
+        
+        # ArUco 마커 감지 (가장 최근 프레임으로)
+        if not ARUCO_DETECTION_PROCESS:
+            if tracker is not None:
+                corners, ids = tracker.detect(frame)
+            else:
+                corners, ids, _ = detector.detectMarkers(frame)
+        camera.record_latency(captured_at)
         
         current_time = time.time()
         
+        # 책 코드가 있는 첫 번째 마커로 투표 → 확정된 마커가 바뀔 때만 새 마커로 처리
+        frame_marker = None
+        if ids is not None:
+            frame_marker = next((int(i) for i in ids.ravel() if get_book_code_from_marker(int(i))), None)
+        confirmed_marker = marker_gate.update(frame_marker)
+        
         # 마커가 감지되지 않았을 때 처리 (타임아웃 버퍼 적용)
         if ids is None or len(ids) == 0:
             # 이전에 마커가 있었는데 지금 없으면 타임아웃 체크
@@ -2850,6 +4407,7 @@ def run_webcam_detection():
                     # 상태 초기화 (전역 변수도 리셋)
                     global CURRENT_BG_BOOK_CODE, CURRENT_BG_INFO, CURRENT_CHA1_INFO, CURRENT_CHA2_INFO
                     last_detected_marker = None
+                    marker_gate.reset()
                     sequence_index = 0
                     fade_out_triggered = True
                     last_marker_time = None
@@ -2866,9 +4424,9 @@ def run_webcam_detection():
             
             aruco.drawDetectedMarkers(frame, corners, ids)
             
-            # 첫 번째로 감지된 마커 처리
-            marker_id = ids[0][0]
-            book_code = get_book_code_from_marker(marker_id)
+            # 투표로 확정된 마커 처리
+            marker_id = confirmed_marker
+            book_code = get_book_code_from_marker(marker_id) if marker_id is not None else None
             
             # 새 마커 감지 처리
             if book_code and marker_id != last_detected_marker:
@@ -2888,13 +4446,15 @@ def run_webcam_detection():
                     book_name_kr = book_info.get("book", book_code)
                     
                     print(f"\n🎯 Marker Detected! ID: {marker_id} → {book_name_kr} ({book_code}) (Num of books: {sequence_index})")
+                    if marker_gate.suppressed:
+                        print(f"🗳️ 마커 투표로 억제된 핸들러 실행: 누적 {marker_gate.suppressed}회")
                     
                     # 마커 감지 즉시 제목 말하기 재생 (배경이 바뀔 때만 사운드 이펙트 포함)
                     title_saying_path = f"title_saying/{book_code}_title.wav"
                 
                 def play_title():
                     # 제목 말하기 재생 (음량 150%)
-                    if os.path.exists(title_saying_path):
+                    if ASSET_INDEX.exists(title_saying_path):
                         # 음량 150%로 조정한 임시 파일 생성
                         import tempfile
                         temp_dir = tempfile.gettempdir()
@@ -2949,16 +4509,16 @@ def run_webcam_detection():
             cv2.imshow("Background Video", video_frame)
         else:
             # 비디오가 없을 때 까만 화면 표시 (아무것도 감지되지 않았을 때)
-            # 비디오가 시작되기 전에도 윈도우를 유지하기 위해 까만 화면 표시
-            black_frame = np.zeros((720, 1280, 3), dtype=np.uint8)  # 기본 해상도
-            cv2.imshow("Background Video", black_frame)
+            # 비디오가 시작되기 전에도 윈도우를 유지하기 위해 까만 화면 표시 (미리 할당된 프레임 재사용)
+            cv2.imshow("Background Video", IDLE_BLACK_FRAME)
         
         # 'q' 키로 종료
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     
     # 정리
-    cap.release()
+    print(f"🗳️ 마커 이벤트 {marker_gate.events}회 (억제된 핸들러 실행 {marker_gate.suppressed}회)")
+    camera.release()
     VIDEO_PLAYER.stop()
     stop_background_music()  # bgm 중지
     cv2.destroyAllWindows()
@@ -2976,5 +4536,20 @@ if __name__ == "__main__":
         generate_aruco_markers()
         sys.exit(0)
     
+    # 합성 타일 수별 속도 측정 옵션
+    if len(sys.argv) > 1 and sys.argv[1] == "--bench-compositor":
+        benchmark_compositor()
+        sys.exit(0)
+    
+    # 오버레이 프레임 스토어 생성 옵션 (--force: 최신 스토어도 다시 저장)
+    if len(sys.argv) > 1 and sys.argv[1] == "--build-frame-store":
+        build_overlay_frame_store(force="--force" in sys.argv[2:])
+        sys.exit(0)
+    
+    # 키 오버레이 마스크 사전 계산 옵션 (--force: 최신 마스크도 다시 계산)
+    if len(sys.argv) > 1 and sys.argv[1] == "--build-overlay-masks":
+        build_overlay_masks(force="--force" in sys.argv[2:])
+        sys.exit(0)
+    
     # 기본: 웹캠 감지 모드 실행
     run_webcam_detection()
\ No newline at end of file
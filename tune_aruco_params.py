@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+녹화한 웹캠 클립으로 ArUco 감지 파라미터를 튜닝합니다.
+
+클립마다 화면에 나오는 마커 ID를 지정하면, 기본 DetectorParameters로 마커를 찾은 프레임을
+기준으로 삼아 이 프레임들에서 하나도 놓치지 않으면서 (재현율 100%) 다른 ID를 잘못 찾지 않는
+가장 빠른 파라미터 조합을 찾습니다. 결과는 aruco_profile.json에 저장되며,
+tts.py의 run_webcam_detection이 시작할 때 이 프로파일을 불러옵니다.
+
+탐색은 파라미터 하나씩 후보 값을 바꿔 보며 더 빨라지면 채택하는 방식을
+더 이상 개선되지 않을 때까지 반복합니다.
+
+후보는 실행 중과 같은 경로로 평가합니다 - ARUCO_TRACKING이 켜져 있으면 클립마다 MarkerTracker로
+프레임을 순서대로 감지하므로 (ROI / ARUCO_DOWNSCALE 축소 프레임 / 전체 해상도), 축소 프레임에서
+놓쳐 전체 감지로 넘어가는 비용과 그때의 재현율이 시간과 감지 결과에 그대로 반영됩니다.
+추적은 연속 프레임을 가정하므로 --step은 1 (기본값)로 두는 것이 실행 중과 가장 가깝습니다.
+
+사용법:
+    python tune_aruco_params.py 클립.mp4:6 다른클립.mp4:6,9 [--step 1] [--max-frames 300] [--output aruco_profile.json]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+import cv2
+import cv2.aruco as aruco
+
+# aruco_detection.py에서 공통 설정/함수 import (tts.py와 같은 감지 경로)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from aruco_detection import (ARUCO_DICTIONARY, ARUCO_PROFILE_PATH, ARUCO_TRACKING, ARUCO_DOWNSCALE,
+                 MarkerTracker, make_aruco_detector_parameters)
+
+PROFILE_VERSION = 2
+TIMING_REPEATS = 3  # 후보마다 모든 클립 감지를 반복해 가장 빠른 값을 사용 (측정 노이즈 감소)
+MIN_SPEEDUP = 0.02  # 이보다 적게 빨라지면 측정 노이즈로 보고 채택하지 않음 (비율)
+
+# 튜닝할 파라미터와 후보 값
+SEARCH_SPACE = {
+    "adaptiveThreshWinSizeMin": [3, 5, 7, 11, 15, 23],
+    "adaptiveThreshWinSizeMax": [7, 11, 15, 23, 35],
+    "adaptiveThreshWinSizeStep": [2, 4, 6, 10, 16, 24],
+    "minMarkerPerimeterRate": [0.01, 0.03, 0.05, 0.08, 0.12],
+    "polygonalApproxAccuracyRate": [0.03, 0.05, 0.08],
+    "perspectiveRemovePixelPerCell": [2, 3, 4, 8],
+    "useAruco3Detection": [False, True],
+    "minSideLengthCanonicalImg": [16, 32, 48],
+    "minMarkerLengthRatioOriginalImg": [0.0, 0.02, 0.05],
+}
+
+
+def parse_clip(spec: str):
+    """'경로:6,9' → (경로, {6, 9})"""
+    path, sep, ids = spec.rpartition(":")
+    if not sep or not path:
+        raise argparse.ArgumentTypeError(f"'클립경로:마커ID[,ID...]' 형식이어야 합니다: {spec}")
+    try:
+        return path, {int(i) for i in ids.split(",") if i.strip()}
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"마커 ID는 정수여야 합니다: {spec}")
+
+
+def load_frames(path: str, step: int, max_frames: int):
+    """클립에서 step 프레임마다 하나씩 최대 max_frames개를 그레이스케일로 읽습니다."""
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        print(f"❌ 클립을 열 수 없습니다: {path}")
+        return []
+    frames = []
+    index = 0
+    try:
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            if index % step == 0:
+                frames.append(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            index += 1
+    finally:
+        cap.release()
+    return frames
+
+
+def is_valid(params: dict) -> bool:
+    """서로 모순되는 조합 제외"""
+    defaults = aruco.DetectorParameters()
+    win_min = params.get("adaptiveThreshWinSizeMin", defaults.adaptiveThreshWinSizeMin)
+    win_max = params.get("adaptiveThreshWinSizeMax", defaults.adaptiveThreshWinSizeMax)
+    return win_min <= win_max
+
+
+def make_detect(detector):
+    """실행 중 (run_webcam_detection)과 같은 감지 함수 - gray → (corners, ids)"""
+    if ARUCO_TRACKING:
+        return MarkerTracker(detector, report_interval=float("inf")).detect
+    return lambda gray: detector.detectMarkers(gray)[:2]
+
+
+def evaluate(params: dict, clips):
+    """
+    clips [(프레임 목록, expected_ids)]를 클립마다 처음부터 순서대로 감지합니다.
+
+    Returns:
+        (프레임당 시간 (초), 프레임별 찾은 기대 ID 집합 목록, 잘못 찾은 ID 수)
+    """
+    detector = aruco.ArucoDetector(ARUCO_DICTIONARY, make_aruco_detector_parameters(params))
+    expected_per_frame = [expected for frames, expected in clips for _ in frames]
+    best = None
+    found = []
+    false_positives = 0
+    for repeat in range(TIMING_REPEATS):
+        results = []
+        start = time.perf_counter()
+        for frames, _ in clips:
+            detect = make_detect(detector)  # 추적 상태는 클립마다 새로 시작
+            for gray in frames:
+                _, ids = detect(gray)
+                results.append(set() if ids is None else {int(i) for i in ids.ravel()})
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        if repeat == 0:
+            found = [ids & expected for ids, expected in zip(results, expected_per_frame)]
+            false_positives = sum(len(ids - expected) for ids, expected in zip(results, expected_per_frame))
+    return best / len(expected_per_frame), found, false_positives
+
+
+def keeps_recall(found, reference) -> bool:
+    """기준 파라미터가 찾은 마커를 모든 프레임에서 다 찾았는지 (재현율 100%)"""
+    return all(ref <= ids for ids, ref in zip(found, reference))
+
+
+def tune(clips):
+    """
+    좌표 하강 탐색 - 파라미터 하나씩 후보 값을 바꿔 보며, 재현율을 지키면서 더 빠르면 채택합니다.
+
+    Returns:
+        (최적 파라미터 (기본값과 다른 것만), 프레임당 시간, 기준 프레임당 시간, 기준 결과, 기준 오검출 수)
+    """
+    base_time, reference, base_false = evaluate({}, clips)
+    print(f"📏 기본 파라미터: 프레임당 {base_time * 1000:.2f}ms, "
+          f"마커 {sum(len(r) for r in reference)}개 감지, 오검출 {base_false}개")
+
+    best_params = {}
+    best_time = base_time
+    evaluated = 1
+    improved = True
+    while improved:
+        improved = False
+        for name, values in SEARCH_SPACE.items():
+            for value in values:
+                if best_params.get(name, getattr(aruco.DetectorParameters(), name)) == value:
+                    continue
+                candidate = dict(best_params, **{name: value})
+                if not is_valid(candidate):
+                    continue
+                elapsed, found, false_positives = evaluate(candidate, clips)
+                evaluated += 1
+                if not keeps_recall(found, reference) or false_positives > base_false:
+                    continue
+                if elapsed < best_time * (1.0 - MIN_SPEEDUP):
+                    best_params, best_time = candidate, elapsed
+                    improved = True
+                    print(f"   ✅ {name}={value} → 프레임당 {elapsed * 1000:.2f}ms")
+    print(f"🔍 후보 {evaluated}개 평가")
+
+    # 기본값과 같은 항목은 프로파일에서 제외
+    defaults = aruco.DetectorParameters()
+    best_params = {k: v for k, v in best_params.items() if getattr(defaults, k) != v}
+    return best_params, best_time, base_time, reference, base_false
+
+
+def main():
+    parser = argparse.ArgumentParser(description="녹화한 웹캠 클립으로 ArUco 감지 파라미터를 튜닝합니다.")
+    parser.add_argument("clips", nargs="+", type=parse_clip, help="클립경로:마커ID[,ID...] (예: book6.mp4:6)")
+    parser.add_argument("--step", type=int, default=1, help="몇 프레임마다 하나씩 사용할지 (기본: 1)")
+    parser.add_argument("--max-frames", type=int, default=300, help="클립당 최대 프레임 수 (기본: 300)")
+    parser.add_argument("--output", default=ARUCO_PROFILE_PATH, help=f"저장할 프로파일 (기본: {ARUCO_PROFILE_PATH})")
+    args = parser.parse_args()
+
+    clips = []
+    for path, expected in args.clips:
+        frames = load_frames(path, max(1, args.step), args.max_frames)
+        print(f"🎬 {path}: {len(frames)}프레임, 마커 {sorted(expected)}")
+        if frames:
+            clips.append((frames, expected))
+    if not clips:
+        print("❌ 튜닝할 프레임이 없습니다!")
+        sys.exit(1)
+    if ARUCO_TRACKING:
+        print(f"🔎 추적 감지로 평가 (축소 {ARUCO_DOWNSCALE})")
+
+    params, best_time, base_time, reference, base_false = tune(clips)
+    frames_with_marker = sum(1 for ref in reference if ref)
+    if frames_with_marker == 0:
+        print("❌ 기본 파라미터로 지정한 마커를 한 번도 찾지 못했습니다 - 마커 ID나 클립을 확인하세요.")
+        sys.exit(1)
+    expected_total = sum(len(expected) * len(frames) for frames, expected in clips)
+    found_total = sum(len(ref) for ref in reference)
+
+    profile = {
+        "version": PROFILE_VERSION,
+        "dictionary": "DICT_5X5_1000",
+        "params": params,
+        "tracking": ARUCO_TRACKING,
+        "downscale": ARUCO_DOWNSCALE if ARUCO_TRACKING else 1.0,
+        "ms_per_frame": round(best_time * 1000, 3),
+        "baseline_ms_per_frame": round(base_time * 1000, 3),
+        "reference_detections": found_total,
+        "clips": [{"path": path, "marker_ids": sorted(expected)} for path, expected in args.clips],
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    tmp_path = args.output + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, args.output)
+
+    speedup = base_time / best_time if best_time > 0 else 0.0
+    print(f"\n📊 기본 파라미터 기준 감지율: {found_total}/{expected_total} "
+          f"({found_total / expected_total * 100:.1f}%) - 튜닝 후에도 모두 유지")
+    print(f"🎯 프레임당 {base_time * 1000:.2f}ms → {best_time * 1000:.2f}ms (x{speedup:.2f}) → {args.output}")
+    for name, value in params.items():
+        print(f"   {name} = {value}")
+
+
+if __name__ == '__main__':
+    main()